@@ -1,30 +1,37 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 import os
+import json
 import tempfile
-from dotenv import load_dotenv
 import uuid
+from dotenv import load_dotenv
 from werkzeug.utils import secure_filename
 
 # Load environment variables
 load_dotenv()
 
 # Import project modules
-from transcription import transcribe_audio
+from chunked_transcription import transcribe_meeting_audio
+from gcs_storage import start_orphan_sweep
+from meeting_sessions import MeetingSessions
+from transcript_cache import get_transcript_cache, make_cache_key, save_stream_with_hash
 from llm_utils import (
-    generate_meeting_takeaways,
-    generate_meeting_summary,
-    generate_meeting_notes,
-    get_chat_response
+    generate_meeting_analysis,
+    get_chat_response,
+    stream_chat_response,
+    summarize_chat_history
 )
-from langchain.memory import ConversationBufferMemory
 
 # Create Flask app
 app = Flask(__name__)
 CORS(app, origins=['http://localhost:4200'])  # Enable CORS for Angular dev server
 
-# Store memory sessions per meeting
-meeting_sessions = {}
+# Meetings available for chat, kept in the session store (see SESSION_STORE)
+meeting_sessions = MeetingSessions(summarizer=summarize_chat_history)
+
+# Remove temp audio that earlier runs left behind in GCS
+if os.getenv("GOOGLE_CLOUD_PROJECT"):
+    start_orphan_sweep(os.getenv("GOOGLE_CLOUD_PROJECT"))
 
 # Helper functions
 SUPPORTED_AUDIO_TYPES = {
@@ -137,43 +144,47 @@ def transcribe_endpoint():
         # Secure the filename
         filename = secure_filename(audio_file.filename)
         
-        # Save uploaded file temporarily
+        # Save uploaded file temporarily, hashing it for the transcript cache as it streams to disk
         with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(filename)[1]) as tmp_file:
-            audio_file.save(tmp_file.name)
             tmp_file_path = tmp_file.name
+        audio_hash = save_stream_with_hash(audio_file.stream, tmp_file_path)
         
         # Get MIME type
         mime_type = get_mime_type(filename, audio_file.content_type)
         
+        # Reuse the transcript (and analysis) of an identical earlier upload
+        cache = get_transcript_cache()
+        cache_key = make_cache_key(audio_hash)
+        cached = cache.get(cache_key) if cache else None
+        
         # Transcribe
-        transcript = transcribe_audio(tmp_file_path, mime_type)
+        transcript = cached['transcript'] if cached else transcribe_meeting_audio(tmp_file_path, mime_type)
         os.remove(tmp_file_path)
         
         if transcript and not transcript.startswith("Error:"):
-            # Generate meeting analysis
-            takeaways = generate_meeting_takeaways(transcript)
-            summary = generate_meeting_summary(transcript)
-            notes = generate_meeting_notes(transcript)
+            if cached and cached['analysis']:
+                analysis = cached['analysis']
+            else:
+                # Generate meeting analysis (takeaways, summary and notes run concurrently)
+                analysis = generate_meeting_analysis(transcript)
+                if cache:
+                    cache.put(cache_key, transcript, None if analysis['errors'] else analysis)
             
             # Parse chapters
             chapters = parse_chapter_transcript(transcript)
             
             # Create a session ID for this meeting
-            session_id = str(uuid.uuid4())
-            meeting_sessions[session_id] = {
-                'transcript': transcript,
-                'memory': ConversationBufferMemory(memory_key="chat_history", return_messages=True),
-                'chat_history': []
-            }
+            session_id = meeting_sessions.create(transcript, chapters)
             
             return jsonify({
                 'success': True,
                 'session_id': session_id,
                 'transcript': transcript,
                 'chapters': chapters,
-                'takeaways': takeaways,
-                'summary': summary,
-                'notes': notes,
+                'takeaways': analysis['takeaways'],
+                'summary': analysis['summary'],
+                'notes': analysis['notes'],
+                'analysis_errors': analysis['errors'],
                 'filename': filename
             })
         else:
@@ -198,23 +209,18 @@ def chat_endpoint():
         
         session = meeting_sessions[session_id]
         
-        # Get chat response
+        # Get chat response; get_chat_response records the exchange in the meeting's chat memory
+        # The cached transcript when there is one (only the question and history are sent),
+        # otherwise the passages retrieved for the question
+        cached_context, passages = meeting_sessions.get_chat_context(session_id, question)
         response = get_chat_response(
             transcript=session['transcript'],
             user_question=question,
-            memory=session['memory']
+            memory=session['memory'],
+            passages=passages,
+            cached_context=cached_context
         )
         
-        # Store chat history
-        session['chat_history'].append({
-            'role': 'user',
-            'content': question
-        })
-        session['chat_history'].append({
-            'role': 'assistant',
-            'content': response
-        })
-        
         return jsonify({
             'success': True,
             'response': response
@@ -223,6 +229,60 @@ def chat_endpoint():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route('/api/chat/stream', methods=['POST'])
+def chat_stream_endpoint():
+    """
+    Streams the answer to a chat question as Server-Sent Events: start, a token event per piece
+    of text, then done (or error). Disconnecting cancels the answer.
+    """
+    try:
+        data = request.get_json()
+        session_id = data.get('session_id')
+        question = data.get('question')
+        
+        if not session_id or session_id not in meeting_sessions:
+            return jsonify({'error': 'Invalid session ID'}), 400
+        
+        if not question:
+            return jsonify({'error': 'No question provided'}), 400
+        
+        request_id = data.get('request_id') or str(uuid.uuid4())
+        session = meeting_sessions[session_id]
+        cached_context, passages = meeting_sessions.get_chat_context(session_id, question)
+        answer = stream_chat_response(
+            transcript=session['transcript'],
+            user_question=question,
+            memory=session['memory'],
+            passages=passages,
+            cached_context=cached_context
+        )
+        
+        def generate():
+            chunks = []
+            try:
+                yield sse_event('start', {'session_id': session_id, 'request_id': request_id})
+                for text in answer:
+                    chunks.append(text)
+                    yield sse_event('token', {'text': text})
+            except Exception as e:
+                yield sse_event('error', {'error': str(e)})
+                return
+            finally:
+                # Werkzeug closes this generator when the client goes away, which ends the model request
+                answer.close()
+            yield sse_event('done', {'response': "".join(chunks)})
+        
+        return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'  # don't let a proxy buffer the stream
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/chat/history/<session_id>', methods=['GET'])
 def get_chat_history(session_id):
     """Get chat history for a session"""
@@ -232,7 +292,7 @@ def get_chat_history(session_id):
         
         return jsonify({
             'success': True,
-            'history': meeting_sessions[session_id]['chat_history']
+            'history': meeting_sessions.get_chat_history(session_id)
         })
         
     except Exception as e:
@@ -249,7 +309,7 @@ def search_endpoint():
         if not session_id or session_id not in meeting_sessions:
             return jsonify({'error': 'Invalid session ID'}), 400
         
-        transcript = meeting_sessions[session_id]['transcript']
+        transcript = meeting_sessions.get_transcript(session_id)
         chapters = parse_chapter_transcript(transcript)
         
         if search_term:
@@ -24,9 +24,10 @@ from llm_utils import (
     generate_meeting_takeaways,
     generate_meeting_summary,
     generate_meeting_notes,
-    get_chat_response
+    get_chat_response,
+    summarize_chat_history
 )
-from langchain.memory import ConversationBufferMemory
+from chat_memory import ChatMemory
 
 # Create Flask app
 app = Flask(__name__)
@@ -249,7 +250,7 @@ if "uploaded_file_name" not in st.session_state:
 
 # Chat specific session state
 if "chat_memory" not in st.session_state:
-    st.session_state.chat_memory = ConversationBufferMemory(memory_key="chat_history", return_messages=True)
+    st.session_state.chat_memory = ChatMemory(summarizer=summarize_chat_history)
 if "chat_messages" not in st.session_state: # For displaying chat history in UI
     st.session_state.chat_messages = []
 
@@ -274,7 +275,7 @@ with st.sidebar:
             st.session_state.processing_complete = False
             st.session_state.error_message = None
             st.session_state.chat_messages = [] # Reset chat on new file
-            st.session_state.chat_memory.clear() # Clear Langchain memory
+            st.session_state.chat_memory = ChatMemory(summarizer=summarize_chat_history) # Clear chat memory
             st.session_state.uploaded_file_name = uploaded_file.name
 
             with st.spinner(f"Processing {uploaded_file.name}... This may take a few minutes for large files."):
@@ -447,7 +448,7 @@ def transcribe_endpoint():
             session_id = str(uuid.uuid4())
             meeting_sessions[session_id] = {
                 'transcript': transcript,
-                'memory': ConversationBufferMemory(memory_key="chat_history", return_messages=True)
+                'memory': ChatMemory(summarizer=summarize_chat_history)
             }
             
             return jsonify({
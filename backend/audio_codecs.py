@@ -0,0 +1,61 @@
+import io
+import os
+from typing import Iterable, Optional
+from pydub import AudioSegment
+from dotenv import load_dotenv
+from vad import SAMPLE_RATE
+
+load_dotenv()
+
+PCM_FORMAT = "pcm_s16le"
+
+# Live input formats and the container ffmpeg decodes them from. Compressed chunks must be
+# self-contained (each one a complete FLAC / Ogg / WebM stream), e.g. one encoder run per chunk.
+LIVE_INPUT_CONTAINERS = {
+    "flac": "flac",
+    "ogg_opus": "ogg",
+    "webm_opus": "webm",
+}
+
+# Formats the server accepts from live clients, comma-separated (raw PCM is always accepted)
+LIVE_AUDIO_FORMATS = [
+    name.strip() for name in os.getenv("LIVE_AUDIO_FORMATS", "pcm_s16le,flac,ogg_opus,webm_opus").split(",")
+    if name.strip() == PCM_FORMAT or name.strip() in LIVE_INPUT_CONTAINERS
+]
+if PCM_FORMAT not in LIVE_AUDIO_FORMATS:
+    LIVE_AUDIO_FORMATS.append(PCM_FORMAT)
+
+def negotiate_format(requested: Optional[Iterable[str]]) -> str:
+    """
+    Picks the live audio format for a client.
+
+    Args:
+        requested: Formats the client can send, most preferred first (a single name is also accepted)
+
+    Returns:
+        The first requested format the server accepts, or raw PCM
+    """
+    if isinstance(requested, str):
+        requested = [requested]
+    for name in requested or []:
+        if name in LIVE_AUDIO_FORMATS:
+            return name
+    return PCM_FORMAT
+
+def decode_to_pcm(data: bytes, format: str) -> bytes:
+    """
+    Decodes a compressed live chunk to 16 kHz mono 16-bit PCM.
+
+    Raises:
+        ValueError: If the format isn't accepted or the chunk can't be decoded
+    """
+    if format == PCM_FORMAT:
+        return data
+    if format not in LIVE_INPUT_CONTAINERS or format not in LIVE_AUDIO_FORMATS:
+        raise ValueError(f"Unsupported live audio format: {format}")
+
+    try:
+        audio = AudioSegment.from_file(io.BytesIO(data), format=LIVE_INPUT_CONTAINERS[format])
+    except Exception as e:
+        raise ValueError(f"Could not decode {format} audio chunk: {e}")
+    return audio.set_frame_rate(SAMPLE_RATE).set_channels(1).set_sample_width(2).raw_data
@@ -0,0 +1,85 @@
+import base64
+import struct
+from typing import Optional
+
+# Binary audio frames start with this header:
+#   magic b"AUDF" | version (1 byte) | format code (1 byte) | reserved (2 bytes) | sequence number (uint32)
+# All fields are big-endian; the 12-byte header keeps the payload 16-bit aligned.
+FRAME_MAGIC = b"AUDF"
+FRAME_VERSION = 1
+FRAME_HEADER = struct.Struct(">4sBBHI")
+
+# Format codes carried in the header
+FRAME_FORMATS = {
+    0: "pcm_s16le",  # 16 kHz mono 16-bit little-endian PCM
+    1: "flac",       # a complete FLAC stream
+    2: "ogg_opus",   # a complete Ogg Opus stream
+    3: "webm_opus",  # a complete WebM Opus stream
+}
+FORMAT_CODES = {name: code for code, name in FRAME_FORMATS.items()}
+
+class AudioFrame:
+    """One decoded audio chunk from a live client"""
+
+    __slots__ = ('payload', 'format', 'seq', 'encoding')
+
+    def __init__(self, payload: bytes, format: Optional[str] = None, seq: Optional[int] = None,
+                 encoding: str = "binary"):
+        self.payload = payload
+        self.format = format
+        self.seq = seq
+        self.encoding = encoding
+
+def encode_frame(payload: bytes, seq: int, format: str = "pcm_s16le") -> bytes:
+    """Builds a binary frame (the format clients send; used by tests and benchmarks)"""
+    return FRAME_HEADER.pack(FRAME_MAGIC, FRAME_VERSION, FORMAT_CODES[format], 0, seq & 0xFFFFFFFF) + payload
+
+def decode_frame(frame: bytes) -> AudioFrame:
+    """
+    Parses a binary frame with a header.
+
+    Raises:
+        ValueError: If the header is malformed or names an unknown version or format
+    """
+    if len(frame) < FRAME_HEADER.size:
+        raise ValueError(f"Audio frame too short: {len(frame)} bytes")
+    magic, version, format_code, _, seq = FRAME_HEADER.unpack_from(frame)
+    if magic != FRAME_MAGIC:
+        raise ValueError("Audio frame is missing the header")
+    if version != FRAME_VERSION:
+        raise ValueError(f"Unsupported audio frame version: {version}")
+    if format_code not in FRAME_FORMATS:
+        raise ValueError(f"Unsupported audio format code: {format_code}")
+    return AudioFrame(bytes(memoryview(frame)[FRAME_HEADER.size:]), FRAME_FORMATS[format_code], seq)
+
+def decode_audio_message(data: dict) -> AudioFrame:
+    """
+    Extracts the audio from an 'audio_chunk' Socket.IO message.
+
+    Accepts a binary frame with a header (current clients), raw bytes without one, or a
+    base64 string (older clients). Optional 'seq' and 'format' fields in the message are
+    used when the audio itself carries no header; format is None when neither says, meaning
+    the format negotiated at join_session.
+
+    Raises:
+        ValueError: If the audio can't be decoded
+    """
+    audio_data = data.get('audio_data')
+    seq = data.get('seq')
+    format = data.get('format')
+
+    if isinstance(audio_data, str):
+        try:
+            payload = base64.b64decode(audio_data)
+        except Exception as e:
+            raise ValueError(f"Invalid base64 audio data: {e}")
+        return AudioFrame(payload, format, seq, encoding="base64")
+
+    if isinstance(audio_data, (bytes, bytearray, memoryview)):
+        if bytes(audio_data[:len(FRAME_MAGIC)]) == FRAME_MAGIC:
+            frame = decode_frame(audio_data)
+            frame.encoding = "frame"
+            return frame
+        return AudioFrame(bytes(audio_data), format, seq)
+
+    raise ValueError(f"Unsupported audio data type: {type(audio_data).__name__}")
@@ -0,0 +1,74 @@
+import os
+from typing import Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# What a live session does when the model falls behind: "block" the sending client until
+# there is room, "drop_oldest" audio, or "merge" waiting segments into fewer, longer model calls
+# (dropping the oldest only if even the merged calls can't be made within LIVE_MAX_BACKLOG_SECONDS)
+LIVE_BACKPRESSURE_POLICY = os.getenv("LIVE_BACKPRESSURE_POLICY", "merge").lower()
+
+# Received chunks a session holds before they are decoded and segmented
+LIVE_AUDIO_QUEUE_MAX_CHUNKS = int(os.getenv("LIVE_AUDIO_QUEUE_MAX_CHUNKS", "200"))
+
+# How far behind a session may fall: seconds of segmented audio waiting for a model call
+# ("block", "drop_oldest"), or estimated seconds of model calls for the waiting segments ("merge")
+LIVE_MAX_BACKLOG_SECONDS = float(os.getenv("LIVE_MAX_BACKLOG_SECONDS", "30"))
+
+# Longest segment the "merge" policy builds; well below LIVE_MAX_BACKLOG_SECONDS so merging
+# leaves several calls' worth of room instead of one block the size of the whole backlog
+LIVE_MERGE_MAX_SECONDS = float(os.getenv("LIVE_MERGE_MAX_SECONDS", "10"))
+
+# Assumed duration of one live model call until a session has timed its own calls; the
+# "merge" policy estimates how long its waiting segments take to transcribe with it
+LIVE_MODEL_CALL_SECONDS = float(os.getenv("LIVE_MODEL_CALL_SECONDS", "2"))
+
+# With "block", how long a client's audio_chunk waits for room before the chunk is dropped
+LIVE_BLOCK_TIMEOUT_SECONDS = float(os.getenv("LIVE_BLOCK_TIMEOUT_SECONDS", "2"))
+
+# Clients are told to slow down once a session's queues are this full, and to resume
+# once they have drained below LIVE_BACKPRESSURE_LOW_WATERMARK
+LIVE_BACKPRESSURE_HIGH_WATERMARK = float(os.getenv("LIVE_BACKPRESSURE_HIGH_WATERMARK", "0.75"))
+LIVE_BACKPRESSURE_LOW_WATERMARK = float(os.getenv("LIVE_BACKPRESSURE_LOW_WATERMARK", "0.5"))
+
+BACKPRESSURE_POLICIES = ("block", "drop_oldest", "merge")
+if LIVE_BACKPRESSURE_POLICY not in BACKPRESSURE_POLICIES:
+    print(f"Unknown LIVE_BACKPRESSURE_POLICY {LIVE_BACKPRESSURE_POLICY!r}, using merge")
+    LIVE_BACKPRESSURE_POLICY = "merge"
+
+# States sent to clients in backpressure events
+BACKPRESSURE_OK = "ok"
+BACKPRESSURE_SLOW_DOWN = "slow_down"
+BACKPRESSURE_PAUSE = "pause"
+
+class BackpressureGauge:
+    """
+    Turns how full a session's queues are (0 = empty, 1 = at the limit) into the state
+    clients are told, with hysteresis so a queue hovering at a watermark doesn't flap.
+    """
+
+    def __init__(self, high: float = LIVE_BACKPRESSURE_HIGH_WATERMARK, low: float = LIVE_BACKPRESSURE_LOW_WATERMARK):
+        self.high = high
+        self.low = low
+        self.state = BACKPRESSURE_OK
+        self.changes = 0
+
+    def update(self, fill: float) -> Optional[str]:
+        """Record the current fill level; returns the new state if it changed"""
+        if fill >= 1:
+            state = BACKPRESSURE_PAUSE
+        elif fill >= self.high:
+            state = BACKPRESSURE_SLOW_DOWN
+        elif fill <= self.low:
+            state = BACKPRESSURE_OK
+        elif self.state == BACKPRESSURE_PAUSE:
+            state = BACKPRESSURE_SLOW_DOWN  # draining, but not far enough to resume fully
+        else:
+            state = self.state
+
+        if state == self.state:
+            return None
+        self.state = state
+        self.changes += 1
+        return state
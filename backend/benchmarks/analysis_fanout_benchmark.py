@@ -0,0 +1,78 @@
+"""
+End-to-end latency of meeting analysis: sequential calls vs. concurrent fan-out.
+
+Replaces the Vertex AI chat model with a fake one whose response time depends on the
+prompt (takeaways / summary / notes), so no Google Cloud credentials are needed.
+
+Usage:
+    python benchmarks/analysis_fanout_benchmark.py --takeaways 0.6 --summary 0.8 --notes 1.2
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GOOGLE_CLOUD_PROJECT", "benchmark-project")
+
+import langchain_google_vertexai
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+
+class SlowFakeChatModel(FakeListChatModel):
+    """Fake chat model that sleeps for the delay whose marker appears in the prompt"""
+
+    delays: dict = {}
+
+    def _call(self, messages, stop=None, run_manager=None, **kwargs):
+        prompt = messages[-1].content
+        for marker, delay in self.delays.items():
+            if marker in prompt:
+                time.sleep(delay)
+                break
+        return super()._call(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--takeaways", type=float, default=0.6, help="stub latency of the takeaways call (s)")
+    parser.add_argument("--summary", type=float, default=0.8, help="stub latency of the summary call (s)")
+    parser.add_argument("--notes", type=float, default=1.2, help="stub latency of the notes call (s)")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    delays = {
+        "Key Takeaways:": args.takeaways,
+        "Summary:": args.summary,
+        "Detailed Meeting Notes:": args.notes,
+    }
+    fake_llm = SlowFakeChatModel(responses=["stub analysis"], delays=delays)
+
+    # llm_utils builds its model at import time, so swap the class in first
+    langchain_google_vertexai.ChatVertexAI = lambda **kwargs: fake_llm
+    import llm_utils
+
+    transcript = "[00:00:00] Speaker A: Let's review the Q3 roadmap.\n" * 50
+
+    sequential = []
+    concurrent = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        llm_utils.generate_meeting_takeaways(transcript)
+        llm_utils.generate_meeting_summary(transcript)
+        llm_utils.generate_meeting_notes(transcript)
+        sequential.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        analysis = llm_utils.generate_meeting_analysis(transcript)
+        concurrent.append(time.perf_counter() - start)
+        assert not analysis['errors'], analysis['errors']
+
+    slowest = max(delays.values())
+    print(f"\nMeeting analysis latency over {args.runs} run(s)")
+    print(f"  sequential: {min(sequential):.2f} s (sum of calls: {sum(delays.values()):.2f} s)")
+    print(f"  concurrent: {min(concurrent):.2f} s (slowest call: {slowest:.2f} s)")
+
+
+if __name__ == '__main__':
+    main()
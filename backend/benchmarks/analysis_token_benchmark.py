@@ -0,0 +1,76 @@
+"""
+Input-token comparison between the three individual analysis prompts and the combined one.
+
+By default tokens are estimated at ~4 characters per token, which needs no credentials.
+Pass --model-tokens to count with the configured Vertex AI model instead.
+
+Usage:
+    python benchmarks/analysis_token_benchmark.py --transcript path/to/transcript.txt
+    python benchmarks/analysis_token_benchmark.py --minutes 60 --model-tokens
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GOOGLE_CLOUD_PROJECT", "benchmark-project")
+
+
+def synthetic_transcript(minutes: int) -> str:
+    """Roughly 150 spoken words per minute, one line every 10 seconds"""
+    lines = []
+    for second in range(0, minutes * 60, 10):
+        speaker = "AB"[(second // 10) % 2]
+        lines.append(
+            f"[{second // 3600:02d}:{second // 60 % 60:02d}:{second % 60:02d}] Speaker {speaker}: "
+            + "we should review the roadmap and agree on owners for the next milestone " * 2
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transcript", help="path to a transcript text file")
+    parser.add_argument("--minutes", type=int, default=60, help="length of the synthetic transcript")
+    parser.add_argument("--model-tokens", action="store_true", help="count tokens with the Vertex AI model")
+    args = parser.parse_args()
+
+    if not args.model_tokens:
+        # Avoid creating the Vertex AI client when only estimating
+        import langchain_google_vertexai
+        langchain_google_vertexai.ChatVertexAI = lambda **kwargs: None
+    import llm_utils
+
+    if args.model_tokens:
+        count_tokens = llm_utils.llm.get_num_tokens
+    else:
+        count_tokens = lambda text: len(text) // 4
+
+    if args.transcript:
+        with open(args.transcript) as f:
+            transcript = f.read()
+    else:
+        transcript = synthetic_transcript(args.minutes)
+
+    individual = {
+        "takeaways": llm_utils.TAKEAWAYS_PROMPT,
+        "summary": llm_utils.SUMMARY_PROMPT,
+        "notes": llm_utils.NOTES_PROMPT,
+    }
+    print(f"\nInput tokens ({'model count' if args.model_tokens else 'estimate'}), "
+          f"transcript {count_tokens(transcript)} tokens")
+
+    total = 0
+    for name, prompt in individual.items():
+        tokens = count_tokens(prompt.format(transcript=transcript))
+        total += tokens
+        print(f"  {name:>9}: {tokens}")
+    print(f"  {'3 calls':>9}: {total}")
+
+    combined = count_tokens(llm_utils.COMBINED_ANALYSIS_PROMPT.format(transcript=transcript))
+    print(f"  {'combined':>9}: {combined}")
+    print(f"Combined mode sends {total - combined} fewer input tokens ({(1 - combined / total) * 100:.0f}% less)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Server-side decode throughput of live audio chunks: base64 strings vs. binary frames.
+
+Feeds 'audio_chunk' messages through audio_frames.decode_audio_message, the same path
+the Socket.IO handlers use, and reports chunks per second, audio throughput and the
+payload size on the wire for each encoding.
+
+Usage:
+    python benchmarks/audio_frame_decode_benchmark.py --chunks 2000 --chunk-seconds 0.5
+"""
+import argparse
+import base64
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_frames import decode_audio_message, encode_frame
+
+
+def build_messages(encoding: str, chunks: int, pcm: bytes) -> list:
+    if encoding == "base64":
+        encoded = base64.b64encode(pcm).decode("ascii")
+        return [{'session_id': "benchmark", 'audio_data': encoded} for _ in range(chunks)]
+    return [{'session_id': "benchmark", 'audio_data': encode_frame(pcm, seq)} for seq in range(chunks)]
+
+
+def run(encoding: str, chunks: int, pcm: bytes):
+    messages = build_messages(encoding, chunks, pcm)
+    wire_bytes = len(messages[0]['audio_data'])
+
+    start = time.perf_counter()
+    for message in messages:
+        decode_audio_message(message)
+    elapsed = time.perf_counter() - start
+
+    audio_mb = len(pcm) * chunks / (1024 * 1024)
+    print(f"{encoding:>8}: {chunks / elapsed:10.0f} chunks/s | {audio_mb / elapsed:8.1f} MB/s of PCM | "
+          f"{wire_bytes} bytes on the wire per chunk")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--chunk-seconds", type=float, default=0.5, help="audio per chunk (16 kHz mono 16-bit)")
+    args = parser.parse_args()
+
+    pcm = os.urandom(int(16000 * args.chunk_seconds) * 2)
+    print(f"\nDecoding {args.chunks} chunks of {args.chunk_seconds:.2f}s audio ({len(pcm)} bytes of PCM each)")
+    base64_time = run("base64", args.chunks, pcm)
+    binary_time = run("binary", args.chunks, pcm)
+    print(f"Binary frames decode {base64_time / binary_time:.1f}x faster and are "
+          f"{(1 - (len(pcm) + 12) / len(base64.b64encode(pcm))) * 100:.0f}% smaller on the wire")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+"""
+Meeting chat: full-transcript prompts vs. retrieved passages vs. a cached transcript.
+
+Builds the per-meeting BM25 index the way /api/transcribe does, then answers the same
+questions each way through llm_utils.get_chat_response. The model is a local stub whose
+response time grows with prompt size (--prefill-ms-per-1k-tokens), so no credentials are
+needed; the cached path uses context_cache.LocalContextCache, which charges prefill only
+for the uncached prompt. Tokens are estimated at ~4 characters per token.
+
+Reports input tokens and latency per question for each path, index build time, and how
+often the top passage came from the chapter the question is about.
+
+Usage:
+    python benchmarks/chat_context_benchmark.py --minutes 120
+    python benchmarks/chat_context_benchmark.py --transcript path/to/transcript.txt --top-k 4
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GOOGLE_CLOUD_PROJECT", "benchmark-project")
+
+# Chapter topics of the synthetic meeting, with a question about each
+TOPICS = [
+    ("Quarterly budget review", "budget spend forecast invoices vendor costs savings quarter finance",
+     "What did we decide about the vendor costs in the budget?"),
+    ("Hiring plan", "hiring candidates interviews recruiter headcount offers onboarding engineers",
+     "How many engineers are we hiring and when do offers go out?"),
+    ("Product roadmap", "roadmap milestone release features beta customers launch timeline",
+     "When is the beta launch on the roadmap?"),
+    ("Security incident follow-up", "incident security breach credentials rotation audit logs firewall",
+     "Which credentials were rotated after the security incident?"),
+    ("Marketing campaign", "campaign marketing ads conversion landing page newsletter audience",
+     "What conversion rate did the marketing campaign reach?"),
+    ("Infrastructure migration", "migration cluster database kubernetes downtime storage latency",
+     "How much downtime does the database migration need?"),
+]
+FILLER = "we talked it through and agreed to follow up on the details next week"
+
+
+def synthetic_meeting(minutes: int):
+    """
+    Chapters on distinct topics, roughly 150 spoken words per minute, one line every 10 seconds.
+
+    Returns the transcript and its chapters as parse_chapter_transcript would return them.
+    """
+    chapter_seconds = minutes * 60 // len(TOPICS)
+    lines, chapters = [], []
+    for number, (title, vocabulary, _) in enumerate(TOPICS):
+        start = number * chapter_seconds
+        end = start + chapter_seconds
+        time_range = f"{format_time(start)} - {format_time(end)}"
+        lines.append(f"CHAPTER: {title} ({time_range})")
+        words = vocabulary.split()
+        content = []
+        for second in range(start, end, 10):
+            topic_words = " ".join(words[(second // 10 + i) % len(words)] for i in range(3))
+            content.append(f"[{format_time(second)}] Speaker {'AB'[(second // 10) % 2]}: "
+                           f"about the {topic_words}, {FILLER} {FILLER}")
+        lines.extend(content + [""])
+        chapters.append({'title': title, 'time_range': time_range, 'content': "\n".join(content)})
+    return "\n".join(lines), chapters
+
+
+def format_time(seconds: int) -> str:
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+class StubChain:
+    """Stands in for LLMChain: records the prompt size and answers after a prefill-proportional delay"""
+
+    prefill_seconds_per_token = 0.0
+    prompt_tokens = []
+
+    def __init__(self, llm=None, prompt=None):
+        self.prompt = prompt
+
+    def invoke(self, inputs):
+        tokens = len(self.prompt.format(**inputs)) // 4
+        StubChain.prompt_tokens.append(tokens)
+        time.sleep(tokens * self.prefill_seconds_per_token)
+        return {'text': "Stub answer."}
+
+
+def stub_cached_answer(content, prompt):
+    """LocalContextCache responder: only the prompt sent with each question is prefilled"""
+    tokens = len(prompt) // 4
+    StubChain.prompt_tokens.append(tokens)
+    time.sleep(tokens * StubChain.prefill_seconds_per_token)
+    return "Stub answer."
+
+
+def run_path(meetings, session_id, questions, path: str, top_k: int):
+    """Ask every question on a fresh memory along one path; returns (tokens, latencies)"""
+    import llm_utils
+    from chat_memory import ChatMemory
+
+    memory = ChatMemory()
+    transcript = meetings.get_transcript(session_id)
+    StubChain.prompt_tokens = []
+    latencies = []
+    for question in questions:
+        started = time.perf_counter()
+        passages = meetings.get_chat_passages(session_id, question, top_k) if path == "retrieval" else None
+        cached_context = meetings.get_cached_context(session_id) if path == "cached" else None
+        llm_utils.get_chat_response(transcript, question, memory, passages=passages, cached_context=cached_context)
+        latencies.append(time.perf_counter() - started)
+    return list(StubChain.prompt_tokens), latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transcript", help="path to a transcript text file (indexed as one chapter)")
+    parser.add_argument("--minutes", type=int, default=120, help="length of the synthetic transcript")
+    parser.add_argument("--top-k", type=int, default=None, help="passages per question (default CHAT_RETRIEVAL_TOP_K)")
+    parser.add_argument("--prefill-ms-per-1k-tokens", type=float, default=40.0,
+                        help="stub model time per 1000 input tokens")
+    args = parser.parse_args()
+
+    # Avoid creating the Vertex AI client; the chain is stubbed below
+    import langchain_google_vertexai
+    langchain_google_vertexai.ChatVertexAI = lambda **kwargs: None
+    import llm_utils
+    from chat_retrieval import CHAT_RETRIEVAL_TOP_K, estimate_tokens
+    from context_cache import LocalContextCache
+    from meeting_sessions import MeetingSessions
+    from session_store import InMemorySessionStore
+
+    llm_utils.LLMChain = StubChain
+    StubChain.prefill_seconds_per_token = args.prefill_ms_per_1k_tokens / 1000 / 1000
+    top_k = args.top_k or CHAT_RETRIEVAL_TOP_K
+
+    questions = [question for _, _, question in TOPICS]
+    if args.transcript:
+        # Indexed as one chapter, like a transcript without CHAPTER: headings
+        with open(args.transcript) as f:
+            transcript = f.read()
+        chapters = [{'title': "Full Meeting Transcript", 'time_range': "Complete Duration", 'content': transcript}]
+        expected = None
+    else:
+        transcript, chapters = synthetic_meeting(args.minutes)
+        expected = [title for title, _, _ in TOPICS]
+
+    context_cache = LocalContextCache(responder=stub_cached_answer)
+    meetings = MeetingSessions(store=InMemorySessionStore(), context_cache=context_cache)
+    started = time.perf_counter()
+    session_id = meetings.create(transcript, chapters)
+    build_ms = (time.perf_counter() - started) * 1000
+    index = meetings._get_index(session_id)
+    if index is None:
+        print("Transcript is below CHAT_FULL_CONTEXT_MAX_TOKENS; chat would send it whole")
+        return
+
+    hits = 0
+    if expected:
+        for question, title in zip(questions, expected):
+            results = index.search(question, 1)
+            hits += bool(results) and results[0][1].chapter == title
+
+    results = {path: run_path(meetings, session_id, questions, path, top_k)
+               for path in ("full", "retrieval", "cached")}
+
+    print(f"\nTranscript: ~{estimate_tokens(transcript)} tokens, {len(chapters)} chapters, "
+          f"{len(index.passages)} passages (index built in {build_ms:.1f} ms)")
+    print(f"{len(questions)} questions, top-{top_k} passages, "
+          f"stub prefill {args.prefill_ms_per_1k_tokens:.0f} ms per 1k tokens\n")
+    print(f"{'path':>10} | {'mean tokens':>11} | {'mean latency':>12} | {'p50 latency':>11}")
+    for name, (tokens, latencies) in results.items():
+        print(f"{name:>10} | {statistics.mean(tokens):>11.0f} | {statistics.mean(latencies) * 1000:>9.1f} ms | "
+              f"{statistics.median(latencies) * 1000:>8.1f} ms")
+    full_mean = statistics.mean(results["full"][0])
+    print()
+    for name in ("retrieval", "cached"):
+        saved = 1 - statistics.mean(results[name][0]) / full_mean
+        print(f"{name.capitalize()} sends {saved * 100:.1f}% fewer input tokens per question")
+    print(f"The cached path stored the transcript once ({len(context_cache)} live cache)")
+    if expected:
+        print(f"Top passage from the right chapter for {hits}/{len(questions)} questions")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Chat history sent per question: every message verbatim vs. ChatMemory's bounded history.
+
+Simulates a long chat about one meeting. Before each question it measures the history
+that goes into the prompt. The unbounded line is what the prompt used to carry (every
+earlier message). The bounded line is ChatMemory.format_history(): the recent turns
+verbatim plus a running summary. Summaries come from a local stub that takes
+--summary-ms and returns --summary-words words, so no credentials are needed. They are
+written in the background, like on the server. Tokens are estimated at ~4 characters
+per token.
+
+Usage:
+    python benchmarks/chat_memory_benchmark.py --turns 50
+    python benchmarks/chat_memory_benchmark.py --turns 100 --answer-words 300 --summary-ms 800
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def stub_summarizer(delay: float, words: int):
+    """Stands in for llm_utils.summarize_chat_history: waits, then returns a summary of the requested size"""
+    calls = []
+
+    def summarize(summary, messages, max_words):
+        calls.append(len(messages))
+        time.sleep(delay)
+        return " ".join(["decision"] * min(words, max_words))
+
+    return summarize, calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=50, help="questions asked in the chat")
+    parser.add_argument("--answer-words", type=int, default=150, help="length of each answer")
+    parser.add_argument("--summary-ms", type=float, default=300.0, help="stub summarizer response time")
+    parser.add_argument("--summary-words", type=int, default=200, help="length of the stub summaries")
+    parser.add_argument("--turn-ms", type=float, default=100.0, help="time between questions")
+    args = parser.parse_args()
+
+    from chat_memory import CHAT_MEMORY_MAX_TOKENS, CHAT_MEMORY_RECENT_TURNS, ChatMemory
+    from chat_retrieval import estimate_tokens
+
+    summarize, calls = stub_summarizer(args.summary_ms / 1000, args.summary_words)
+    memory = ChatMemory(summarizer=summarize)
+    answer = " ".join(["answer"] * args.answer_words)
+
+    unbounded, bounded, format_ms = [], [], []
+    everything = []
+    for turn in range(args.turns):
+        question = f"Question {turn}: what did the team decide about item {turn}?"
+        unbounded.append(estimate_tokens("\n".join(everything)))
+        started = time.perf_counter()
+        bounded.append(estimate_tokens(memory.format_history()))
+        format_ms.append((time.perf_counter() - started) * 1000)
+
+        memory.add_exchange(question, answer)
+        everything += [f"human: {question}", f"ai: {answer}"]
+        time.sleep(args.turn_ms / 1000)
+
+    print(f"\n{args.turns} turns, {args.answer_words}-word answers; last {CHAT_MEMORY_RECENT_TURNS} turns verbatim, "
+          f"{CHAT_MEMORY_MAX_TOKENS}-token budget\n")
+    print(f"{'history':>9} | {'turn 10':>7} | {'last turn':>9} | {'max':>6} | {'mean':>6}")
+    for name, tokens in (("unbounded", unbounded), ("bounded", bounded)):
+        print(f"{name:>9} | {tokens[min(9, len(tokens) - 1)]:>7} | {tokens[-1]:>9} | "
+              f"{max(tokens):>6} | {statistics.mean(tokens):>6.0f}")
+    print(f"\n{len(calls)} background summaries started ({sum(calls)} messages); "
+          f"{memory.summarized} messages were summarized when the last question was asked")
+    print(f"format_history: {statistics.mean(format_ms):.2f} ms mean")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Wall-clock time of chunked file transcription as the number of segments grows.
+
+Uses a stub transcriber whose latency is a fixed overhead plus a cost proportional to
+the audio length it receives, so no Google Cloud credentials are needed.
+
+Usage:
+    python benchmarks/chunked_transcription_benchmark.py --minutes 40 --segments 1 2 4 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import wave
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GOOGLE_CLOUD_PROJECT", "benchmark-project")
+
+import chunked_transcription
+
+
+def write_test_audio(path: str, minutes: int):
+    """Writes 16 kHz mono audio alternating 9 s of tone and 1 s of silence"""
+    tone = bytes([0x00, 0x20, 0x00, 0xe0]) * (16000 * 9 // 2)
+    silence = b"\x00\x00" * 16000
+    with wave.open(path, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(16000)
+        for _ in range(minutes * 6):
+            wav_file.writeframes(tone + silence)
+
+
+def make_stub_transcriber(overhead: float, seconds_per_audio_minute: float):
+    def stub_transcriber(path, mime_type, progress_callback=None):
+        with wave.open(path, "rb") as wav_file:
+            duration = wav_file.getnframes() / wav_file.getframerate()
+        time.sleep(overhead + duration / 60 * seconds_per_audio_minute)
+        lines = [f"[{int(t) // 60:02d}:{int(t) % 60:02d}] Speaker A: benchmark sentence number {int(t)}"
+                 for t in range(0, int(duration), 30)]
+        return f"CHAPTER: Benchmark (00:00 - {int(duration) // 60:02d}:{int(duration) % 60:02d})\n" + "\n".join(lines)
+    return stub_transcriber
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=int, default=40, help="length of the generated test audio")
+    parser.add_argument("--segments", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--overhead", type=float, default=0.5, help="fixed stub latency per request (s)")
+    parser.add_argument("--seconds-per-minute", type=float, default=0.1,
+                        help="stub latency per minute of audio (s)")
+    args = parser.parse_args()
+
+    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp_file:
+        audio_path = tmp_file.name
+    try:
+        write_test_audio(audio_path, args.minutes)
+        transcriber = make_stub_transcriber(args.overhead, args.seconds_per_minute)
+
+        print(f"\nChunked transcription of {args.minutes} min of audio")
+        baseline = None
+        for count in args.segments:
+            start = time.perf_counter()
+            transcript = chunked_transcription.transcribe_audio_chunked(
+                audio_path, "audio/wav",
+                transcriber=transcriber,
+                segment_seconds=args.minutes * 60 / count,
+                max_workers=count,
+                export_format="wav"
+            )
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            chapters = transcript.count("CHAPTER:")
+            print(f"  {count:>2} segment(s): {elapsed:6.2f} s  ({baseline / elapsed:4.1f}x, {chapters} chapter(s))")
+    finally:
+        os.remove(audio_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+Audio lost by the live backpressure policies when a client sends faster than the model keeps up.
+
+Streams synthetic speech into a LiveTranscriptionSession faster than real time, against a
+stub model with a fixed per-call latency (no Google Cloud credentials needed), and reports
+how much audio each policy dropped and how far results trailed.
+
+When fewer, longer calls are enough to keep up (merge_max_seconds * max_in_flight /
+model_latency >= speed), "merge" must not drop any audio; the script exits with an error
+if it does.
+
+Usage:
+    python benchmarks/live_backpressure_benchmark.py --speed 10 --model-latency 1.5 --audio-seconds 120
+"""
+import argparse
+import contextlib
+import math
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GOOGLE_CLOUD_PROJECT", "benchmark-project")
+
+import live_transcription
+from live_scheduler import FairSessionScheduler
+
+SAMPLE_RATE = 16000
+
+
+class StubModels:
+    """Stands in for genai.Client().models, answering after a fixed delay whatever the audio length"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+
+    def generate_content(self, model, contents, config=None):
+        self.calls += 1
+        time.sleep(self.latency)
+        part = SimpleNamespace(text=f"Benchmark transcription {self.calls}.")
+        candidate = SimpleNamespace(content=SimpleNamespace(parts=[part]), finish_reason=None, avg_logprobs=None)
+        return SimpleNamespace(candidates=[candidate], prompt_feedback=None)
+
+
+def synthetic_speech(seconds: float) -> bytes:
+    """Two-second tone bursts separated by half-second pauses, so the segmenter cuts between them"""
+    samples = bytearray()
+    for i in range(int(seconds * SAMPLE_RATE)):
+        in_burst = (i % int(SAMPLE_RATE * 2.5)) < SAMPLE_RATE * 2
+        value = int(8000 * math.sin(2 * math.pi * 220 * i / SAMPLE_RATE)) if in_burst else 0
+        samples += value.to_bytes(2, "little", signed=True)
+    return bytes(samples)
+
+
+def run_policy(policy: str, pcm: bytes, args) -> dict:
+    models = StubModels(args.model_latency)
+    live_transcription.genai.Client = lambda **kwargs: SimpleNamespace(models=models)
+
+    session = live_transcription.LiveTranscriptionSession(f"benchmark-{policy}", FairSessionScheduler(4))
+    session.backpressure_policy = policy
+    session.recording_enabled = False
+    session.vad_enabled = False  # the synthetic tone isn't speech
+
+    chunk_bytes = SAMPLE_RATE * 2 * args.chunk_ms // 1000
+    interval = args.chunk_ms / 1000 / args.speed
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        session.start_processing()
+        started = time.perf_counter()
+        for offset in range(0, len(pcm), chunk_bytes):
+            session.add_audio_chunk(pcm[offset:offset + chunk_bytes])
+            time.sleep(max(0.0, started + (offset // chunk_bytes + 1) * interval - time.perf_counter()))
+        session.stop_processing()
+        drained = session._drained.wait(timeout=args.timeout)
+        seconds = time.perf_counter() - started
+    if not drained:
+        raise RuntimeError(f"{policy}: session did not finish within {args.timeout:.0f}s")
+
+    stats = session.get_stats()
+    return {
+        'policy': policy,
+        'calls': models.calls,
+        'seconds': seconds,
+        'segments_merged': stats['segments_merged'] + stats['chunks_merged'],
+        'audio_seconds_dropped': stats['audio_seconds_dropped'],
+        'max_commit_delay_seconds': stats['max_commit_delay_seconds'],
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--audio-seconds", type=float, default=120.0)
+    parser.add_argument("--speed", type=float, default=10.0, help="how many times faster than real time the client sends")
+    parser.add_argument("--chunk-ms", type=int, default=250, help="client chunk length")
+    parser.add_argument("--model-latency", type=float, default=1.5, help="stub model response time per call (s)")
+    parser.add_argument("--timeout", type=float, default=120.0, help="how long to wait for the last results (s)")
+    args = parser.parse_args()
+
+    pcm = synthetic_speech(args.audio_seconds)
+    results = [run_policy(policy, pcm, args) for policy in ("drop_oldest", "merge")]
+
+    print(f"{args.audio_seconds:.0f}s of audio sent at {args.speed:.0f}x real time, "
+          f"{args.model_latency:.1f}s per model call\n")
+    print(f"{'policy':>12} | {'calls':>5} | {'wall s':>6} | {'merged':>6} | {'dropped s':>9} | {'max delay s':>11}")
+    for result in results:
+        print(f"{result['policy']:>12} | {result['calls']:>5} | {result['seconds']:>6.1f} | "
+              f"{result['segments_merged']:>6} | {result['audio_seconds_dropped']:>9.1f} | "
+              f"{result['max_commit_delay_seconds']:>11.1f}")
+
+    merge = results[-1]
+    capacity = live_transcription.LIVE_MERGE_MAX_SECONDS * live_transcription.LIVE_MAX_IN_FLIGHT / args.model_latency
+    if capacity >= args.speed and merge['audio_seconds_dropped']:
+        sys.exit(f"merge dropped {merge['audio_seconds_dropped']:.1f}s of audio although merged calls "
+                 f"keep up with {capacity:.0f}x real time")
@@ -0,0 +1,296 @@
+"""
+Live session capacity vs. number of worker processes, through the scaled-out deployment.
+
+Starts 1..N real unified_app workers, each on its own PORT with the same LIVE_WORKER_URLS,
+a shared SQLite session store and (with --message-queue) a shared Socket.IO message queue.
+Only the model call is stubbed (it sleeps), so no Google Cloud credentials are needed.
+
+Each simulated client goes through the same routing a browser does:
+- creates its session on one worker (round-robin, like a load balancer)
+- starts it through a *different* worker, following the 307 redirect to the owner
+- connects its socket to that other worker and reconnects to the owner on wrong_worker
+- streams binary audio_chunk frames as fast as it can
+A client is done once its transcript_update events cover the speech it sent.
+
+Capacity is reported as the real-time factor: seconds of audio transcribed per
+wall-clock second over all sessions, i.e. how many live sessions the workers keep up
+with. Audio dropped or merged under backpressure is reported next to it, since a
+faster number that drops audio isn't more capacity.
+
+Needs the Socket.IO client: pip install "python-socketio[client]"
+
+Usage:
+    python benchmarks/live_scaleout_benchmark.py --max-workers 4 --sessions-per-worker 8 --audio-seconds 30
+    python benchmarks/live_scaleout_benchmark.py --max-workers 2 --message-queue redis://localhost:6379/1
+"""
+import argparse
+import contextlib
+import json
+import math
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GOOGLE_CLOUD_PROJECT", "benchmark-project")
+
+SAMPLE_RATE = 16000
+BURST_SECONDS = 2.0
+PERIOD_SECONDS = 2.5
+
+
+class StubModels:
+    """Stands in for genai.Client().models, answering after a fixed delay"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def generate_content(self, model, contents, config=None):
+        time.sleep(self.latency)
+        part = SimpleNamespace(text="This is a benchmark transcription.")
+        candidate = SimpleNamespace(content=SimpleNamespace(parts=[part]), finish_reason=None, avg_logprobs=None)
+        return SimpleNamespace(candidates=[candidate], prompt_feedback=None)
+
+
+class StubClient:
+    def __init__(self, latency: float):
+        self.models = StubModels(latency)
+
+
+def synthetic_speech(seconds: float) -> bytes:
+    """Two-second tone bursts separated by half-second pauses, so VAD and the segmenter both cut"""
+    samples = bytearray()
+    for i in range(int(seconds * SAMPLE_RATE)):
+        in_burst = (i % int(SAMPLE_RATE * PERIOD_SECONDS)) < SAMPLE_RATE * BURST_SECONDS
+        value = int(8000 * math.sin(2 * math.pi * 220 * i / SAMPLE_RATE)) if in_burst else 0
+        samples += value.to_bytes(2, "little", signed=True)
+    return bytes(samples)
+
+
+def last_speech_end(seconds: float) -> float:
+    """Where the last tone burst of synthetic_speech(seconds) ends"""
+    start = math.floor(seconds / PERIOD_SECONDS) * PERIOD_SECONDS
+    if start >= seconds:
+        start -= PERIOD_SECONDS
+    return min(seconds, start + BURST_SECONDS)
+
+
+def run_server(index: int, urls: list, args, store_path: str):
+    """One worker process: unified_app with only the model call replaced"""
+    os.environ.update({
+        "PORT": str(args.base_port + index),
+        "LIVE_WORKER_URLS": ",".join(urls),
+        "LIVE_WORKER_INDEX": str(index),
+        "SESSION_STORE": "sqlite",
+        "SESSION_STORE_PATH": store_path,
+        "SOCKETIO_MESSAGE_QUEUE": args.message_queue or "",
+        "LIVE_RECORDING_ENABLED": "false",
+    })
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+        # No model, GCS sweep or Vertex AI chat client in a benchmark
+        import gcs_storage
+        gcs_storage.start_orphan_sweep = lambda *args, **kwargs: None
+        import langchain_google_vertexai
+        langchain_google_vertexai.ChatVertexAI = lambda **kwargs: None
+        import live_transcription
+        live_transcription.genai.Client = lambda **kwargs: StubClient(args.model_latency)
+
+        import unified_app
+        unified_app.socketio.run(unified_app.app, host="localhost", port=args.base_port + index,
+                                 debug=False, allow_unsafe_werkzeug=True, use_reloader=False, log_output=False)
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+_opener = urllib.request.build_opener(_NoRedirect)
+
+
+def http_json(method: str, url: str, redirects: int = 0):
+    """A JSON request that follows 307s to the session's owner; returns (body, redirects followed)"""
+    request = urllib.request.Request(url, data=b"{}" if method == "POST" else None, method=method,
+                                     headers={"Content-Type": "application/json"})
+    try:
+        with _opener.open(request, timeout=30) as response:
+            return json.loads(response.read()), redirects
+    except urllib.error.HTTPError as e:
+        if e.code == 307 and redirects < 3:
+            return http_json(method, e.headers["Location"], redirects + 1)
+        raise
+
+
+def wait_until_ready(urls: list, processes: list, timeout: float):
+    """Wait for every worker to answer /api/health; fail fast if one of them died"""
+    deadline = time.monotonic() + timeout
+    for index, url in enumerate(urls):
+        while True:
+            if processes[index].exitcode is not None:
+                raise RuntimeError(f"worker {index} exited with code {processes[index].exitcode}")
+            try:
+                http_json("GET", f"{url}/api/health")
+                break
+            except (urllib.error.URLError, ConnectionError):
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"worker {index} did not start within {timeout:.0f}s")
+                time.sleep(0.2)
+
+
+def run_client(index: int, urls: list, frames: list, speech_end: float, args, start_barrier, results: list):
+    """One streaming client, routed the way the frontend is"""
+    import socketio
+
+    outcome = {'redirects': 0, 'wrong_worker': 0, 'backpressure': 0, 'updates': 0, 'error': None}
+    # Straight to WebSocket: a polling request carries at most 16 packets, far fewer than a client
+    # streaming faster than real time queues up. The server only accepts the frontend's origin
+    sio = socketio.Client(reconnection=False, websocket_extra_options={'origin': args.origin})
+    joined = threading.Event()
+    caught_up = threading.Event()
+    state = {'url': urls[(index + 1) % len(urls)], 'covered': 0.0}
+
+    @sio.on('wrong_worker')
+    def on_wrong_worker(data):
+        outcome['wrong_worker'] += 1
+        state['url'] = data['worker_url']
+        joined.set()
+
+    @sio.on('joined_session')
+    def on_joined(data):
+        joined.set()
+
+    @sio.on('backpressure')
+    def on_backpressure(data):
+        outcome['backpressure'] += 1
+
+    @sio.on('transcript_update')
+    def on_transcript_update(data):
+        outcome['updates'] += len(data['updates'])
+        state['covered'] = max([state['covered']] + [update['end'] for update in data['updates']])
+        if state['covered'] >= speech_end - 0.5:
+            caught_up.set()
+
+    try:
+        # Created on this client's worker, started through the next one (307 to the owner)
+        created, _ = http_json("POST", f"{urls[index % len(urls)]}/api/sessions")
+        session_id = created['session_id']
+        _, outcome['redirects'] = http_json("POST", f"{state['url']}/api/sessions/{session_id}/start")
+
+        # Joined on the next worker too; wrong_worker sends the client to the owner
+        for _ in range(2):
+            joined.clear()
+            sio.connect(state['url'], transports=['websocket'], wait_timeout=10)
+            url = state['url']
+            sio.emit('join_session', {'session_id': session_id, 'audio_formats': ['pcm_s16le']})
+            if not joined.wait(timeout=10):
+                raise RuntimeError("join_session got no answer")
+            if state['url'] == url:
+                break
+            sio.disconnect()
+
+        start_barrier.wait()
+        started = time.perf_counter()
+        for frame in frames:
+            sio.emit('audio_chunk', {'session_id': session_id, 'audio_data': frame})
+        if not caught_up.wait(timeout=args.timeout):
+            raise RuntimeError(f"transcript reached {state['covered']:.1f}s of {speech_end:.1f}s")
+        outcome['seconds'] = time.perf_counter() - started
+
+        http_json("POST", f"{state['url']}/api/sessions/{session_id}/stop")
+        stats, _ = http_json("GET", f"{state['url']}/api/sessions/{session_id}/stats")
+        outcome['audio_seconds_dropped'] = stats['stats'].get('audio_seconds_dropped', 0)
+        outcome['segments_merged'] = stats['stats'].get('segments_merged', 0)
+    except Exception as e:
+        outcome['error'] = str(e)
+        with contextlib.suppress(threading.BrokenBarrierError):
+            start_barrier.abort()
+    finally:
+        if sio.connected:
+            sio.disconnect()
+        results.append(outcome)
+
+
+def run_cluster(worker_count: int, args) -> dict:
+    from audio_frames import encode_frame
+
+    urls = [f"http://localhost:{args.base_port + index}" for index in range(worker_count)]
+    ctx = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        store_path = os.path.join(tmp, "sessions.sqlite3")
+        processes = [ctx.Process(target=run_server, args=(index, urls, args, store_path), daemon=True)
+                     for index in range(worker_count)]
+        for process in processes:
+            process.start()
+        try:
+            wait_until_ready(urls, processes, timeout=60)
+
+            pcm = synthetic_speech(args.audio_seconds)
+            chunk_bytes = SAMPLE_RATE * 2 * args.chunk_ms // 1000
+            frames = [encode_frame(pcm[offset:offset + chunk_bytes], seq=seq)
+                      for seq, offset in enumerate(range(0, len(pcm), chunk_bytes))]
+
+            session_count = worker_count * args.sessions_per_worker
+            start_barrier = threading.Barrier(session_count)
+            results = []
+            clients = [threading.Thread(target=run_client, args=(index, urls, frames, last_speech_end(args.audio_seconds),
+                                                                 args, start_barrier, results))
+                       for index in range(session_count)]
+            for client in clients:
+                client.start()
+            for client in clients:
+                client.join()
+        finally:
+            for process in processes:
+                process.terminate()
+                process.join(timeout=10)
+
+    errors = [outcome['error'] for outcome in results if outcome['error']]
+    if errors:
+        raise RuntimeError(f"{len(errors)} of {len(results)} clients failed, e.g.: {errors[0]}")
+    wall_seconds = max(outcome['seconds'] for outcome in results)
+    return {
+        'workers': worker_count,
+        'sessions': len(results),
+        'wall_seconds': wall_seconds,
+        'realtime_factor': len(results) * args.audio_seconds / wall_seconds,
+        'redirects': sum(outcome['redirects'] for outcome in results),
+        'wrong_worker': sum(outcome['wrong_worker'] for outcome in results),
+        'backpressure': sum(outcome['backpressure'] for outcome in results),
+        'dropped_seconds': sum(outcome['audio_seconds_dropped'] for outcome in results),
+        'merged': sum(outcome['segments_merged'] for outcome in results),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-workers", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--sessions-per-worker", type=int, default=8)
+    parser.add_argument("--audio-seconds", type=float, default=30.0, help="audio streamed into each session")
+    parser.add_argument("--chunk-ms", type=int, default=250, help="client chunk length")
+    parser.add_argument("--model-latency", type=float, default=0.3, help="stub model response time (s)")
+    parser.add_argument("--base-port", type=int, default=5100, help="worker i listens on base-port + i")
+    parser.add_argument("--message-queue", default="", help="SOCKETIO_MESSAGE_QUEUE shared by the workers")
+    parser.add_argument("--origin", default="http://localhost:4200", help="Origin the clients connect from")
+    parser.add_argument("--timeout", type=float, default=300.0, help="how long a client waits for its transcript (s)")
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPU(s); {args.sessions_per_worker} sessions per worker, "
+          f"{args.audio_seconds:.0f}s of audio each\n")
+    print(f"{'workers':>7} | {'sessions':>8} | {'wall s':>7} | {'x realtime':>10} | {'scaling':>7} | "
+          f"{'307s':>4} | {'wrong_worker':>12} | {'backpressure':>12} | {'dropped s':>9} | {'merged':>6}")
+    baseline = None
+    for worker_count in range(1, args.max_workers + 1):
+        result = run_cluster(worker_count, args)
+        baseline = baseline or result['realtime_factor']
+        efficiency = result['realtime_factor'] / (baseline * worker_count)
+        print(f"{result['workers']:>7} | {result['sessions']:>8} | {result['wall_seconds']:>7.2f} | "
+              f"{result['realtime_factor']:>10.1f} | {efficiency:>6.0%} | {result['redirects']:>4} | "
+              f"{result['wrong_worker']:>12} | {result['backpressure']:>12} | {result['dropped_seconds']:>9.1f} | "
+              f"{result['merged']:>6}")
@@ -0,0 +1,94 @@
+"""
+Per-chunk time-to-text for live transcription: inline bytes vs. GCS round-trip.
+
+Runs LiveTranscriptionSession._transcribe_buffer against a local stub model, so no
+Google Cloud credentials are needed. GCS upload/delete are replaced with stubs that
+sleep for a configurable round-trip time.
+
+Usage:
+    python benchmarks/live_transport_benchmark.py --chunks 20 --gcs-rtt 0.08
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GOOGLE_CLOUD_PROJECT", "benchmark-project")
+
+import live_transcription
+from live_scheduler import FairSessionScheduler
+
+
+class StubModels:
+    """Stands in for genai.Client().models, answering after a fixed delay"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def generate_content(self, model, contents, config=None):
+        time.sleep(self.latency)
+        part = SimpleNamespace(text="This is a benchmark transcription.")
+        candidate = SimpleNamespace(content=SimpleNamespace(parts=[part]), finish_reason=None)
+        return SimpleNamespace(candidates=[candidate], prompt_feedback=None)
+
+
+class StubClient:
+    def __init__(self, latency: float):
+        self.models = StubModels(latency)
+
+
+def run_mode(transport: str, chunks: int, chunk_seconds: float, model_latency: float, gcs_rtt: float) -> list:
+    """Transcribe `chunks` buffers with the given transport and return per-chunk latencies"""
+
+    def stub_upload(audio_data, project_id, file_extension=".wav"):
+        # bucket reload + upload
+        time.sleep(gcs_rtt * 2)
+        return f"gs://{project_id}-transcriber-temp/live-audio-benchmark{file_extension}"
+
+    def stub_delete(gs_uri, project_id):
+        time.sleep(gcs_rtt)
+
+    live_transcription.genai.Client = lambda **kwargs: StubClient(model_latency)
+    live_transcription.upload_audio_to_gcs = stub_upload
+    live_transcription.delete_from_gcs = stub_delete
+
+    session = live_transcription.LiveTranscriptionSession(f"benchmark-{transport}", FairSessionScheduler(1))
+    session.audio_transport = transport
+    session.vad_enabled = False  # the synthetic buffer isn't speech
+
+    pcm = b"\x00\x01" * int(16000 * chunk_seconds)
+    latencies = []
+    for _ in range(chunks):
+        start = time.perf_counter()
+        session._transcribe_buffer(pcm)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def report(name: str, latencies: list):
+    ordered = sorted(latencies)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(f"{name:>8}: mean {statistics.mean(latencies) * 1000:7.1f} ms | "
+          f"p50 {statistics.median(latencies) * 1000:7.1f} ms | p95 {p95 * 1000:7.1f} ms")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=20)
+    parser.add_argument("--chunk-seconds", type=float, default=3.0)
+    parser.add_argument("--model-latency", type=float, default=0.25, help="stub model response time (s)")
+    parser.add_argument("--gcs-rtt", type=float, default=0.08, help="simulated GCS round-trip time (s)")
+    args = parser.parse_args()
+
+    results = {}
+    for transport in ("inline", "gcs"):
+        results[transport] = run_mode(transport, args.chunks, args.chunk_seconds, args.model_latency, args.gcs_rtt)
+
+    print(f"\nPer-chunk time-to-text ({args.chunks} chunks of {args.chunk_seconds:.1f}s audio)")
+    for transport, latencies in results.items():
+        report(transport, latencies)
+    saved = statistics.mean(results["gcs"]) - statistics.mean(results["inline"])
+    print(f"Inline transport saves {saved * 1000:.1f} ms per chunk on average")
@@ -0,0 +1,139 @@
+import concurrent.futures
+import os
+import threading
+import uuid
+from typing import Callable, List, Optional
+from dotenv import load_dotenv
+from session_store import InMemorySessionStore, SessionStore
+from chat_retrieval import estimate_tokens
+
+load_dotenv()
+
+# Question/answer turns sent to the model verbatim; older turns are folded into a running summary
+CHAT_MEMORY_RECENT_TURNS = int(os.getenv("CHAT_MEMORY_RECENT_TURNS", "4"))
+
+# Most chat history (estimated tokens, summary included) sent with a question
+CHAT_MEMORY_MAX_TOKENS = int(os.getenv("CHAT_MEMORY_MAX_TOKENS", "1500"))
+
+# Length the running summary is asked to stay within
+CHAT_MEMORY_SUMMARY_WORDS = int(os.getenv("CHAT_MEMORY_SUMMARY_WORDS", "200"))
+
+# Summaries are written in the background on a small shared pool
+CHAT_MEMORY_SUMMARY_WORKERS = int(os.getenv("CHAT_MEMORY_SUMMARY_WORKERS", "2"))
+
+_summary_executor = concurrent.futures.ThreadPoolExecutor(
+    max_workers=CHAT_MEMORY_SUMMARY_WORKERS,
+    thread_name_prefix="chat-summary"
+)
+
+# summarizer(previous summary, messages to fold in, target words) -> new summary
+Summarizer = Callable[[str, List[dict], int], str]
+
+class ChatMemory:
+    """
+    A chat's history as the model sees it: the last few turns verbatim, within a token
+    budget, and everything older folded into a running summary.
+
+    Messages ({'role', 'content'} dicts) are kept once, as the items of a session-store
+    entry; the summary and how many messages it covers are a field of the same entry's
+    document. Only the unsummarized tail is read back. Once the tail outgrows the recent
+    turns or the budget, its oldest turns are summarized on a background thread; until
+    that finishes, prompts just leave them out.
+    """
+
+    def __init__(self, store: Optional[SessionStore] = None, namespace: str = "chat", key: Optional[str] = None,
+                 summarizer: Optional[Summarizer] = None, recent_turns: int = CHAT_MEMORY_RECENT_TURNS,
+                 max_tokens: int = CHAT_MEMORY_MAX_TOKENS):
+        self.store = store or InMemorySessionStore()
+        self.namespace = namespace
+        self.key = key or str(uuid.uuid4())
+        self.summarizer = summarizer
+        self.recent_turns = recent_turns
+        self.max_tokens = max_tokens
+        self._lock = threading.Lock()
+        self._summarizing = False
+
+        state = (self.store.load(self.namespace, self.key) or {}).get('chat_memory') or {}
+        self.summary: str = state.get('summary', "")
+        self.summarized: int = state.get('summarized', 0)  # messages folded into the summary
+        self._messages: List[dict] = self.store.items(self.namespace, self.key, self.summarized)
+
+    def messages(self) -> List[dict]:
+        """Messages not yet folded into the summary, oldest first, including any added by other workers"""
+        with self._lock:
+            summarized = self.summarized
+        messages = self.store.items(self.namespace, self.key, summarized)
+        with self._lock:
+            if self.summarized == summarized:
+                self._messages = messages
+            return list(self._messages)
+
+    def last_question(self) -> Optional[str]:
+        with self._lock:
+            questions = [message['content'] for message in self._messages if message['role'] == 'user']
+        return questions[-1] if questions else None
+
+    def format_history(self) -> str:
+        """The history to put in a prompt: the summary, then the recent turns that fit the budget"""
+        messages = self.messages()
+        with self._lock:
+            summary = self.summary
+        verbatim = messages[len(messages) - self._verbatim_count(messages, summary):]
+
+        lines = [f"summary of earlier conversation: {summary}"] if summary else []
+        lines.extend(_format_message(message) for message in verbatim)
+        return "\n".join(lines)
+
+    def add_exchange(self, question: str, answer: str):
+        """Record a question and its answer, summarizing older turns if the history has outgrown its budget"""
+        exchange = [{'role': 'user', 'content': question}, {'role': 'assistant', 'content': answer}]
+        self.store.append(self.namespace, self.key, exchange)
+        with self._lock:
+            self._messages.extend(exchange)
+        self._maybe_summarize()
+
+    def _verbatim_count(self, messages: List[dict], summary: str) -> int:
+        """How many of the newest messages are sent verbatim: up to recent_turns turns, within the budget"""
+        budget = self.max_tokens - estimate_tokens(summary)
+        count = 0
+        for message in reversed(messages[-self.recent_turns * 2:] if self.recent_turns > 0 else []):
+            budget -= estimate_tokens(_format_message(message))
+            # The newest message always goes in, however long
+            if budget < 0 and count:
+                break
+            count += 1
+        return count
+
+    def _maybe_summarize(self):
+        with self._lock:
+            if self.summarizer is None or self._summarizing:
+                return
+            fold = len(self._messages) - self._verbatim_count(self._messages, self.summary)
+            fold -= fold % 2  # whole turns only
+            if fold <= 0:
+                return
+            self._summarizing = True
+            summary, folded, summarized = self.summary, self._messages[:fold], self.summarized
+        _summary_executor.submit(self._summarize, summary, folded, summarized)
+
+    def _summarize(self, summary: str, folded: List[dict], summarized: int):
+        try:
+            new_summary = self.summarizer(summary, folded, CHAT_MEMORY_SUMMARY_WORDS).strip()
+            with self._lock:
+                if self.summarized == summarized:
+                    self.summary = new_summary
+                    self.summarized = summarized + len(folded)
+                    self._messages = self._messages[len(folded):]
+                state = {'summary': self.summary, 'summarized': self.summarized}
+            self.store.save(self.namespace, self.key, {'chat_memory': state})
+        except Exception as e:
+            print(f"Error summarizing chat history for {self.key}: {e}")
+            return
+        finally:
+            with self._lock:
+                self._summarizing = False
+        # More turns may have arrived while this summary was being written
+        self._maybe_summarize()
+
+def _format_message(message: dict) -> str:
+    return f"{'human' if message['role'] == 'user' else 'ai'}: {message['content']}"
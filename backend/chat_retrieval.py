@@ -0,0 +1,135 @@
+import math
+import os
+import re
+from collections import Counter
+from typing import List, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# "retrieval" sends chat only the transcript passages relevant to each question;
+# "full" sends the whole transcript every time
+CHAT_CONTEXT_MODE = os.getenv("CHAT_CONTEXT_MODE", "retrieval").lower()
+
+# Passages included in a retrieval prompt
+CHAT_RETRIEVAL_TOP_K = int(os.getenv("CHAT_RETRIEVAL_TOP_K", "6"))
+
+# Target passage length in words (passages end on a transcript line)
+CHAT_PASSAGE_WORDS = int(os.getenv("CHAT_PASSAGE_WORDS", "150"))
+
+# Transcripts shorter than this (estimated tokens) are still sent whole; retrieval only pays off on long meetings
+CHAT_FULL_CONTEXT_MAX_TOKENS = int(os.getenv("CHAT_FULL_CONTEXT_MAX_TOKENS", "8000"))
+
+_TIMESTAMP = re.compile(r"\[?(\d{1,2}:\d{2}(?::\d{2})?)\]?")
+_WORD = re.compile(r"[a-z0-9']+")
+
+# Words too common to say anything about relevance
+_STOPWORDS = frozenset("""
+a an and are as at be but by did do does for from had has have he her his i if in into is it its
+me my of on or our she so that the their them then there these they this to was we were what when
+where which who why will with would you your
+""".split())
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token), enough to choose between context modes"""
+    return len(text) // 4
+
+def tokenize(text: str) -> List[str]:
+    return [word for word in _WORD.findall(text.lower()) if word not in _STOPWORDS]
+
+class Passage:
+    """A few consecutive transcript lines from one chapter, with where they start in the meeting"""
+
+    __slots__ = ('chapter', 'timestamp', 'text')
+
+    def __init__(self, chapter: str, timestamp: str, text: str):
+        self.chapter = chapter
+        self.timestamp = timestamp  # of the first line, or the chapter's time range
+        self.text = text
+
+    def format(self) -> str:
+        return f"[{self.timestamp}] ({self.chapter})\n{self.text}"
+
+    def to_dict(self) -> dict:
+        return {'chapter': self.chapter, 'timestamp': self.timestamp, 'text': self.text}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Passage':
+        return cls(data['chapter'], data['timestamp'], data['text'])
+
+def chunk_chapters(chapters: List[dict], passage_words: int = CHAT_PASSAGE_WORDS) -> List[Passage]:
+    """
+    Splits parsed chapters (see parse_chapter_transcript) into passages of about passage_words
+    words. Passages never cross a chapter boundary.
+    """
+    passages = []
+    for chapter in chapters:
+        lines, words = [], 0
+        for line in chapter['content'].split('\n'):
+            line = line.strip()
+            if not line:
+                continue
+            lines.append(line)
+            words += len(line.split())
+            if words >= passage_words:
+                passages.append(_make_passage(chapter, lines))
+                lines, words = [], 0
+        if lines:
+            passages.append(_make_passage(chapter, lines))
+    return passages
+
+def _make_passage(chapter: dict, lines: List[str]) -> Passage:
+    match = _TIMESTAMP.match(lines[0])
+    timestamp = match.group(1) if match else chapter['time_range']
+    return Passage(chapter['title'], timestamp, '\n'.join(lines))
+
+class BM25Index:
+    """Okapi BM25 over a meeting's passages, held in memory"""
+
+    def __init__(self, passages: List[Passage], k1: float = 1.5, b: float = 0.75):
+        self.passages = passages
+        self.k1 = k1
+        self.b = b
+        # Chapter titles are indexed with their passages, so "the budget discussion" finds that chapter
+        self._term_counts = [Counter(tokenize(f"{passage.chapter} {passage.text}")) for passage in passages]
+        self._lengths = [sum(counts.values()) for counts in self._term_counts]
+        self._avg_length = (sum(self._lengths) / len(self._lengths)) if passages else 0.0
+
+        document_frequency = Counter()
+        for counts in self._term_counts:
+            document_frequency.update(counts.keys())
+        count = len(passages)
+        self._idf = {
+            term: math.log(1 + (count - frequency + 0.5) / (frequency + 0.5))
+            for term, frequency in document_frequency.items()
+        }
+
+    def search(self, query: str, top_k: int = CHAT_RETRIEVAL_TOP_K) -> List[Tuple[float, Passage]]:
+        """The best-matching passages, highest score first (passages matching no query term are left out)"""
+        terms = [term for term in set(tokenize(query)) if term in self._idf]
+        if not terms:
+            return []
+
+        scored = []
+        for index, counts in enumerate(self._term_counts):
+            length_norm = self.k1 * (1 - self.b + self.b * self._lengths[index] / self._avg_length)
+            score = 0.0
+            for term in terms:
+                frequency = counts.get(term)
+                if frequency:
+                    score += self._idf[term] * frequency * (self.k1 + 1) / (frequency + length_norm)
+            if score > 0:
+                scored.append((score, index))
+
+        scored.sort(reverse=True)
+        return [(score, self.passages[index]) for score, index in scored[:top_k]]
+
+def build_context(index: BM25Index, question: str, top_k: int = CHAT_RETRIEVAL_TOP_K) -> str:
+    """
+    The passages to answer a question from, in meeting order so the model reads them as a timeline.
+    Empty when nothing in the transcript matches.
+    """
+    results = index.search(question, top_k)
+    order = {id(passage): position for position, passage in enumerate(index.passages)}
+    ordered = sorted((passage for _, passage in results), key=lambda passage: order[id(passage)])
+    return "\n\n".join(passage.format() for passage in ordered)
@@ -0,0 +1,340 @@
+import os
+import re
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from difflib import SequenceMatcher
+from typing import Callable, Dict, List, Optional, Tuple
+from pydub import AudioSegment
+from pydub.silence import detect_silence
+from pydub.utils import mediainfo
+from dotenv import load_dotenv
+from transcription import transcribe_audio
+
+load_dotenv()
+
+# "auto" splits files longer than CHUNKED_TRANSCRIPTION_MIN_SECONDS; "off" always sends the whole file
+CHUNKED_TRANSCRIPTION = os.getenv("CHUNKED_TRANSCRIPTION", "auto").lower()
+CHUNKED_TRANSCRIPTION_MIN_SECONDS = float(os.getenv("CHUNKED_TRANSCRIPTION_MIN_SECONDS", "1800"))
+
+# Target segment length and how much of the previous segment each segment repeats
+CHUNK_SEGMENT_SECONDS = float(os.getenv("CHUNK_SEGMENT_SECONDS", "600"))
+CHUNK_OVERLAP_SECONDS = float(os.getenv("CHUNK_OVERLAP_SECONDS", "15"))
+
+# Cut points are moved to the nearest pause within this window around the target
+CHUNK_SILENCE_SEARCH_SECONDS = float(os.getenv("CHUNK_SILENCE_SEARCH_SECONDS", "30"))
+
+# Segments transcribed at the same time
+CHUNK_MAX_WORKERS = int(os.getenv("CHUNK_MAX_WORKERS", "4"))
+
+CHAPTER_RE = re.compile(r"^CHAPTER:\s*(.*?)\s*\(\s*([\d:]+)\s*-\s*([\d:]+)\s*\)\s*$")
+LINE_TIMESTAMP_RE = re.compile(r"^\W{0,2}((?:\d{1,2}:)?\d{1,2}:\d{2})(?!\d)")
+SPEAKER_RE = re.compile(r"\b[Ss]peaker\s+([A-Z0-9]{1,3})\b")
+
+def parse_timestamp(value: str) -> Optional[float]:
+    """Converts "MM:SS" or "HH:MM:SS" to seconds"""
+    try:
+        seconds = 0.0
+        for part in value.split(":"):
+            seconds = seconds * 60 + int(part)
+        return seconds
+    except ValueError:
+        return None
+
+def format_timestamp(seconds: float, with_hours: bool = False) -> str:
+    """Formats seconds as "MM:SS", or "HH:MM:SS" when needed or requested"""
+    seconds = int(round(seconds))
+    hours, remainder = divmod(seconds, 3600)
+    minutes, secs = divmod(remainder, 60)
+    if hours or with_hours:
+        return f"{hours:02d}:{minutes:02d}:{secs:02d}"
+    return f"{minutes:02d}:{secs:02d}"
+
+def get_audio_duration(audio_file_path: str) -> Optional[float]:
+    """Reads the duration in seconds with ffprobe, without decoding the file"""
+    try:
+        return float(mediainfo(audio_file_path)["duration"])
+    except Exception:
+        return None
+
+def should_chunk(audio_file_path: str) -> bool:
+    """Whether a file is long enough to be transcribed in segments"""
+    if CHUNKED_TRANSCRIPTION == "off":
+        return False
+    duration = get_audio_duration(audio_file_path)
+    return duration is not None and duration > CHUNKED_TRANSCRIPTION_MIN_SECONDS
+
+def ffmpeg_range_command(audio_file_path: str, start_ms: int, end_ms: int) -> List[str]:
+    """ffmpeg arguments that read only start_ms..end_ms of a file, downmixed to 16 kHz mono"""
+    return [AudioSegment.converter, "-v", "error", "-nostdin",
+            "-ss", f"{start_ms / 1000:.3f}", "-t", f"{(end_ms - start_ms) / 1000:.3f}",
+            "-i", audio_file_path, "-vn", "-ac", "1", "-ar", "16000"]
+
+def decode_range(audio_file_path: str, start_ms: int, end_ms: int) -> AudioSegment:
+    """Decodes start_ms..end_ms of a file, seeking to it instead of decoding from the beginning"""
+    result = subprocess.run(ffmpeg_range_command(audio_file_path, start_ms, end_ms) + ["-f", "s16le", "-"],
+                            capture_output=True, check=True)
+    return AudioSegment(data=result.stdout, sample_width=2, frame_rate=16000, channels=1)
+
+def export_range(audio_file_path: str, start_ms: int, end_ms: int, output_path: str, export_format: str):
+    """Writes start_ms..end_ms of a file to output_path; ffmpeg streams it, nothing is held in memory"""
+    subprocess.run(ffmpeg_range_command(audio_file_path, start_ms, end_ms) + ["-f", export_format, "-y", output_path],
+                   capture_output=True, check=True)
+
+def find_cut_point(audio_file_path: str, target_ms: int, search_ms: int) -> int:
+    """Returns the middle of the pause closest to target_ms, or target_ms if there is none"""
+    window_start = max(0, target_ms - search_ms // 2)
+    window = decode_range(audio_file_path, window_start, target_ms + search_ms // 2)
+    if len(window) == 0 or window.dBFS == float("-inf"):
+        return target_ms
+
+    silences = detect_silence(window, min_silence_len=500, silence_thresh=window.dBFS - 16)
+    if not silences:
+        return target_ms
+
+    center = target_ms - window_start
+    start, end = min(silences, key=lambda s: abs((s[0] + s[1]) // 2 - center))
+    return window_start + (start + end) // 2
+
+def plan_segments(audio_file_path: str, total_ms: int, segment_seconds: float, overlap_seconds: float,
+                  search_seconds: float = CHUNK_SILENCE_SEARCH_SECONDS) -> List[Tuple[int, int, int]]:
+    """
+    Splits a total_ms long file into segments, cutting at pauses near every segment_seconds.
+
+    Only the search window around each target cut is decoded.
+
+    Returns:
+        (start_ms, cut_ms, end_ms) per segment. The segment covers start..end; it owns
+        cut..end, and start..cut is overlap repeated from the previous segment.
+    """
+    segment_ms = int(segment_seconds * 1000)
+    overlap_ms = int(overlap_seconds * 1000)
+    search_ms = min(int(search_seconds * 1000), segment_ms // 2)
+
+    cuts = [0]
+    while total_ms - cuts[-1] > segment_ms * 1.25:
+        cut = find_cut_point(audio_file_path, cuts[-1] + segment_ms, search_ms)
+        cuts.append(max(cut, cuts[-1] + segment_ms // 2))
+    cuts.append(total_ms)
+
+    return [(max(0, cuts[i] - overlap_ms), cuts[i], cuts[i + 1]) for i in range(len(cuts) - 1)]
+
+def parse_segment_transcript(text: str, offset: float) -> List[dict]:
+    """
+    Parses one segment's CHAPTER-formatted transcript, shifting all times by offset seconds.
+
+    Returns:
+        Chapters as {'title', 'start', 'end', 'lines': [{'time', 'text'}]} with absolute times
+    """
+    chapters = []
+    current = None
+    last_time = offset
+    for raw_line in text.split("\n"):
+        line = raw_line.strip()
+        if not line:
+            continue
+
+        header = CHAPTER_RE.match(line)
+        if header or line.startswith("CHAPTER:"):
+            if header:
+                title = header.group(1)
+                start = (parse_timestamp(header.group(2)) or 0) + offset
+                end = (parse_timestamp(header.group(3)) or 0) + offset
+            else:
+                title, start, end = line[8:].strip(), last_time, last_time
+            current = {'title': title, 'start': start, 'end': end, 'lines': []}
+            chapters.append(current)
+            last_time = start
+            continue
+
+        if current is None:
+            current = {'title': "Meeting Transcript", 'start': offset, 'end': offset, 'lines': []}
+            chapters.append(current)
+
+        match = LINE_TIMESTAMP_RE.match(line)
+        if match:
+            local_time = parse_timestamp(match.group(1))
+            if local_time is not None:
+                last_time = local_time + offset
+                stamp = format_timestamp(last_time, with_hours=match.group(1).count(":") == 2)
+                line = line[:match.start(1)] + stamp + line[match.end(1):]
+        current['lines'].append({'time': last_time, 'text': line})
+        current['end'] = max(current['end'], last_time)
+
+    return chapters
+
+def _utterance_text(line: str) -> str:
+    """The spoken words of a transcript line, without timestamp and speaker"""
+    text = LINE_TIMESTAMP_RE.sub("", line)
+    text = SPEAKER_RE.sub("", text)
+    return re.sub(r"[^\w\s]", "", text).lower().strip()
+
+def _speaker_label(index: int) -> str:
+    return chr(ord("A") + index) if index < 26 else str(index + 1)
+
+def reconcile_speakers(previous_lines: List[dict], overlap_lines: List[dict], labels: List[str],
+                       used_labels: List[str]) -> Dict[str, str]:
+    """
+    Maps a segment's speaker labels onto the labels already used in the stitched transcript.
+
+    Lines the two segments both transcribed (the overlap) are matched by text similarity and the
+    previous segment's speaker wins the vote. Speakers that can't be matched get new labels.
+    """
+    votes: Dict[str, Dict[str, int]] = {}
+    for line in overlap_lines:
+        speaker = SPEAKER_RE.search(line['text'])
+        words = _utterance_text(line['text'])
+        if not speaker or not words:
+            continue
+
+        best_ratio, best_label = 0.0, None
+        for previous in previous_lines:
+            previous_speaker = SPEAKER_RE.search(previous['text'])
+            if not previous_speaker:
+                continue
+            ratio = SequenceMatcher(None, words, _utterance_text(previous['text'])).ratio()
+            if ratio > best_ratio:
+                best_ratio, best_label = ratio, previous_speaker.group(1)
+        if best_label and best_ratio >= 0.6:
+            label_votes = votes.setdefault(speaker.group(1), {})
+            label_votes[best_label] = label_votes.get(best_label, 0) + 1
+
+    mapping: Dict[str, str] = {}
+    # Strongest evidence first, so two local speakers never claim the same global label
+    ranked = sorted(((count, local, target) for local, targets in votes.items()
+                     for target, count in targets.items()), reverse=True)
+    for _, local, target in ranked:
+        if local not in mapping and target not in mapping.values():
+            mapping[local] = target
+
+    for local in labels:
+        if local not in mapping:
+            index = 0
+            while _speaker_label(index) in used_labels or _speaker_label(index) in mapping.values():
+                index += 1
+            mapping[local] = _speaker_label(index)
+    return mapping
+
+def stitch_segments(segments: List[Tuple[int, int, int]], transcripts: List[str]) -> str:
+    """Combines per-segment transcripts into one CHAPTER-formatted transcript with absolute times"""
+    output_chapters = []
+    previous_lines: List[dict] = []
+    used_labels: List[str] = []
+
+    for (start_ms, cut_ms, end_ms), text in zip(segments, transcripts):
+        start, cut, end = start_ms / 1000, cut_ms / 1000, end_ms / 1000
+        if text is None or text.startswith("Error:"):
+            output_chapters.append({
+                'title': "Transcription unavailable",
+                'start': cut,
+                'end': end,
+                'lines': [{'time': cut, 'text': f"[{text or 'Error: segment could not be transcribed'}]"}]
+            })
+            previous_lines = []
+            continue
+
+        chapters = parse_segment_transcript(text, start)
+        lines = [line for chapter in chapters for line in chapter['lines']]
+        labels = []
+        for line in lines:
+            for label in SPEAKER_RE.findall(line['text']):
+                if label not in labels:
+                    labels.append(label)
+
+        overlap_lines = [line for line in lines if line['time'] < cut]
+        mapping = reconcile_speakers(previous_lines, overlap_lines, labels, used_labels)
+        relabel = lambda m: m.group(0)[:m.start(1) - m.start(0)] + mapping.get(m.group(1), m.group(1))
+
+        for line in lines:
+            line['text'] = SPEAKER_RE.sub(relabel, line['text'])
+
+        for chapter in chapters:
+            # The overlap was already covered by the previous segment
+            owned = [line for line in chapter['lines'] if line['time'] >= cut]
+            if not owned and chapter['end'] < cut:
+                continue
+            chapter['lines'] = owned
+            chapter['start'] = max(chapter['start'], cut)
+            chapter['end'] = min(max(chapter['end'], chapter['start']), end)
+            output_chapters.append(chapter)
+
+        used_labels.extend(label for label in mapping.values() if label not in used_labels)
+        previous_lines = lines
+
+    with_hours = any(chapter['end'] >= 3600 for chapter in output_chapters)
+    blocks = []
+    for chapter in output_chapters:
+        header = (f"CHAPTER: {chapter['title']} "
+                  f"({format_timestamp(chapter['start'], with_hours)} - {format_timestamp(chapter['end'], with_hours)})")
+        blocks.append("\n".join([header] + [line['text'] for line in chapter['lines']]))
+    return "\n\n".join(blocks)
+
+def transcribe_audio_chunked(audio_file_path: str, mime_type: str,
+                             progress_callback: Optional[Callable[[str], None]] = None,
+                             transcriber: Callable = transcribe_audio,
+                             segment_seconds: float = CHUNK_SEGMENT_SECONDS,
+                             overlap_seconds: float = CHUNK_OVERLAP_SECONDS,
+                             max_workers: int = CHUNK_MAX_WORKERS,
+                             export_format: str = "flac") -> str:
+    """
+    Transcribes a long file as overlapping segments in parallel and stitches the results.
+
+    Segments are cut at pauses, extracted one at a time by seeking with ffmpeg (memory stays
+    proportional to the search window, not the file), downmixed to 16 kHz mono and sent
+    through `transcriber` concurrently. A segment that fails (transcribe_audio already retries the model call) has
+    its time range marked as unavailable instead of losing the whole transcript.
+
+    Returns:
+        The transcript in the same CHAPTER format as transcribe_audio
+    """
+    duration = get_audio_duration(audio_file_path)
+    if duration is None:
+        print(f"Could not read the duration of {audio_file_path}; transcribing it whole")
+        return transcriber(audio_file_path, mime_type, progress_callback=progress_callback)
+    segments = plan_segments(audio_file_path, int(duration * 1000), segment_seconds, overlap_seconds)
+    print(f"Transcribing {audio_file_path} in {len(segments)} segment(s) with up to {max_workers} worker(s)")
+
+    # Report "uploaded" once, when the first segment reaches storage
+    uploaded = threading.Event()
+    def segment_progress(stage: str):
+        if stage == "uploaded" and progress_callback and not uploaded.is_set():
+            uploaded.set()
+            progress_callback(stage)
+
+    segment_mime_type = f"audio/{export_format}"
+    temp_paths = []
+    try:
+        for start_ms, _, end_ms in segments:
+            with tempfile.NamedTemporaryFile(delete=False, suffix=f".{export_format}") as tmp_file:
+                temp_paths.append(tmp_file.name)
+            export_range(audio_file_path, start_ms, end_ms, temp_paths[-1], export_format)
+
+        def transcribe_segment(path: str) -> str:
+            try:
+                text = transcriber(path, segment_mime_type, progress_callback=segment_progress)
+            except Exception as e:
+                text = f"Error: {e}"
+            if not text or text.startswith("Error:"):
+                print(f"Segment {path} failed: {text}")
+            return text
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="segment-transcription") as executor:
+            transcripts = list(executor.map(transcribe_segment, temp_paths))
+    finally:
+        for path in temp_paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    if all(not text or text.startswith("Error:") for text in transcripts):
+        return f"Error: Could not transcribe any of the {len(segments)} segments. Last error: {transcripts[-1]}"
+    return stitch_segments(segments, transcripts)
+
+def transcribe_meeting_audio(audio_file_path: str, mime_type: str,
+                             progress_callback: Optional[Callable[[str], None]] = None) -> str:
+    """Transcribes a meeting file, in parallel segments when it is long enough"""
+    if should_chunk(audio_file_path):
+        return transcribe_audio_chunked(audio_file_path, mime_type, progress_callback=progress_callback)
+    return transcribe_audio(audio_file_path, mime_type, progress_callback=progress_callback)
@@ -0,0 +1,47 @@
+import hashlib
+import os
+import uuid
+from typing import Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Message queue shared by all server processes (e.g. redis://localhost:6379/1), so events
+# emitted on one worker reach clients connected to any other; empty runs a single process
+SOCKETIO_MESSAGE_QUEUE = os.getenv("SOCKETIO_MESSAGE_QUEUE", "")
+
+# Public base URL of every worker, comma-separated and listed in the same order on all of them
+# (e.g. http://host:5000,http://host:5001); empty runs a single process that owns every session
+LIVE_WORKER_URLS = [url.strip().rstrip("/") for url in os.getenv("LIVE_WORKER_URLS", "").split(",") if url.strip()]
+
+# This process's position in LIVE_WORKER_URLS
+LIVE_WORKER_INDEX = int(os.getenv("LIVE_WORKER_INDEX", "0"))
+
+def session_worker(session_id: str, worker_count: Optional[int] = None) -> int:
+    """
+    The index of the worker that owns a live session's pipeline.
+
+    Rendezvous hashing: every worker computes the same owner without coordinating, and
+    adding a worker only moves the sessions the new worker wins.
+    """
+    if worker_count is None:
+        worker_count = max(len(LIVE_WORKER_URLS), 1)
+    return max(range(worker_count),
+               key=lambda index: hashlib.sha1(f"{index}:{session_id}".encode()).digest())
+
+def owns_session(session_id: str) -> bool:
+    """Whether this process runs the session's pipeline"""
+    return len(LIVE_WORKER_URLS) <= 1 or session_worker(session_id) == LIVE_WORKER_INDEX
+
+def session_owner_url(session_id: str) -> Optional[str]:
+    """Base URL of the worker that owns the session (None when running a single process)"""
+    if not LIVE_WORKER_URLS:
+        return None
+    return LIVE_WORKER_URLS[session_worker(session_id)]
+
+def new_session_id() -> str:
+    """A fresh session ID owned by this process, so the worker that creates a session runs it"""
+    while True:
+        session_id = str(uuid.uuid4())
+        if owns_session(session_id):
+            return session_id
@@ -0,0 +1,213 @@
+import itertools
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Model used for meeting chat; a cached context can only be used with the model it was created for
+CHAT_MODEL = "gemini-2.5-flash-preview-05-20"
+
+# Where meeting transcripts are cached for chat: "off" (send the context inline: retrieved passages
+# or the full transcript), "vertex" (explicit Vertex AI context caching) or "local" (an in-process
+# stand-in, for development and benchmarks). A cached transcript takes the place of retrieval
+CHAT_CONTEXT_CACHE = os.getenv("CHAT_CONTEXT_CACHE", "off").lower()
+
+# A cached transcript lives this long after the last chat question about the meeting
+CHAT_CONTEXT_CACHE_TTL_SECONDS = int(os.getenv("CHAT_CONTEXT_CACHE_TTL_SECONDS", "3600"))
+
+# Transcripts shorter than this (estimated tokens) are sent inline; Vertex AI won't cache small contexts
+CHAT_CONTEXT_CACHE_MIN_TOKENS = int(os.getenv("CHAT_CONTEXT_CACHE_MIN_TOKENS", "4096"))
+
+# A cache's TTL is extended at most this often, so busy meetings don't pay an update call per question.
+# Also how long a meeting waits before trying again after its cache could not be created
+CHAT_CONTEXT_CACHE_REFRESH_SECONDS = int(os.getenv("CHAT_CONTEXT_CACHE_REFRESH_SECONDS", "300"))
+
+# Instructions cached with the transcript; the per-question prompt only carries history and question
+CHAT_CONTEXT_INSTRUCTION = """You are a helpful assistant answering questions about a meeting.
+Use the meeting transcript you were given to answer the user's question.
+If the transcript doesn't contain the answer, say so."""
+
+class ContextCacheError(Exception):
+    """The provider could not create, extend or use a cached context"""
+
+class VertexContextCache:
+    """Explicit context caching on Vertex AI through the google-genai client"""
+
+    def __init__(self, model: str = CHAT_MODEL, client=None):
+        self.model = model
+        self._client = client
+        self._client_lock = threading.Lock()
+
+    def _get_client(self):
+        with self._client_lock:
+            if self._client is None:
+                from google import genai
+                from google.genai.types import HttpOptions
+                self._client = genai.Client(
+                    vertexai=True,
+                    project=os.getenv("GOOGLE_CLOUD_PROJECT"),
+                    location=os.getenv("GOOGLE_CLOUD_LOCATION", "us-central1"),
+                    http_options=HttpOptions(api_version="v1")
+                )
+            return self._client
+
+    def create(self, content: str, system_instruction: str, ttl_seconds: int) -> str:
+        """Cache content for ttl_seconds; returns the cache's name"""
+        from google.genai.types import Content, CreateCachedContentConfig, Part
+        try:
+            cached = self._get_client().caches.create(
+                model=self.model,
+                config=CreateCachedContentConfig(
+                    contents=[Content(role="user", parts=[Part(text=content)])],
+                    system_instruction=system_instruction,
+                    ttl=f"{ttl_seconds}s"
+                )
+            )
+        except Exception as e:
+            raise ContextCacheError(f"Could not create cached context: {e}")
+        return cached.name
+
+    def refresh(self, name: str, ttl_seconds: int):
+        """Extend a cache to expire ttl_seconds from now"""
+        from google.genai.types import UpdateCachedContentConfig
+        try:
+            self._get_client().caches.update(name=name, config=UpdateCachedContentConfig(ttl=f"{ttl_seconds}s"))
+        except Exception as e:
+            raise ContextCacheError(f"Could not refresh cached context {name}: {e}")
+
+    def delete(self, name: str):
+        try:
+            self._get_client().caches.delete(name=name)
+        except Exception as e:
+            raise ContextCacheError(f"Could not delete cached context {name}: {e}")
+
+    def generate(self, name: str, prompt: str) -> str:
+        """Answer a prompt with the cached content in front of it"""
+        from google.genai.types import GenerateContentConfig
+        try:
+            response = self._get_client().models.generate_content(
+                model=self.model,
+                contents=prompt,
+                config=GenerateContentConfig(cached_content=name, temperature=0.2)
+            )
+        except Exception as e:
+            raise ContextCacheError(f"Generation with cached context {name} failed: {e}")
+        return response.text or ""
+
+    def stream(self, name: str, prompt: str) -> Iterator[str]:
+        """Like generate(), yielding the answer's text as it arrives; closing the iterator ends the request"""
+        from google.genai.types import GenerateContentConfig
+        try:
+            responses = self._get_client().models.generate_content_stream(
+                model=self.model,
+                contents=prompt,
+                config=GenerateContentConfig(cached_content=name, temperature=0.2)
+            )
+            for response in responses:
+                if response.text:
+                    yield response.text
+        except Exception as e:
+            raise ContextCacheError(f"Streaming with cached context {name} failed: {e}")
+
+class LocalContextCache:
+    """
+    In-process stand-in for provider-side caching with the same interface and TTL behaviour.
+
+    Every generate() call is recorded in `requests` as (name, prompt) and answered by
+    `responder(content, prompt)`, where content is the cached instruction and text.
+    """
+
+    def __init__(self, responder: Optional[Callable[[str, str], str]] = None):
+        self.responder = responder or (lambda content, prompt: "Answer from the cached transcript.")
+        self.requests: List[Tuple[str, str]] = []
+        self._entries: Dict[str, Tuple[str, float]] = {}  # name -> (content, expires_at)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _entry(self, name: str) -> Tuple[str, float]:
+        entry = self._entries.get(name)
+        if entry is None or entry[1] <= time.time():
+            self._entries.pop(name, None)
+            raise ContextCacheError(f"Cached context {name} not found or expired")
+        return entry
+
+    def create(self, content: str, system_instruction: str, ttl_seconds: int) -> str:
+        with self._lock:
+            name = f"cachedContents/local-{next(self._ids)}"
+            self._entries[name] = (f"{system_instruction}\n\n{content}", time.time() + ttl_seconds)
+        return name
+
+    def refresh(self, name: str, ttl_seconds: int):
+        with self._lock:
+            content, _ = self._entry(name)
+            self._entries[name] = (content, time.time() + ttl_seconds)
+
+    def delete(self, name: str):
+        with self._lock:
+            self._entries.pop(name, None)
+
+    def generate(self, name: str, prompt: str) -> str:
+        with self._lock:
+            content, _ = self._entry(name)
+            self.requests.append((name, prompt))
+        return self.responder(content, prompt)
+
+    def stream(self, name: str, prompt: str) -> Iterator[str]:
+        """The responder's answer, a word at a time"""
+        answer = self.generate(name, prompt)
+        for index, word in enumerate(answer.split(" ")):
+            yield word if index == 0 else f" {word}"
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(1 for _, expires_at in self._entries.values() if expires_at > time.time())
+
+_context_cache = None
+_context_cache_created = False
+_context_cache_lock = threading.Lock()
+
+def create_context_cache(kind: str = CHAT_CONTEXT_CACHE):
+    """A context cache of the given kind ("vertex", "local"), or None when caching is off"""
+    if kind == "vertex":
+        return VertexContextCache()
+    if kind == "local":
+        return LocalContextCache()
+    if kind != "off":
+        print(f"Unknown CHAT_CONTEXT_CACHE {kind!r}, sending chat context inline")
+    return None
+
+def get_context_cache():
+    """The process-wide context cache configured by CHAT_CONTEXT_CACHE (None when off)"""
+    global _context_cache, _context_cache_created
+    with _context_cache_lock:
+        if not _context_cache_created:
+            _context_cache = create_context_cache()
+            _context_cache_created = True
+        return _context_cache
+
+class CachedContext:
+    """A meeting's cached transcript, ready to answer chat prompts"""
+
+    def __init__(self, cache, name: str, on_error: Callable[[], None]):
+        self.cache = cache
+        self.name = name
+        self._on_error = on_error
+
+    def generate(self, prompt: str) -> str:
+        """Answer a prompt against the cached transcript; a failure drops the cache so the next question recreates it"""
+        try:
+            return self.cache.generate(self.name, prompt)
+        except ContextCacheError:
+            self._on_error()
+            raise
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        """Like generate(), yielding the answer's text as it arrives"""
+        try:
+            yield from self.cache.stream(self.name, prompt)
+        except ContextCacheError:
+            self._on_error()
+            raise
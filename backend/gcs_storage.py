@@ -0,0 +1,378 @@
+import atexit
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+import google.auth
+from google.api_core.exceptions import NotFound
+from google.auth.credentials import AnonymousCredentials
+from google.auth.transport.requests import AuthorizedSession
+from google.cloud import storage
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Size of the shared HTTP connection pool used for all Cloud Storage requests
+GCS_POOL_SIZE = int(os.getenv("GCS_POOL_SIZE", "32"))
+
+# Optional explicit bucket name (defaults to "<project>-transcriber-temp")
+GCS_BUCKET_NAME = os.getenv("GCS_BUCKET_NAME")
+
+# Set to the address of a local fake-GCS server (e.g. fake-gcs-server) to run without Google Cloud
+STORAGE_EMULATOR_HOST = os.getenv("STORAGE_EMULATOR_HOST")
+
+# Temp objects are deleted in the background, in batches of up to this many (GCS allows 100)
+GCS_DELETE_BATCH_SIZE = min(int(os.getenv("GCS_DELETE_BATCH_SIZE", "50")), 100)
+
+# How long the deleter waits to fill a batch before sending it
+GCS_DELETE_FLUSH_SECONDS = float(os.getenv("GCS_DELETE_FLUSH_SECONDS", "2.0"))
+
+# Failed deletes are retried with exponential backoff up to this many times
+GCS_DELETE_MAX_RETRIES = int(os.getenv("GCS_DELETE_MAX_RETRIES", "5"))
+
+# Temp objects older than this are treated as orphans by the startup sweep
+GCS_ORPHAN_MAX_AGE_SECONDS = int(os.getenv("GCS_ORPHAN_MAX_AGE_SECONDS", "3600"))
+
+# Object name prefixes used for temporary uploads
+TEMP_OBJECT_PREFIXES = ("audio-", "live-audio-")
+
+def parse_gs_uri(gs_uri: str):
+    """
+    Splits a gs:// URI into bucket and object names.
+
+    Returns:
+        (bucket_name, object_name), or None if the URI is not a gs:// URI
+    """
+    if not gs_uri or not gs_uri.startswith("gs://"):
+        return None
+
+    uri_parts = gs_uri[5:].split("/", 1)  # Remove gs:// and split
+    if len(uri_parts) != 2:
+        return None
+    return uri_parts[0], uri_parts[1]
+
+def create_storage_client(project_id: str) -> storage.Client:
+    """
+    Creates a storage client backed by a pooled, authorized HTTP session.
+
+    When STORAGE_EMULATOR_HOST is set the client talks to the local emulator
+    with anonymous credentials.
+    """
+    if STORAGE_EMULATOR_HOST:
+        credentials = AnonymousCredentials()
+    else:
+        credentials, _ = google.auth.default(scopes=storage.Client.SCOPE)
+
+    session = AuthorizedSession(credentials)
+    adapter = HTTPAdapter(pool_connections=GCS_POOL_SIZE, pool_maxsize=GCS_POOL_SIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    return storage.Client(project=project_id, credentials=credentials, _http=session)
+
+class GCSStorage:
+    """Shared Cloud Storage access with a lazily created client and a cached bucket handle"""
+
+    def __init__(self, project_id: str, client: Optional[storage.Client] = None, bucket_name: Optional[str] = None):
+        self.project_id = project_id
+        self.bucket_name = bucket_name or GCS_BUCKET_NAME or f"{project_id}-transcriber-temp"
+        self._client = client
+        self._bucket = None
+        self._lock = threading.RLock()
+        self.deletion_queue = GCSDeletionQueue(self)
+
+    @property
+    def client(self) -> storage.Client:
+        """The storage client, created once on first use"""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = create_storage_client(self.project_id)
+        return self._client
+
+    def get_bucket(self) -> storage.Bucket:
+        """Get the temp bucket, checking/creating it only on first use"""
+        if self._bucket is None:
+            with self._lock:
+                if self._bucket is None:
+                    self._bucket = self._resolve_bucket()
+        return self._bucket
+
+    def _resolve_bucket(self) -> storage.Bucket:
+        """Look up the temp bucket, creating it (or a uniquely named fallback) if needed"""
+        try:
+            # Try to get the bucket, create if it doesn't exist
+            try:
+                bucket = self.client.bucket(self.bucket_name)
+                bucket.reload()  # Check if bucket exists
+            except Exception:
+                # Create bucket if it doesn't exist
+                bucket = self._create_bucket()
+                print(f"Created bucket: {self.bucket_name}")
+        except Exception as e:
+            print(f"Error with bucket {self.bucket_name}: {e}")
+            # Fallback to a more unique bucket name
+            self.bucket_name = f"{self.project_id}-transcriber-{uuid.uuid4().hex[:8]}"
+            bucket = self._create_bucket()
+            print(f"Created fallback bucket: {self.bucket_name}")
+        return bucket
+
+    def _create_bucket(self) -> storage.Bucket:
+        """Create the temp bucket with a lifecycle rule that expires leftover temp objects after a day"""
+        bucket = self.client.bucket(self.bucket_name)
+        bucket.add_lifecycle_delete_rule(age=1, matches_prefix=list(TEMP_OBJECT_PREFIXES))
+        return self.client.create_bucket(bucket)
+
+    def upload_file(self, local_file_path: str, prefix: str = "audio-") -> str:
+        """Uploads a local file and returns its gs:// URI"""
+        bucket = self.get_bucket()
+
+        # Generate a unique object name
+        file_extension = os.path.splitext(local_file_path)[1]
+        object_name = f"{prefix}{uuid.uuid4().hex}{file_extension}"
+
+        blob = bucket.blob(object_name)
+        blob.upload_from_filename(local_file_path)
+        return f"gs://{bucket.name}/{object_name}"
+
+    def upload_bytes(self, data: bytes, prefix: str = "live-audio-", file_extension: str = ".wav") -> str:
+        """Uploads in-memory data and returns its gs:// URI"""
+        bucket = self.get_bucket()
+
+        # Generate a unique object name
+        object_name = f"{prefix}{uuid.uuid4().hex}{file_extension}"
+
+        blob = bucket.blob(object_name)
+        blob.upload_from_string(data)
+        return f"gs://{bucket.name}/{object_name}"
+
+    def delete(self, gs_uri: str) -> bool:
+        """Deletes the object behind a gs:// URI. Returns False for non-gs:// URIs."""
+        parsed = parse_gs_uri(gs_uri)
+        if not parsed:
+            return False
+
+        bucket_name, object_name = parsed
+        self._blob(bucket_name, object_name).delete()
+        return True
+
+    def _blob(self, bucket_name: str, object_name: str) -> storage.Blob:
+        bucket = self.get_bucket() if bucket_name == self.bucket_name else self.client.bucket(bucket_name)
+        return bucket.blob(object_name)
+
+    def delete_batch(self, gs_uris: List[str]) -> List[str]:
+        """
+        Deletes several objects in one batch request.
+
+        Returns:
+            The URIs that could not be deleted (already-missing objects count as deleted)
+        """
+        targets = [(gs_uri, parse_gs_uri(gs_uri)) for gs_uri in gs_uris]
+        targets = [(gs_uri, parsed) for gs_uri, parsed in targets if parsed]
+        if not targets:
+            return []
+
+        # Resolve the cached bucket first so no lookup request ends up inside the batch
+        self.get_bucket()
+        try:
+            with self.client.batch():
+                for _, (bucket_name, object_name) in targets:
+                    self._blob(bucket_name, object_name).delete()
+            return []
+        except Exception as e:
+            print(f"Warning: Batch delete of {len(targets)} files failed, deleting individually: {e}")
+
+        # The batch reports only the first error, so retry one by one to find the real failures
+        failed = []
+        for gs_uri, (bucket_name, object_name) in targets:
+            try:
+                self._blob(bucket_name, object_name).delete()
+            except NotFound:
+                pass
+            except Exception as e:
+                print(f"Warning: Could not delete file {gs_uri}: {e}")
+                failed.append(gs_uri)
+        return failed
+
+    def find_orphans(self, max_age_seconds: int = GCS_ORPHAN_MAX_AGE_SECONDS) -> List[str]:
+        """List temp objects older than max_age_seconds, e.g. left behind by a crash"""
+        bucket = self.get_bucket()
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=max_age_seconds)
+        orphans = []
+        for prefix in TEMP_OBJECT_PREFIXES:
+            for blob in self.client.list_blobs(bucket, prefix=prefix):
+                if blob.time_created and blob.time_created < cutoff:
+                    orphans.append(f"gs://{bucket.name}/{blob.name}")
+        return orphans
+
+class GCSDeletionQueue:
+    """Background deleter that batches temp-object deletes off the transcription path"""
+
+    def __init__(self, storage_layer: GCSStorage,
+                 batch_size: int = GCS_DELETE_BATCH_SIZE,
+                 flush_interval: float = GCS_DELETE_FLUSH_SECONDS,
+                 max_retries: int = GCS_DELETE_MAX_RETRIES):
+        self.storage = storage_layer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.deleted_count = 0
+        self.failed_count = 0
+        self._queue: "queue.Queue[Tuple[str, int]]" = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the deleter thread if it isn't running"""
+        with self._lock:
+            if not self._thread or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run)
+                self._thread.daemon = True
+                self._thread.start()
+
+    def enqueue(self, gs_uri: str, attempt: int = 0):
+        """Schedule a gs:// URI for deletion"""
+        self._queue.put((gs_uri, attempt))
+        self.start()
+
+    def flush(self):
+        """Synchronously delete everything still queued (used at interpreter exit)"""
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+            if len(batch) >= self.batch_size:
+                self._process(batch, retry=False)
+                batch = []
+        if batch:
+            self._process(batch, retry=False)
+
+    def _run(self):
+        """Collect URIs into batches and delete them"""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                self._process(batch)
+            except Exception as e:
+                print(f"Error in GCS deletion thread: {e}")
+
+    def _process(self, batch: List[Tuple[str, int]], retry: bool = True):
+        attempts = dict(batch)
+        failed = self.storage.delete_batch(list(attempts))
+        self.deleted_count += len(attempts) - len(failed)
+        if len(attempts) > len(failed):
+            print(f"Deleted {len(attempts) - len(failed)} temp file(s) from GCS")
+
+        for gs_uri in failed:
+            attempt = attempts[gs_uri] + 1
+            if retry and attempt <= self.max_retries:
+                # Back off exponentially before handing the URI back to the queue
+                timer = threading.Timer(min(2 ** attempt, 60), self._queue.put, args=((gs_uri, attempt),))
+                timer.daemon = True
+                timer.start()
+            else:
+                self.failed_count += 1
+                print(f"Warning: Giving up on deleting {gs_uri}; the orphan sweep or bucket lifecycle will remove it")
+
+_storages: Dict[str, GCSStorage] = {}
+_storages_lock = threading.Lock()
+
+def get_storage(project_id: str) -> GCSStorage:
+    """Get the process-wide storage layer for a project"""
+    storage_layer = _storages.get(project_id)
+    if storage_layer is None:
+        with _storages_lock:
+            storage_layer = _storages.get(project_id)
+            if storage_layer is None:
+                storage_layer = GCSStorage(project_id)
+                _storages[project_id] = storage_layer
+    return storage_layer
+
+@atexit.register
+def _flush_pending_deletes():
+    """Best-effort delete of anything still queued when the process exits"""
+    for storage_layer in list(_storages.values()):
+        try:
+            storage_layer.deletion_queue.flush()
+        except Exception as e:
+            print(f"Warning: Could not flush pending GCS deletes: {e}")
+
+def start_orphan_sweep(project_id: str, max_age_seconds: int = GCS_ORPHAN_MAX_AGE_SECONDS):
+    """Queue temp objects left behind by earlier runs for deletion, in a background thread"""
+    def sweep():
+        try:
+            storage_layer = get_storage(project_id)
+            orphans = storage_layer.find_orphans(max_age_seconds)
+            for gs_uri in orphans:
+                storage_layer.deletion_queue.enqueue(gs_uri)
+            if orphans:
+                print(f"Queued {len(orphans)} orphaned temp file(s) for deletion")
+        except Exception as e:
+            print(f"Warning: GCS orphan sweep failed: {e}")
+
+    sweep_thread = threading.Thread(target=sweep)
+    sweep_thread.daemon = True
+    sweep_thread.start()
+    return sweep_thread
+
+def upload_to_gcs(local_file_path: str, project_id: str) -> str:
+    """
+    Uploads a file to Google Cloud Storage and returns the gs:// URI.
+
+    Args:
+        local_file_path: Path to the local file
+        project_id: Google Cloud Project ID
+
+    Returns:
+        The gs:// URI of the uploaded file
+    """
+    gs_uri = get_storage(project_id).upload_file(local_file_path, prefix="audio-")
+    print(f"File uploaded to: {gs_uri}")
+    return gs_uri
+
+def upload_audio_to_gcs(audio_data: bytes, project_id: str, file_extension: str = ".wav") -> str:
+    """
+    Uploads audio data to Google Cloud Storage and returns the gs:// URI.
+
+    Args:
+        audio_data: Raw audio data as bytes
+        project_id: Google Cloud Project ID
+        file_extension: File extension for the audio file
+
+    Returns:
+        The gs:// URI of the uploaded file
+    """
+    gs_uri = get_storage(project_id).upload_bytes(audio_data, prefix="live-audio-", file_extension=file_extension)
+    print(f"Live audio uploaded to: {gs_uri}")
+    return gs_uri
+
+def delete_from_gcs(gs_uri: str, project_id: str):
+    """
+    Schedules a file for deletion from Google Cloud Storage.
+
+    The delete happens on a background thread, batched with other pending deletes,
+    so callers are not blocked by the request.
+
+    Args:
+        gs_uri: The gs:// URI of the file to delete
+        project_id: Google Cloud Project ID
+    """
+    if not parse_gs_uri(gs_uri):
+        return
+    get_storage(project_id).deletion_queue.enqueue(gs_uri)
@@ -0,0 +1,164 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Optional
+from flask_socketio import SocketIO
+from dotenv import load_dotenv
+from session_store import SessionStore, get_session_store
+
+load_dotenv()
+
+# Number of file-transcription pipelines that run at the same time
+JOB_MAX_WORKERS = int(os.getenv("JOB_MAX_WORKERS", "4"))
+
+# Jobs allowed to wait for a worker before new submissions are rejected
+JOB_MAX_QUEUE = int(os.getenv("JOB_MAX_QUEUE", "20"))
+
+# Finished jobs are kept this long so clients can still fetch the result
+JOB_RETENTION_SECONDS = int(os.getenv("JOB_RETENTION_SECONDS", "3600"))
+
+# Pipeline stages in order, with the progress percentage reported for each
+JOB_STAGES = {
+    'queued': 0,
+    'running': 5,
+    'uploaded': 25,
+    'transcribed': 60,
+    'analyzed': 90,
+    'completed': 100,
+}
+
+class JobQueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity"""
+
+class Job:
+    """State of a single background transcription job"""
+
+    def __init__(self, job_id: str, description: str = ""):
+        self.job_id = job_id
+        self.description = description
+        self.status = 'queued'
+        self.error = None
+        self.result = None
+        self.created_at = datetime.now()
+        self.updated_at = self.created_at
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in ('completed', 'failed')
+
+    def to_dict(self, include_result: bool = True) -> dict:
+        data = {
+            'job_id': self.job_id,
+            'description': self.description,
+            'status': self.status,
+            'progress': JOB_STAGES.get(self.status, 100),
+            'error': self.error,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat(),
+        }
+        if include_result and self.status == 'completed':
+            data['result'] = self.result
+        return data
+
+class JobManager:
+    """
+    Runs long pipelines on a bounded worker pool and reports stage-level progress.
+
+    A job runs on the worker it was submitted to, but every state change is written to the
+    session store, so any worker can answer for it; progress events reach clients on other
+    workers through the Socket.IO message queue.
+    """
+
+    STORE_NAMESPACE = "jobs"
+
+    def __init__(self, socketio: SocketIO, store: Optional[SessionStore] = None,
+                 max_workers: int = JOB_MAX_WORKERS, max_queue: int = JOB_MAX_QUEUE):
+        self.socketio = socketio
+        self.store = store or get_session_store()
+        self.max_queue = max_queue
+        self.jobs: Dict[str, Job] = {}  # jobs run by this process
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="transcription-job")
+        self._lock = threading.Lock()
+
+    def submit(self, pipeline: Callable, *args, description: str = "") -> str:
+        """
+        Queue a pipeline run and return its job id.
+
+        The pipeline is called as pipeline(*args, progress_callback=callback) and its
+        return value becomes the job result.
+
+        Raises:
+            JobQueueFullError: if max_queue jobs are already waiting
+        """
+        with self._lock:
+            self._prune_finished_jobs()
+            queued = sum(1 for job in self.jobs.values() if job.status == 'queued')
+            if queued >= self.max_queue:
+                raise JobQueueFullError(f"Too many queued jobs ({queued}), try again later")
+
+            job = Job(str(uuid.uuid4()), description)
+            self.jobs[job.job_id] = job
+        self._save_job(job)
+
+        self._executor.submit(self._run, job, pipeline, args)
+        return job.job_id
+
+    def get_job(self, job_id: str) -> Optional[dict]:
+        """Get the current state (and result, once completed) of a job, wherever it runs"""
+        job = self.jobs.get(job_id)
+        if job:
+            return job.to_dict()
+        try:
+            return self.store.load(self.STORE_NAMESPACE, job_id)
+        except Exception as e:
+            print(f"Error loading job {job_id}: {e}")
+            return None
+
+    def get_stats(self) -> dict:
+        """Counts of jobs by status"""
+        stats = {}
+        for job in list(self.jobs.values()):
+            stats[job.status] = stats.get(job.status, 0) + 1
+        return stats
+
+    def _run(self, job: Job, pipeline: Callable, args: tuple):
+        self._update(job, 'running')
+        try:
+            job.result = pipeline(*args, progress_callback=lambda stage: self._update(job, stage))
+            self._update(job, 'completed')
+        except Exception as e:
+            print(f"Job {job.job_id} failed: {e}")
+            job.error = str(e)
+            self._update(job, 'failed')
+
+    def _update(self, job: Job, status: str):
+        """Record a stage change and push it to clients watching the job"""
+        job.status = status
+        job.updated_at = datetime.now()
+        self._save_job(job)
+        try:
+            self.socketio.emit('job_progress', job.to_dict(), room=f"job_{job.job_id}")
+        except Exception as e:
+            print(f"Error emitting job progress for {job.job_id}: {e}")
+
+    def _save_job(self, job: Job):
+        """Write a job's state to the store (queued; doesn't wait for storage)"""
+        try:
+            self.store.save(self.STORE_NAMESPACE, job.job_id, job.to_dict())
+        except Exception as e:
+            print(f"Error saving job {job.job_id}: {e}")
+
+    def _prune_finished_jobs(self):
+        """Drop finished jobs older than the retention period (caller holds the lock)"""
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+        expired = [job_id for job_id, job in self.jobs.items()
+                   if job.is_finished and job.updated_at.timestamp() < cutoff]
+        for job_id in expired:
+            del self.jobs[job_id]
+            try:
+                self.store.delete(self.STORE_NAMESPACE, job_id)
+            except Exception as e:
+                print(f"Error deleting job {job_id}: {e}")
@@ -1,12 +1,13 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit, join_room, leave_room
-import threading
-import time
 import os
 from dotenv import load_dotenv
 import google.generativeai as genai
 from live_transcription import LiveTranscriptionManager
+from audio_frames import decode_audio_message
+from audio_codecs import LIVE_AUDIO_FORMATS
+from gcs_storage import start_orphan_sweep
 
 # Load environment variables
 load_dotenv()
@@ -30,12 +31,17 @@ socketio = SocketIO(
     engineio_logger=False,  # Disable engine.io logging
     ping_timeout=60,
     ping_interval=25,
-    transports=['websocket', 'polling']
+    transports=['websocket', 'polling'],
+    async_handlers=False  # One client's events run in the order sent, so audio frames arrive in seq order
 )
 
 # Initialize live transcription manager
 transcription_manager = LiveTranscriptionManager(socketio)
 
+# Remove temp audio that earlier runs left behind in GCS
+if os.getenv("GOOGLE_CLOUD_PROJECT"):
+    start_orphan_sweep(os.getenv("GOOGLE_CLOUD_PROJECT"))
+
 # Add error handling middleware
 @app.errorhandler(Exception)
 def handle_exception(e):
@@ -51,26 +57,6 @@ def error_handler(e):
     """Handle socket errors"""
     print(f'Socket error occurred: {e}')
 
-# Start the update broadcasting thread
-def broadcast_updates():
-    """Periodically broadcast transcript updates"""
-    while True:
-        try:
-            transcription_manager.broadcast_transcript_updates()
-            time.sleep(1)  # Broadcast every second
-        except Exception as e:
-            print(f"Error broadcasting updates: {e}")
-            time.sleep(5)  # Wait longer on error to avoid spam
-
-# Start broadcast thread with proper error handling
-try:
-    broadcast_thread = threading.Thread(target=broadcast_updates)
-    broadcast_thread.daemon = True
-    broadcast_thread.start()
-    print("Broadcast thread started successfully")
-except Exception as e:
-    print(f"Failed to start broadcast thread: {e}")
-
 # REST API Endpoints
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -192,14 +178,15 @@ def get_shared_session_info(session_id):
 
 @app.route('/api/shared/<session_id>/transcript', methods=['GET'])
 def get_shared_session_transcript(session_id):
-    """Get transcript for a shared session (for viewers)"""
+    """Get transcript for a shared session (for viewers); ?since=<seq> returns only newer segments"""
     try:
-        transcript = transcription_manager.get_shared_session_transcript(session_id)
-        if transcript is not None:
+        since = request.args.get('since', type=int)
+        state = transcription_manager.get_shared_session_transcript_state(session_id, since)
+        if state is not None:
             return jsonify({
                 'success': True,
                 'session_id': session_id,
-                'transcript': transcript
+                **state
             }), 200
         else:
             return jsonify({
@@ -235,14 +222,37 @@ def delete_session(session_id):
 
 @app.route('/api/sessions/<session_id>/transcript', methods=['GET'])
 def get_session_transcript(session_id):
-    """Get the full transcript for a session"""
+    """Get the full transcript for a session; ?since=<seq> returns only the segments after that seq"""
+    try:
+        since = request.args.get('since', type=int)
+        state = transcription_manager.get_session_transcript_state(session_id, since)
+        if state is not None:
+            return jsonify({
+                'success': True,
+                'session_id': session_id,
+                **state
+            }), 200
+        else:
+            return jsonify({
+                'success': False,
+                'error': 'Session not found'
+            }), 404
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/sessions/<session_id>/stats', methods=['GET'])
+def get_session_stats(session_id):
+    """Get model-call statistics for a session (calls made and calls saved by VAD)"""
     try:
-        transcript = transcription_manager.get_session_transcript(session_id)
-        if transcript is not None:
+        stats = transcription_manager.get_session_stats(session_id)
+        if stats is not None:
             return jsonify({
                 'success': True,
                 'session_id': session_id,
-                'transcript': transcript
+                'stats': stats
             }), 200
         else:
             return jsonify({
@@ -255,6 +265,20 @@ def get_session_transcript(session_id):
             'error': str(e)
         }), 500
 
+@app.route('/api/live/stats', methods=['GET'])
+def get_live_pool_stats():
+    """Get utilization of the worker pool that transcribes all live sessions"""
+    try:
+        return jsonify({
+            'success': True,
+            'stats': transcription_manager.get_pool_stats()
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @app.route('/api/sessions/<session_id>/start', methods=['POST'])
 def start_session(session_id):
     """Start a transcription session"""
@@ -322,9 +346,14 @@ def handle_join_session(data):
         session_id = data.get('session_id')
         if session_id:
             join_room(f"session_{session_id}")
+            
+            # Streaming clients list the formats they can send, most preferred first;
+            # joining without a list keeps the session's current format
+            audio_format = transcription_manager.negotiate_audio_format(session_id, data.get('audio_formats'))
             emit('joined_session', {
                 'session_id': session_id,
-                'message': f'Joined session {session_id}'
+                'message': f'Joined session {session_id}',
+                'audio_format': audio_format
             })
             print(f'Client {request.sid} joined session {session_id}')
         else:
@@ -350,13 +379,13 @@ def handle_join_shared_session(data):
                 })
                 print(f'Viewer {request.sid} joined shared session {session_id}')
                 
-                # Send current transcript to the viewer
-                transcript = transcription_manager.get_shared_session_transcript(session_id)
-                if transcript:
-                    emit('current_transcript', {
-                        'session_id': session_id,
-                        'transcript': transcript
-                    })
+                # Send the current transcript, or only what a reconnecting viewer missed
+                since = data.get('since')
+                state = transcription_manager.get_shared_session_transcript_state(session_id, since)
+                if state and since is not None:
+                    emit('transcript_segments', {'session_id': session_id, **state})
+                elif state and state['transcript']:
+                    emit('current_transcript', {'session_id': session_id, **state})
             else:
                 emit('error', {'message': 'Session not found or not shared'})
         else:
@@ -393,22 +422,21 @@ def handle_audio_chunk(data):
             emit('error', {'message': 'Session ID and audio data are required'})
             return
         
-        # Convert base64 audio data to bytes if needed
-        import base64
-        if isinstance(audio_data, str):
-            try:
-                audio_bytes = base64.b64decode(audio_data)
-                print(f"Processed audio chunk for session {session_id}: {len(audio_bytes)} bytes")
-            except Exception as decode_error:
-                print(f"Error decoding base64 audio: {decode_error}")
-                emit('error', {'message': f'Error decoding audio data: {str(decode_error)}'})
-                return
-        else:
-            audio_bytes = bytes(audio_data)
-            print(f"Using raw audio bytes length: {len(audio_bytes)}")
+        # Binary frames (with a seq/format header), raw bytes, or base64 from older clients
+        try:
+            frame = decode_audio_message(data)
+        except ValueError as decode_error:
+            print(f"Error decoding audio chunk: {decode_error}")
+            emit('error', {'message': f'Error decoding audio data: {str(decode_error)}'})
+            return
+        
+        if frame.format and frame.format not in LIVE_AUDIO_FORMATS:
+            emit('error', {'message': f'Unsupported audio format: {frame.format}'})
+            return
+        print(f"Processed {frame.encoding} audio chunk for session {session_id}: {len(frame.payload)} bytes")
         
         # Add audio to session
-        success = transcription_manager.add_audio_to_session(session_id, audio_bytes)
+        success = transcription_manager.add_audio_to_session(session_id, frame.payload, frame.seq, frame.format)
         
         if not success:
             print(f"Failed to add audio to session {session_id}")
@@ -427,12 +455,14 @@ def handle_get_transcript(data):
             emit('error', {'message': 'Session ID is required'})
             return
         
-        transcript = transcription_manager.get_session_transcript(session_id)
-        if transcript is not None:
-            emit('current_transcript', {
-                'session_id': session_id,
-                'transcript': transcript
-            })
+        # With since=<seq>, send only the segments committed after it
+        since = data.get('since')
+        state = transcription_manager.get_session_transcript_state(session_id, since)
+        if state is not None:
+            if since is not None:
+                emit('transcript_segments', {'session_id': session_id, **state})
+            else:
+                emit('current_transcript', {'session_id': session_id, **state})
         else:
             emit('error', {'message': 'Session not found'})
             
@@ -0,0 +1,169 @@
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Hashable
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Worker threads shared by all live sessions (also the cap on concurrent live model calls)
+LIVE_POOL_WORKERS = int(os.getenv("LIVE_POOL_WORKERS", "8"))
+
+class _Task:
+    __slots__ = ('fn', 'args', 'kwargs', 'queued_at')
+
+    def __init__(self, fn: Callable, args: tuple, kwargs: dict):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.queued_at = time.monotonic()
+
+class FairSessionScheduler:
+    """
+    Runs work for many live sessions on a fixed set of worker threads.
+
+    Tasks are queued per key (e.g. a session id). Keys take turns round-robin, so a session
+    with a long backlog gets one task run per turn and cannot starve the others. Tasks
+    under the same key start in submission order, and by default run one at a time;
+    set_limit() lets a key have several tasks running at once.
+    """
+
+    def __init__(self, max_workers: int = LIVE_POOL_WORKERS, name: str = "live-transcription"):
+        self.max_workers = max(1, max_workers)
+        self._tasks: Dict[Hashable, Deque[_Task]] = {}
+        self._ready: Deque[Hashable] = deque()  # keys with queued tasks and a free slot
+        self._in_ready = set()
+        self._running: Dict[Hashable, int] = {}
+        self._limits: Dict[Hashable, int] = {}
+        self._condition = threading.Condition()
+        self._shutdown = False
+
+        # Utilization metrics
+        self._started_at = time.monotonic()
+        self._busy_workers = 0
+        self._busy_seconds = 0.0
+        self._tasks_completed = 0
+        self._tasks_failed = 0
+        self._total_wait_seconds = 0.0
+        self._max_wait_seconds = 0.0
+
+        self._workers = []
+        for i in range(self.max_workers):
+            worker = threading.Thread(target=self._worker_loop, name=f"{name}-{i}")
+            worker.daemon = True
+            worker.start()
+            self._workers.append(worker)
+
+    def set_limit(self, key: Hashable, max_in_flight: int):
+        """Allow up to max_in_flight tasks under key to run at the same time"""
+        with self._condition:
+            self._limits[key] = max(1, max_in_flight)
+            self._mark_ready(key)
+
+    def clear_limit(self, key: Hashable):
+        """Forget a key's limit (it goes back to one task at a time)"""
+        with self._condition:
+            self._limits.pop(key, None)
+
+    def submit(self, key: Hashable, fn: Callable, *args, **kwargs):
+        """Queue fn(*args, **kwargs) to run under key"""
+        with self._condition:
+            if self._shutdown:
+                raise RuntimeError("Scheduler has been shut down")
+            self._tasks.setdefault(key, deque()).append(_Task(fn, args, kwargs))
+            self._mark_ready(key)
+
+    def pending(self, key: Hashable) -> int:
+        """Number of tasks queued (not yet running) under key"""
+        with self._condition:
+            return len(self._tasks.get(key, ()))
+
+    def _mark_ready(self, key: Hashable):
+        """Put key at the back of the ready line if it has work and a free slot (caller holds the lock)"""
+        if (key not in self._in_ready and self._tasks.get(key)
+                and self._running.get(key, 0) < self._limits.get(key, 1)):
+            self._ready.append(key)
+            self._in_ready.add(key)
+            self._condition.notify()
+
+    def _next_task(self):
+        """Block until a key is ready and take one task from it (None on shutdown)"""
+        with self._condition:
+            while not self._ready and not self._shutdown:
+                self._condition.wait()
+            if not self._ready:
+                return None, None
+
+            key = self._ready.popleft()
+            self._in_ready.discard(key)
+            task = self._tasks[key].popleft()
+            self._running[key] = self._running.get(key, 0) + 1
+            self._busy_workers += 1
+
+            wait = time.monotonic() - task.queued_at
+            self._total_wait_seconds += wait
+            self._max_wait_seconds = max(self._max_wait_seconds, wait)
+
+            # A key with spare slots rejoins at the back: every other ready key gets a turn first
+            self._mark_ready(key)
+            return key, task
+
+    def _task_done(self, key: Hashable, busy_seconds: float, failed: bool):
+        with self._condition:
+            self._running[key] -= 1
+            if not self._running[key]:
+                del self._running[key]
+            self._busy_workers -= 1
+            self._busy_seconds += busy_seconds
+            if failed:
+                self._tasks_failed += 1
+            else:
+                self._tasks_completed += 1
+
+            if self._tasks.get(key):
+                self._mark_ready(key)
+            else:
+                self._tasks.pop(key, None)
+
+    def _worker_loop(self):
+        while True:
+            key, task = self._next_task()
+            if task is None:
+                return
+
+            started = time.monotonic()
+            failed = False
+            try:
+                task.fn(*task.args, **task.kwargs)
+            except Exception as e:
+                failed = True
+                print(f"Error in live transcription task for {key}: {e}")
+            finally:
+                self._task_done(key, time.monotonic() - started, failed)
+
+    def get_stats(self) -> dict:
+        """Pool size, current load and cumulative utilization"""
+        with self._condition:
+            elapsed = max(time.monotonic() - self._started_at, 1e-9)
+            finished = self._tasks_completed + self._tasks_failed
+            return {
+                'workers': self.max_workers,
+                'busy_workers': self._busy_workers,
+                'queued_tasks': sum(len(tasks) for tasks in self._tasks.values()),
+                'sessions_waiting': len(self._ready),
+                'tasks_completed': self._tasks_completed,
+                'tasks_failed': self._tasks_failed,
+                'utilization': round(self._busy_seconds / (elapsed * self.max_workers), 3),
+                'avg_queue_wait_ms': round(self._total_wait_seconds / finished * 1000, 1) if finished else 0.0,
+                'max_queue_wait_ms': round(self._max_wait_seconds * 1000, 1),
+            }
+
+    def shutdown(self, wait: bool = True):
+        """Stop the workers once the queued tasks have run"""
+        with self._condition:
+            self._shutdown = True
+            self._condition.notify_all()
+        if wait:
+            for worker in self._workers:
+                worker.join()
@@ -1,110 +1,141 @@
 import asyncio
 import json
-import uuid
+import math
 import time
 import tempfile
 import os
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
 from google import genai
 from google.genai.types import GenerateContentConfig, Part, HttpOptions
-from google.cloud import storage
 from flask_socketio import SocketIO, emit
 import threading
 import queue
+import collections
 import io
 import wave
 from dotenv import load_dotenv
+from gcs_storage import upload_audio_to_gcs, delete_from_gcs
+from vad import LIVE_VAD_ENABLED, contains_speech
+from segmenter import SpeechSegment, UtteranceSegmenter, merge_segments, strip_overlap
+from segment_store import SegmentStore, TranscriptSegment, format_offset
+from live_scheduler import FairSessionScheduler, LIVE_POOL_WORKERS
+from audio_codecs import PCM_FORMAT, decode_to_pcm, negotiate_format
+from recording import LIVE_RECORDING_DIR, LIVE_RECORDING_ENABLED, RecordingWriter
+from transcript_publisher import TranscriptPublisher
+from session_store import SessionStore, get_session_store
+from cluster import new_session_id, owns_session
+from backpressure import (
+    BACKPRESSURE_OK, BackpressureGauge, LIVE_AUDIO_QUEUE_MAX_CHUNKS, LIVE_BACKPRESSURE_POLICY, LIVE_BLOCK_TIMEOUT_SECONDS,
+    LIVE_MAX_BACKLOG_SECONDS, LIVE_MERGE_MAX_SECONDS, LIVE_MODEL_CALL_SECONDS
+)
 
 load_dotenv()
 
-def upload_audio_to_gcs(audio_data: bytes, project_id: str, file_extension: str = ".wav") -> str:
-    """
-    Uploads audio data to Google Cloud Storage and returns the gs:// URI.
-    
-    Args:
-        audio_data: Raw audio data as bytes
-        project_id: Google Cloud Project ID
-        file_extension: File extension for the audio file
-        
-    Returns:
-        The gs:// URI of the uploaded file
-    """
-    # Create a unique bucket name for this project if it doesn't exist
-    bucket_name = f"{project_id}-transcriber-temp"
-    
-    # Initialize the storage client
-    storage_client = storage.Client(project=project_id)
-    
-    try:
-        # Try to get the bucket, create if it doesn't exist
-        try:
-            bucket = storage_client.bucket(bucket_name)
-            bucket.reload()  # Check if bucket exists
-        except Exception:
-            # Create bucket if it doesn't exist
-            bucket = storage_client.create_bucket(bucket_name)
-            print(f"Created bucket: {bucket_name}")
-    except Exception as e:
-        print(f"Error with bucket {bucket_name}: {e}")
-        # Fallback to a more unique bucket name
-        bucket_name = f"{project_id}-transcriber-{uuid.uuid4().hex[:8]}"
-        bucket = storage_client.create_bucket(bucket_name)
-        print(f"Created fallback bucket: {bucket_name}")
-    
-    # Generate a unique object name
-    object_name = f"live-audio-{uuid.uuid4().hex}{file_extension}"
-    
-    # Upload the file
-    blob = bucket.blob(object_name)
-    blob.upload_from_string(audio_data)
-    
-    gs_uri = f"gs://{bucket_name}/{object_name}"
-    print(f"Live audio uploaded to: {gs_uri}")
-    
-    return gs_uri
+# How live chunks reach Gemini: "inline" sends the WAV bytes in the request,
+# "gcs" always uploads them to Cloud Storage and references the gs:// URI
+LIVE_AUDIO_TRANSPORT = os.getenv("LIVE_AUDIO_TRANSPORT", "inline").lower()
 
-def delete_from_gcs(gs_uri: str, project_id: str):
-    """
-    Deletes a file from Google Cloud Storage.
-    
-    Args:
-        gs_uri: The gs:// URI of the file to delete
-        project_id: Google Cloud Project ID
-    """
-    try:
-        # Parse the gs:// URI
-        if not gs_uri.startswith("gs://"):
-            return
-            
-        uri_parts = gs_uri[5:].split("/", 1)  # Remove gs:// and split
-        bucket_name = uri_parts[0]
-        object_name = uri_parts[1]
-        
-        storage_client = storage.Client(project=project_id)
-        bucket = storage_client.bucket(bucket_name)
-        blob = bucket.blob(object_name)
-        blob.delete()
-        
-        print(f"Deleted live audio file: {gs_uri}")
-    except Exception as e:
-        print(f"Warning: Could not delete live audio file {gs_uri}: {e}")
+# Inline chunks larger than this fall back to a GCS upload (Gemini caps inline requests at 20MB)
+LIVE_INLINE_MAX_BYTES = int(os.getenv("LIVE_INLINE_MAX_BYTES", str(8 * 1024 * 1024)))
+
+# Segment transcriptions a session may have outstanding at once; results are still
+# committed to the transcript in segment order (1 transcribes strictly one at a time)
+LIVE_MAX_IN_FLIGHT = int(os.getenv("LIVE_MAX_IN_FLIGHT", "3"))
+
+# Buffered live audio is transcribed once no new audio has arrived for this long
+LIVE_IDLE_FLUSH_SECONDS = float(os.getenv("LIVE_IDLE_FLUSH_SECONDS", "1.0"))
+
+# Read-only copies of sessions another worker owns are reused for this long before
+# their new segments are read from the session store
+LIVE_REMOTE_SESSION_TTL_SECONDS = float(os.getenv("LIVE_REMOTE_SESSION_TTL_SECONDS", "1.0"))
+
+class TranscriptionResult(NamedTuple):
+    """What the model returned for one segment"""
+    text: str
+    latency: float  # seconds spent in generate_content
+    confidence: Optional[float]  # exp(avg_logprobs) when the model reports it
 
 class LiveTranscriptionSession:
     """Manages a live transcription session"""
     
-    def __init__(self, session_id: str):
+    def __init__(self, session_id: str, scheduler: FairSessionScheduler,
+                 on_transcript: Optional[Callable[[dict], None]] = None,
+                 on_backpressure: Optional[Callable[[dict], None]] = None, read_only: bool = False):
         self.session_id = session_id
+        self.scheduler = scheduler
+        self.on_transcript = on_transcript  # called with each update as it is committed
+        self.on_backpressure = on_backpressure  # called when clients should slow down, pause or resume
         self.created_at = datetime.now()
         self.is_active = False
-        self.transcript_buffer = ""
-        self.audio_queue = queue.Queue()
-        self.transcript_queue = queue.Queue()
-        self.processing_thread = None
+        self.segments = SegmentStore()  # committed transcript, with audio offsets and seq ids
+        self.audio_queue = queue.Queue(maxsize=LIVE_AUDIO_QUEUE_MAX_CHUNKS)  # (bytes, format) as received
         self.last_activity = datetime.now()
-        self.complete_audio_buffer = io.BytesIO()  # Store complete raw audio
+        self.last_audio_at = time.monotonic()
+        self.segmenter = UtteranceSegmenter()
+        self.pending_segments = queue.Queue()  # closed segments waiting for a model call
+        self._pump_scheduled = False
+        self._flush_scheduled = False
+        self._pump_lock = threading.Lock()
+        self._drained = threading.Event()
+        self._finishing = False
+        
+        # Bounded queues: what happens when the model falls behind, and what clients were last told
+        self.backpressure_policy = LIVE_BACKPRESSURE_POLICY
+        self.max_backlog_seconds = LIVE_MAX_BACKLOG_SECONDS
+        self.merge_max_seconds = LIVE_MERGE_MAX_SECONDS
+        self.model_call_seconds = LIVE_MODEL_CALL_SECONDS  # moving average of this session's model calls
+        self.backpressure = BackpressureGauge()
+        self._backpressure_lock = threading.Lock()
+        self.chunks_dropped = 0
+        self.chunks_merged = 0
+        self.segments_dropped = 0
+        self.segments_merged = 0
+        self.audio_seconds_dropped = 0.0
+        
+        # Lag: how far committed results trail the audio received, and how long segments wait
+        self.transcribed_until = 0.0  # audio offset (s) every result up to which has been committed
+        self.commit_delay = None  # seconds from a segment closing to its result being committed
+        self.max_commit_delay = 0.0
+        
+        # Pipelined transcription: segments get sequence numbers when dispatched, and results
+        # wait in _completed until every earlier segment has been committed
+        self.max_in_flight = LIVE_MAX_IN_FLIGHT
+        self.transcribe_key = f"{session_id}:transcribe"
+        if not read_only:  # a copy of another worker's session never transcribes
+            self.scheduler.set_limit(self.transcribe_key, self.max_in_flight)
+        self._next_segment_seq = 0
+        self._next_commit_seq = 0
+        self._in_flight = 0
+        self._completed: Dict[int, Tuple[SpeechSegment, Optional[TranscriptionResult]]] = {}
+        self._commit_lock = threading.Lock()
+        # Committed updates waiting for on_transcript, which runs outside _commit_lock (it does I/O)
+        self._outbox: List[dict] = []
+        self._delivering = False
+        self.recording_enabled = LIVE_RECORDING_ENABLED
+        self.recording: Optional[RecordingWriter] = None  # complete raw audio, streamed to disk
         self.is_shared = False  # New: Track if session is shared
         self.title = f"Session {session_id[:8]}..."  # New: Session title for sharing
+        self.audio_transport = LIVE_AUDIO_TRANSPORT
+        self.inline_max_bytes = LIVE_INLINE_MAX_BYTES
+        self.vad_enabled = LIVE_VAD_ENABLED
+        self.input_format = PCM_FORMAT  # negotiated at join_session
+        self.last_transcript_text = ""
+        
+        # Client frame sequence tracking (binary frames carry a seq; base64 clients may not)
+        self.last_frame_seq = None
+        self.frames_missing = 0
+        self.frames_duplicated = 0
+        
+        # Bytes received from the client vs. PCM they decoded to
+        self.bytes_received = 0
+        self.pcm_bytes_decoded = 0
+        self.chunks_failed_decode = 0
+        
+        # Per-session counters for model calls made and skipped
+        self.chunks_transcribed = 0
+        self.chunks_skipped_by_vad = 0
+        self.audio_seconds_skipped = 0.0
         
         # Vertex AI setup
         self.project_id = os.getenv("GOOGLE_CLOUD_PROJECT")
@@ -122,103 +153,368 @@ class LiveTranscriptionSession:
         self.genai_client = genai.Client(http_options=HttpOptions(api_version="v1"))
         
     def start_processing(self):
-        """Start the audio processing thread"""
-        if not self.processing_thread or not self.processing_thread.is_alive():
+        """Start accepting audio; segments are transcribed on the manager's shared worker pool"""
+        if not self.is_active:
             self.is_active = True
-            self.complete_audio_buffer = io.BytesIO()  # Reset buffer
-            self.processing_thread = threading.Thread(target=self._process_audio_stream)
-            self.processing_thread.daemon = True
-            self.processing_thread.start()
+            self._open_recording()
+            # Audio offsets continue where the previous run stopped
+            self.segmenter = UtteranceSegmenter(start_sample=self.segmenter.position)
+            self._finishing = False
+            self._drained.clear()
     
     def stop_processing(self):
         """Stop the audio processing"""
+        was_active = self.is_active
         self.is_active = False
-        if self.processing_thread:
-            self.processing_thread.join(timeout=5)
+        if was_active:
+            # Runs after any queued work for this session, then transcribes what is left
+            self.scheduler.submit(self.session_id, self._finish_stream)
+            self._drained.wait(timeout=5)
         
         # Save complete raw recording
-        self._save_complete_raw_recording()
+        self._close_recording()
+        
+        if self.chunks_skipped_by_vad:
+            print(f"Session {self.session_id}: VAD skipped {self.chunks_skipped_by_vad} of "
+                  f"{self.chunks_skipped_by_vad + self.chunks_transcribed} model calls")
     
-    def add_audio_chunk(self, audio_data: bytes):
-        """Add audio chunk to processing queue"""
+    def add_audio_chunk(self, audio_data: bytes, seq: Optional[int] = None, format: Optional[str] = None):
+        """
+        Add audio chunk to processing queue (chunks re-sent with an already seen seq are dropped).
+        
+        Compressed chunks are queued as they are and decoded on the worker pool, not on the
+        socket thread. format defaults to the one negotiated at join_session.
+        """
         self.last_activity = datetime.now()
         if self.is_active:
-            print(f"Adding audio chunk to session {self.session_id}: {len(audio_data)} bytes")
+            if seq is not None:
+                # A client (re)joining starts again from 0
+                if seq == 0:
+                    self.last_frame_seq = None
+                if self.last_frame_seq is not None and seq <= self.last_frame_seq:
+                    self.frames_duplicated += 1
+                    print(f"Dropped duplicate audio frame {seq} for session {self.session_id}")
+                    return
+                if self.last_frame_seq is not None and seq > self.last_frame_seq + 1:
+                    self.frames_missing += seq - self.last_frame_seq - 1
+                    print(f"Audio frames {self.last_frame_seq + 1}-{seq - 1} missing for session {self.session_id}")
+                self.last_frame_seq = seq
             
-            # Add to complete buffer
-            self.complete_audio_buffer.write(audio_data)
+            print(f"Adding audio chunk to session {self.session_id}: {len(audio_data)} bytes")
             
-            self.audio_queue.put(audio_data)
+            self.bytes_received += len(audio_data)
+            if not self._enqueue_audio((audio_data, format or self.input_format)):
+                return
+            self.last_audio_at = time.monotonic()
+            self._schedule_pump()
+            self._check_backpressure()
+    
+    def _enqueue_audio(self, chunk: Tuple[bytes, str]) -> bool:
+        """
+        Queue a received chunk within the audio_queue bound, applying the backpressure policy
+        when it is full. Returns False if the chunk itself was dropped.
+        """
+        if self.backpressure_policy == "block":
+            # Holds up this client's socket handler, which in turn slows the client down
+            try:
+                self.audio_queue.put(chunk, timeout=LIVE_BLOCK_TIMEOUT_SECONDS)
+                return True
+            except queue.Full:
+                self._record_dropped_chunk(chunk)
+                print(f"Audio queue full for session {self.session_id}, dropped chunk")
+                return False
+        
+        while True:
+            try:
+                self.audio_queue.put_nowait(chunk)
+                return True
+            except queue.Full:
+                pass
+            with self.audio_queue.mutex:
+                if self.backpressure_policy == "merge" and self._merge_queued_audio():
+                    continue
+                dropped = self.audio_queue.queue.popleft() if self.audio_queue.queue else None
+            if dropped:
+                self._record_dropped_chunk(dropped)
+                print(f"Audio queue full for session {self.session_id}, dropped oldest chunk")
     
-    def _save_complete_raw_recording(self):
-        """Save complete raw recording when session stops"""
+    def _merge_queued_audio(self) -> bool:
+        """Join consecutive queued PCM chunks to make room (caller holds audio_queue.mutex)"""
+        max_bytes = int(self.merge_max_seconds * 16000 * 2)
+        waiting = self.audio_queue.queue
+        merged = collections.deque()
+        for data, format in waiting:
+            if (merged and format == PCM_FORMAT and merged[-1][1] == PCM_FORMAT
+                    and len(merged[-1][0]) + len(data) <= max_bytes):
+                merged[-1] = (merged[-1][0] + data, format)
+            else:
+                merged.append((data, format))
+        if len(merged) == len(waiting):
+            return False
+        self.chunks_merged += len(waiting) - len(merged)
+        waiting.clear()
+        waiting.extend(merged)
+        return True
+    
+    def _record_dropped_chunk(self, chunk: Tuple[bytes, str]):
+        data, format = chunk
+        self.chunks_dropped += 1
+        if format == PCM_FORMAT:
+            self.audio_seconds_dropped += len(data) / (16000 * 2)
+    
+    def _open_recording(self):
+        """Start streaming the complete recording to disk"""
+        self.recording = None
+        if not self.recording_enabled:
+            return
         try:
-            audio_data = self.complete_audio_buffer.getvalue()
-            if len(audio_data) == 0:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            self.recording = RecordingWriter(os.path.join(LIVE_RECORDING_DIR, f"complete_raw_{self.session_id}_{timestamp}.wav"))
+        except Exception as e:
+            print(f"Error opening complete raw recording: {e}")
+    
+    def _close_recording(self):
+        """Finish the complete recording when session stops"""
+        if not self.recording:
+            return
+        try:
+            path = self.recording.close()
+            if path:
+                print(f"Saved complete raw recording: {path} ({self.recording.bytes_written} bytes, {self.recording.duration:.1f}s)")
+            else:
                 print("No audio data to save")
+        except Exception as e:
+            print(f"Error saving complete raw recording: {e}")
+    
+    def _schedule_pump(self):
+        """Queue one processing turn on the shared pool unless one is already waiting"""
+        with self._pump_lock:
+            if self._pump_scheduled:
+                return
+            self._pump_scheduled = True
+        self.scheduler.submit(self.session_id, self._pump_audio)
+    
+    def _drain_audio_queue(self, force: bool = False):
+        """
+        Decode queued chunks, feed them to the segmenter and queue every segment it closes.
+        
+        With the "block" policy, chunks stay queued while the segment backlog is full (unless
+        force), so a slow model eventually holds up the client sending them.
+        """
+        while True:
+            if (not force and self.backpressure_policy == "block"
+                    and self.backlog_seconds >= self.max_backlog_seconds):
+                return
+            try:
+                chunk, format = self.audio_queue.get_nowait()
+            except queue.Empty:
                 return
             
-            # Create debug directory if it doesn't exist
-            debug_dir = "debug_audio"
-            os.makedirs(debug_dir, exist_ok=True)
-            
-            # Create filename with timestamp
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            
-            # Save raw PCM data
-            pcm_filename = f"{debug_dir}/complete_raw_{self.session_id}_{timestamp}.pcm"
-            with open(pcm_filename, 'wb') as f:
-                f.write(audio_data)
+            try:
+                pcm = decode_to_pcm(chunk, format)
+            except ValueError as e:
+                self.chunks_failed_decode += 1
+                print(f"Dropped audio chunk for session {self.session_id}: {e}")
+                continue
+            self.pcm_bytes_decoded += len(pcm)
             
-            # Also create a proper WAV file for easier testing
-            wav_filename = f"{debug_dir}/complete_raw_{self.session_id}_{timestamp}.wav"
-            audio_file = io.BytesIO()
-            with wave.open(audio_file, 'wb') as wav_file:
-                wav_file.setnchannels(1)  # Mono
-                wav_file.setsampwidth(2)  # 16-bit
-                wav_file.setframerate(16000)  # 16kHz
-                wav_file.writeframes(audio_data)
+            # Add to complete recording
+            if self.recording:
+                self.recording.write(pcm)
             
-            with open(wav_filename, 'wb') as f:
-                f.write(audio_file.getvalue())
+            for segment in self.segmenter.add(pcm):
+                self.pending_segments.put(segment)
+            self._enforce_backlog()
+    
+    @property
+    def backlog_seconds(self) -> float:
+        """Seconds of segmented audio waiting for a model call"""
+        with self.pending_segments.mutex:
+            return sum(segment.duration for segment in self.pending_segments.queue)
+    
+    @property
+    def queued_audio_seconds(self) -> float:
+        """Seconds of received PCM not yet segmented (compressed chunks aren't counted until decoded)"""
+        with self.audio_queue.mutex:
+            return sum(len(data) for data, format in self.audio_queue.queue if format == PCM_FORMAT) / (16000 * 2)
+    
+    @property
+    def lag_seconds(self) -> float:
+        """How far the committed transcript trails the audio received so far"""
+        received = self.segmenter.position / 16000 + self.queued_audio_seconds
+        return max(0.0, received - self.transcribed_until)
+    
+    def _calls_backlog_seconds(self, segment_count: int) -> float:
+        """Estimated time to transcribe segment_count waiting segments, max_in_flight at a time"""
+        return segment_count * self.model_call_seconds / max(1, self.max_in_flight)
+    
+    def _enforce_backlog(self):
+        """
+        Keep the segments waiting for a model call within max_backlog_seconds ("merge" and "drop_oldest").
+        
+        "drop_oldest" counts seconds of waiting audio. "merge" counts the estimated time of the
+        model calls they need, which is what merging reduces: when that is over the limit the
+        waiting segments are joined into calls of up to merge_max_seconds, and audio is only
+        dropped if the merged calls would still take too long.
+        """
+        if self.backpressure_policy == "block":
+            return
+        with self.pending_segments.mutex:
+            waiting = self.pending_segments.queue
+            if self.backpressure_policy == "merge":
+                if self._calls_backlog_seconds(len(waiting)) <= self.max_backlog_seconds:
+                    return
+                # Fewer, longer model calls let the session catch up
+                merged = collections.deque()
+                for segment in waiting:
+                    if merged and merged[-1].duration + segment.duration <= self.merge_max_seconds:
+                        merged[-1] = merge_segments(merged[-1], segment)
+                        self.segments_merged += 1
+                    else:
+                        merged.append(segment)
+                waiting.clear()
+                waiting.extend(merged)
+                over_limit = lambda: self._calls_backlog_seconds(len(waiting)) > self.max_backlog_seconds
+            else:
+                over_limit = lambda: sum(segment.duration for segment in waiting) > self.max_backlog_seconds
             
-            duration = len(audio_data) / (16000 * 2)  # 16000 Hz, 16-bit (2 bytes)
-            print(f"Saved complete raw recording: {pcm_filename} and {wav_filename} ({len(audio_data)} bytes, {duration:.1f}s)")
+            # Still too far behind: give up on the oldest audio (always keeping the newest segment)
+            while len(waiting) > 1 and over_limit():
+                dropped = waiting.popleft()
+                self.segments_dropped += 1
+                self.audio_seconds_dropped += dropped.duration
+                print(f"Session {self.session_id} is too far behind, dropped {dropped.duration:.1f}s of audio")
+    
+    def _check_backpressure(self):
+        """Tell the client to slow down, pause or resume when the queues cross a watermark"""
+        # Lag rather than backlog alone, so merging or dropping queued audio doesn't signal
+        # "resume" before the results have actually caught up
+        fill = max(self.audio_queue.qsize() / self.audio_queue.maxsize if self.audio_queue.maxsize else 0,
+                   self.lag_seconds / self.max_backlog_seconds if self.max_backlog_seconds else 0)
+        with self._backpressure_lock:
+            changed = self.backpressure.update(fill)
+        if changed and self.on_backpressure:
+            self.on_backpressure(self.get_backpressure_info())
+    
+    def get_backpressure_info(self) -> dict:
+        """The backpressure state sent to clients, with the lag that caused it"""
+        return {
+            'session_id': self.session_id,
+            'state': self.backpressure.state,
+            'policy': self.backpressure_policy,
+            'lag_seconds': round(self.lag_seconds, 2),
+            'backlog_seconds': round(self.backlog_seconds, 2),
+            'queued_chunks': self.audio_queue.qsize()
+        }
+    
+    def _pump_audio(self):
+        """
+        One turn on the shared pool: segment newly arrived audio and dispatch closed segments
+        for transcription, keeping at most max_in_flight model calls outstanding.
+        """
+        with self._pump_lock:
+            self._pump_scheduled = False
+        
+        self._drain_audio_queue()
+        self._dispatch_segments()
+        self._check_backpressure()
+    
+    def _dispatch_segments(self):
+        """Send pending segments to the model while there is room in the pipeline"""
+        while True:
+            with self._commit_lock:
+                if self._in_flight >= self.max_in_flight or self.pending_segments.empty():
+                    return
+                segment = self.pending_segments.get_nowait()
+                seq = self._next_segment_seq
+                self._next_segment_seq += 1
+                self._in_flight += 1
+            self.scheduler.submit(self.transcribe_key, self._transcribe_segment, seq, segment)
+    
+    def _transcribe_segment(self, seq: int, segment: SpeechSegment):
+        """Transcribe one segment, then commit every result that is now in order"""
+        result = None
+        try:
+            result = self._transcribe_buffer(segment.pcm)
+        finally:
+            with self._commit_lock:
+                if result is not None:
+                    self.model_call_seconds += 0.2 * (result.latency - self.model_call_seconds)
+                self._completed[seq] = (segment, result)
+                while self._next_commit_seq in self._completed:
+                    committed_segment, committed_result = self._completed.pop(self._next_commit_seq)
+                    self._commit_transcript(committed_segment, committed_result)
+                    self._next_commit_seq += 1
+                    self.transcribed_until = max(self.transcribed_until, committed_segment.end_seconds)
+                    self.commit_delay = time.monotonic() - committed_segment.closed_at
+                    self.max_commit_delay = max(self.max_commit_delay, self.commit_delay)
+                self._in_flight -= 1
+                finished = self._finishing and self._in_flight == 0 and self.pending_segments.empty()
             
-        except Exception as e:
-            print(f"Error saving complete raw recording: {e}")
+            self._deliver_committed()
+            if finished:
+                self._drained.set()
+            elif not self.pending_segments.empty() or not self.audio_queue.empty():
+                self._schedule_pump()
+            else:
+                self._check_backpressure()
+    
+    def flush_if_idle(self, idle_seconds: float = LIVE_IDLE_FLUSH_SECONDS):
+        """Close the buffered segment when the client has gone quiet (called periodically by the manager)"""
+        if (self.is_active and not self._flush_scheduled and self.segmenter.has_new_audio
+                and time.monotonic() - self.last_audio_at >= idle_seconds):
+            self._flush_scheduled = True
+            self.scheduler.submit(self.session_id, self._flush_segmenter)
     
-    def _process_audio_stream(self):
-        """Process audio chunks and generate transcriptions"""
-        audio_buffer = io.BytesIO()
+    def _flush_segmenter(self):
+        """No audio arriving: transcribe what has been buffered so far"""
+        self._flush_scheduled = False
+        if self.audio_queue.empty() and time.monotonic() - self.last_audio_at >= LIVE_IDLE_FLUSH_SECONDS:
+            segment = self.segmenter.flush()
+            if segment:
+                self.pending_segments.put(segment)
+                self._schedule_pump()
+    
+    def _finish_stream(self):
+        """Don't lose the last words when the session stops"""
+        try:
+            self._drain_audio_queue(force=True)
+            segment = self.segmenter.flush()
+            if segment:
+                self.pending_segments.put(segment)
+        except Exception as e:
+            print(f"Error flushing remaining audio: {e}")
         
-        while self.is_active:
-            try:
-                # Get audio chunk with timeout
-                try:
-                    chunk = self.audio_queue.get(timeout=1.0)
-                    audio_buffer.write(chunk)
-                    
-                    # Process when we have enough audio (e.g., 3 seconds worth)
-                    if audio_buffer.tell() >= 48000 * 2 * 3:  # 3 seconds at 16kHz, 16-bit
-                        self._transcribe_buffer(audio_buffer.getvalue())
-                        audio_buffer = io.BytesIO()  # Reset buffer
-                        
-                except queue.Empty:
-                    # Process remaining buffer if we have data
-                    if audio_buffer.tell() > 0:
-                        self._transcribe_buffer(audio_buffer.getvalue())
-                        audio_buffer = io.BytesIO()
-                    continue
-                    
-            except Exception as e:
-                print(f"Error in audio processing: {e}")
-                break
+        # The last in-flight transcription to commit sets _drained
+        with self._commit_lock:
+            self._finishing = True
+            idle = self._in_flight == 0 and self.pending_segments.empty()
+        if idle:
+            self._drained.set()
+        else:
+            self._dispatch_segments()
     
-    def _transcribe_buffer(self, audio_data: bytes):
-        """Transcribe audio buffer using Vertex AI and Google Cloud Storage"""
+    def _transcribe_buffer(self, audio_data: bytes) -> Optional[TranscriptionResult]:
+        """
+        Transcribe audio buffer using Vertex AI (inline bytes or Google Cloud Storage).
+        
+        Safe to run for several segments at once; the result is committed separately.
+        
+        Returns:
+            The transcription with its latency and confidence, or None when there was no usable speech
+        """
         gs_uri = None
         try:
+            # Drop buffers without speech before paying for a model call
+            if self.vad_enabled and not contains_speech(audio_data):
+                with self._commit_lock:
+                    self.chunks_skipped_by_vad += 1
+                    self.audio_seconds_skipped += len(audio_data) / (16000 * 2)
+                print(f"Skipped silent audio buffer: {len(audio_data)} bytes ({self.chunks_skipped_by_vad} call(s) saved)")
+                return None
+            
+            with self._commit_lock:
+                self.chunks_transcribed += 1
             print(f"Transcribing raw PCM audio buffer: {len(audio_data)} bytes")
             
             # The audio_data is now raw 16-bit PCM data from Web Audio API
@@ -235,10 +531,8 @@ class LiveTranscriptionSession:
             # Get the complete WAV file data
             wav_data = audio_file.getvalue()
             
-            # Upload to Google Cloud Storage
-            gs_uri = upload_audio_to_gcs(wav_data, self.project_id, ".wav")
-            
-            print(f"Uploaded raw PCM audio to GCS: {gs_uri}")
+            # Send inline when small enough, otherwise upload to Google Cloud Storage
+            audio_part, gs_uri = self._build_audio_part(wav_data)
             
             # Generate transcription using Vertex AI with improved prompt
             prompt = """Please transcribe this audio accurately. IMPORTANT RULES:
@@ -253,44 +547,36 @@ class LiveTranscriptionSession:
 
 Transcribe the audio:"""
             
+            started = time.perf_counter()
             response = self.genai_client.models.generate_content(
                 model="gemini-2.5-flash-preview-05-20",
                 contents=[
                     prompt,
-                    Part.from_uri(file_uri=gs_uri, mime_type="audio/wav")
+                    audio_part
                 ],
                 config=GenerateContentConfig(audio_timestamp=True),
             )
             
+            latency = time.perf_counter() - started
+            
             # Clean up the uploaded file
-            delete_from_gcs(gs_uri, self.project_id)
+            if gs_uri:
+                delete_from_gcs(gs_uri, self.project_id)
             
             if response.candidates and response.candidates[0].content.parts:
-                transcript_chunk = response.candidates[0].content.parts[0].text.strip()
-                
-                # Additional filtering to avoid noise transcription
-                if transcript_chunk and self._is_valid_transcription(transcript_chunk):
-                    timestamp = datetime.now().strftime("%H:%M:%S")
-                    
-                    print(f"Transcribed: [{timestamp}] {transcript_chunk}")
-                    
-                    # Add to transcript buffer
-                    self.transcript_buffer += f"[{timestamp}] {transcript_chunk}\n"
-                    
-                    # Add to transcript queue for real-time updates
-                    self.transcript_queue.put({
-                        'timestamp': timestamp,
-                        'text': transcript_chunk,
-                        'session_id': self.session_id
-                    })
-                else:
-                    print("Skipped transcription: no valid speech content detected")
-            else:
-                print("No transcription result from Vertex AI")
-                if response.prompt_feedback:
-                    print(f"Prompt Feedback: {response.prompt_feedback}")
-                if response.candidates and response.candidates[0].finish_reason:
-                    print(f"Finish Reason: {response.candidates[0].finish_reason}")
+                avg_logprobs = getattr(response.candidates[0], 'avg_logprobs', None)
+                return TranscriptionResult(
+                    text=response.candidates[0].content.parts[0].text.strip(),
+                    latency=latency,
+                    confidence=math.exp(avg_logprobs) if avg_logprobs is not None else None
+                )
+            
+            print("No transcription result from Vertex AI")
+            if response.prompt_feedback:
+                print(f"Prompt Feedback: {response.prompt_feedback}")
+            if response.candidates and response.candidates[0].finish_reason:
+                print(f"Finish Reason: {response.candidates[0].finish_reason}")
+            return None
             
         except Exception as e:
             print(f"Error transcribing raw PCM audio with Vertex AI: {e}")
@@ -299,6 +585,65 @@ Transcribe the audio:"""
             # Clean up the uploaded file if it exists
             if gs_uri:
                 delete_from_gcs(gs_uri, self.project_id)
+            return None
+    
+    def _commit_transcript(self, segment: SpeechSegment, result: Optional[TranscriptionResult]):
+        """Append a segment's transcription to the transcript (called in segment order, under _commit_lock)"""
+        if result is None:
+            return
+        
+        # Segments overlap slightly, so drop words repeated from the previous segment
+        transcript_chunk = strip_overlap(self.last_transcript_text, result.text)
+        
+        # Additional filtering to avoid noise transcription
+        if transcript_chunk and self._is_valid_transcription(transcript_chunk):
+            self.last_transcript_text = transcript_chunk
+            
+            print(f"Transcribed: [{format_offset(segment.start_seconds)}] {transcript_chunk}")
+            
+            # Sequence ids are monotonic so clients can resume with since=<last seq seen>
+            committed = self.segments.append(
+                segment.start_seconds, segment.end_seconds, transcript_chunk,
+                latency=result.latency, confidence=result.confidence
+            )
+            
+            # Pushed to listeners by _deliver_committed once _commit_lock is released
+            if self.on_transcript:
+                self._outbox.append(committed.to_dict(self.session_id))
+        else:
+            print("Skipped transcription: no valid speech content detected")
+    
+    def _deliver_committed(self):
+        """
+        Hand committed updates to on_transcript in commit order, without holding _commit_lock.
+
+        Only one thread delivers at a time; a thread that finds another one delivering leaves
+        its updates in the outbox for it.
+        """
+        with self._commit_lock:
+            if self._delivering:
+                return
+            self._delivering = True
+        while True:
+            with self._commit_lock:
+                if not self._outbox:
+                    self._delivering = False
+                    return
+                updates, self._outbox = self._outbox, []
+            for update in updates:
+                try:
+                    self.on_transcript(update)
+                except Exception as e:
+                    print(f"Error delivering transcript update for session {self.session_id}: {e}")
+    
+    def _build_audio_part(self, wav_data: bytes):
+        """Build the audio Part for a chunk and return it with the gs:// URI (None when sent inline)"""
+        if self.audio_transport == "inline" and len(wav_data) <= self.inline_max_bytes:
+            return Part.from_bytes(data=wav_data, mime_type="audio/wav"), None
+        
+        gs_uri = upload_audio_to_gcs(wav_data, self.project_id, ".wav")
+        print(f"Uploaded raw PCM audio to GCS: {gs_uri}")
+        return Part.from_uri(file_uri=gs_uri, mime_type="audio/wav"), gs_uri
     
     def _is_valid_transcription(self, text: str) -> bool:
         """Check if the transcription contains valid speech content"""
@@ -337,19 +682,29 @@ Transcribe the audio:"""
         
         return True
     
-    def get_transcript_updates(self):
-        """Get new transcript updates"""
-        updates = []
-        while not self.transcript_queue.empty():
-            try:
-                updates.append(self.transcript_queue.get_nowait())
-            except queue.Empty:
-                break
-        return updates
-    
     def get_full_transcript(self):
-        """Get the complete transcript"""
-        return self.transcript_buffer
+        """Get the complete transcript (rendered on first use after a change, then cached)"""
+        return self.segments.render()
+    
+    @property
+    def last_seq(self) -> int:
+        """Sequence id of the latest committed segment (0 before the first)"""
+        return self.segments.last_seq
+    
+    def get_transcript_state(self, since: Optional[int] = None) -> dict:
+        """
+        Get the transcript with the seq it is current up to.
+        
+        Args:
+            since: When given, only segments with a seq above it are returned instead of the full text
+        """
+        with self._commit_lock:
+            if since is None:
+                return {'transcript': self.segments.render(), 'last_seq': self.last_seq}
+            return {
+                'segments': [segment.to_dict(self.session_id) for segment in self.segments.since(since)],
+                'last_seq': self.last_seq
+            }
     
     def enable_sharing(self):
         """Enable sharing for this session"""
@@ -361,6 +716,37 @@ Transcribe the audio:"""
         self.is_shared = False
         self.last_activity = datetime.now()
     
+    def get_stats(self):
+        """Get model-call statistics for this session"""
+        return {
+            'chunks_transcribed': self.chunks_transcribed,
+            'chunks_skipped_by_vad': self.chunks_skipped_by_vad,
+            'audio_seconds_skipped': round(self.audio_seconds_skipped, 1),
+            'vad_enabled': self.vad_enabled,
+            'max_in_flight': self.max_in_flight,
+            'segments_in_flight': self._in_flight,
+            'segments_pending': self.pending_segments.qsize(),
+            'input_format': self.input_format,
+            'bytes_received': self.bytes_received,
+            'compression_ratio': round(self.pcm_bytes_decoded / self.bytes_received, 2) if self.bytes_received else None,
+            'chunks_failed_decode': self.chunks_failed_decode,
+            'frames_missing': self.frames_missing,
+            'frames_duplicated': self.frames_duplicated,
+            'backpressure_policy': self.backpressure_policy,
+            'backpressure': self.backpressure.state,
+            'audio_queue_chunks': self.audio_queue.qsize(),
+            'backlog_seconds': round(self.backlog_seconds, 2),
+            'model_call_seconds': round(self.model_call_seconds, 2),
+            'lag_seconds': round(self.lag_seconds, 2),
+            'commit_delay_seconds': round(self.commit_delay, 2) if self.commit_delay is not None else None,
+            'max_commit_delay_seconds': round(self.max_commit_delay, 2),
+            'chunks_dropped': self.chunks_dropped,
+            'chunks_merged': self.chunks_merged,
+            'segments_dropped': self.segments_dropped,
+            'segments_merged': self.segments_merged,
+            'audio_seconds_dropped': round(self.audio_seconds_dropped, 1)
+        }
+    
     def get_share_info(self):
         """Get sharing information for this session"""
         return {
@@ -369,98 +755,296 @@ Transcribe the audio:"""
             'is_active': self.is_active,
             'title': self.title
         }
+    
+    def to_document(self) -> dict:
+        """The session fields kept in the session store (segments are stored separately)"""
+        return {
+            'created_at': self.created_at.isoformat(),
+            'title': self.title,
+            'is_shared': self.is_shared,
+            'is_active': self.is_active,
+            'audio_position': self.segmenter.position,
+            'last_transcript_text': self.last_transcript_text
+        }
+    
+    def restore(self, document: dict, segments: List[dict]):
+        """Load a session saved by another process (or before a restart); it resumes stopped"""
+        self.segments.load([TranscriptSegment.from_dict(segment) for segment in segments])
+        self.refresh(document, [])
+    
+    def refresh(self, document: dict, new_segments: List[dict]):
+        """Catch a restored copy up with its stored document and the segments committed since"""
+        self.created_at = datetime.fromisoformat(document['created_at'])
+        self.title = document.get('title', self.title)
+        self.is_shared = document.get('is_shared', False)
+        self.last_transcript_text = document.get('last_transcript_text', "")
+        self.segments.extend([TranscriptSegment.from_dict(segment) for segment in new_segments])
+        self.segmenter = UtteranceSegmenter(start_sample=document.get('audio_position', 0))
+        self.transcribed_until = self.segmenter.position / 16000
 
 class LiveTranscriptionManager:
     """Manages multiple live transcription sessions"""
     
-    def __init__(self, socketio: SocketIO):
+    STORE_NAMESPACE = "live"
+    
+    def __init__(self, socketio: SocketIO, store: Optional[SessionStore] = None,
+                 owns: Callable[[str], bool] = owns_session):
         self.socketio = socketio
-        self.sessions: Dict[str, LiveTranscriptionSession] = {}
+        self.sessions: Dict[str, LiveTranscriptionSession] = {}  # loaded sessions; the store has all of them
+        self.store = store or get_session_store()
+        self.owns = owns  # whether this process runs a session's pipeline (see cluster.py)
+        self._restore_lock = threading.Lock()
+        # Read-only copies of other workers' sessions: session_id -> (refreshed at, copy)
+        self._remote_sessions: Dict[str, Tuple[float, LiveTranscriptionSession]] = {}
+        self._remote_lock = threading.Lock()
+        self.scheduler = FairSessionScheduler(LIVE_POOL_WORKERS)
+        self.publisher = TranscriptPublisher(socketio)
         self.cleanup_thread = None
+        self.idle_flush_thread = None
         self.start_cleanup_thread()
+        self.start_idle_flush_thread()
     
     def create_session(self) -> str:
         """Create a new transcription session"""
-        session_id = str(uuid.uuid4())
-        session = LiveTranscriptionSession(session_id)
+        session_id = new_session_id()
+        session = self._new_session(session_id)
         self.sessions[session_id] = session
+        self._save_session(session)
         return session_id
     
+    def _new_session(self, session_id: str, read_only: bool = False) -> LiveTranscriptionSession:
+        return LiveTranscriptionSession(
+            session_id, self.scheduler,
+            on_transcript=lambda update: self._on_transcript(session_id, update),
+            on_backpressure=lambda info: self._emit_backpressure(session_id, info),
+            read_only=read_only
+        )
+    
+    def _on_transcript(self, session_id: str, update: dict):
+        """Persist a committed segment and push it to listeners"""
+        stored = dict(update)
+        stored.pop('session_id', None)
+        self.store.append(self.STORE_NAMESPACE, session_id, [stored])
+        self.publisher.publish(session_id, update)
+    
+    def _emit_backpressure(self, session_id: str, info: dict):
+        """Ask the session's streaming client to slow down, pause or resume"""
+        print(f"Backpressure for session {session_id}: {info['state']} ({info['lag_seconds']}s behind)")
+        try:
+            self.socketio.emit('backpressure', info, room=f"session_{session_id}")
+        except Exception as e:
+            print(f"Error sending backpressure to session {session_id}: {e}")
+    
+    def _save_session(self, session: LiveTranscriptionSession):
+        """Write a session's fields to the store (queued; doesn't wait for storage)"""
+        try:
+            self.store.save(self.STORE_NAMESPACE, session.session_id, session.to_document())
+        except Exception as e:
+            print(f"Error saving session {session.session_id}: {e}")
+    
+    def _get_session(self, session_id: str) -> Optional[LiveTranscriptionSession]:
+        """
+        A loaded session, restoring it from the store if this process doesn't have it yet.
+        
+        Sessions another worker owns get a read-only copy, since only the owner's copy receives
+        audio and commits segments; see _get_remote_session.
+        """
+        session = self.sessions.get(session_id)
+        if session is not None:
+            return session
+        if not self.owns(session_id):
+            return self._get_remote_session(session_id)
+        
+        with self._restore_lock:
+            if session_id in self.sessions:
+                return self.sessions[session_id]
+            session = self._load_session(session_id)
+            if session is None:
+                return None
+            self.sessions[session_id] = session
+            print(f"Restored session {session_id} ({len(session.segments)} segments)")
+            return session
+    
+    def _get_remote_session(self, session_id: str) -> Optional[LiveTranscriptionSession]:
+        """
+        A read-only copy of a session another worker owns.
+        
+        The copy is reused for LIVE_REMOTE_SESSION_TTL_SECONDS; after that its document is
+        reread and only the segments committed since are fetched from the store.
+        """
+        with self._remote_lock:
+            refreshed_at, session = self._remote_sessions.get(session_id, (0.0, None))
+            if session is not None and time.monotonic() - refreshed_at < LIVE_REMOTE_SESSION_TTL_SECONDS:
+                return session
+            try:
+                document = self.store.load(self.STORE_NAMESPACE, session_id)
+                if document is None:
+                    self._remote_sessions.pop(session_id, None)
+                    return None
+                if session is None:
+                    session = self._new_session(session_id, read_only=True)
+                session.refresh(document, self.store.items(self.STORE_NAMESPACE, session_id, len(session.segments)))
+            except Exception as e:
+                print(f"Error reading session {session_id}: {e}")
+                return None
+            self._remote_sessions[session_id] = (time.monotonic(), session)
+            return session
+    
+    def _prune_remote_sessions(self):
+        """Forget read-only copies nobody has asked for within their TTL"""
+        with self._remote_lock:
+            now = time.monotonic()
+            for session_id, (refreshed_at, _) in list(self._remote_sessions.items()):
+                if now - refreshed_at >= LIVE_REMOTE_SESSION_TTL_SECONDS:
+                    del self._remote_sessions[session_id]
+    
     def start_session(self, session_id: str) -> bool:
         """Start a transcription session"""
-        if session_id in self.sessions:
-            session = self.sessions[session_id]
+        session = self._get_session(session_id)
+        if session:
             session.start_processing()
+            self._save_session(session)
             return True
         return False
     
     def stop_session(self, session_id: str) -> bool:
         """Stop a transcription session"""
-        if session_id in self.sessions:
-            session = self.sessions[session_id]
+        session = self._get_session(session_id)
+        if session:
             session.stop_processing()
+            self.publisher.flush(session_id)
+            self._save_session(session)
             return True
         return False
     
-    def add_audio_to_session(self, session_id: str, audio_data: bytes) -> bool:
+    def add_audio_to_session(self, session_id: str, audio_data: bytes, seq: Optional[int] = None,
+                             format: Optional[str] = None) -> bool:
         """Add audio data to a session"""
-        if session_id in self.sessions:
-            session = self.sessions[session_id]
-            session.add_audio_chunk(audio_data)
+        session = self._get_session(session_id)
+        if session:
+            session.add_audio_chunk(audio_data, seq, format)
             return True
         return False
     
+    def negotiate_audio_format(self, session_id: str, requested) -> Optional[str]:
+        """
+        Pick the audio format a session's client will send (None if the session doesn't exist).
+        
+        Without requested formats (a viewer, or a client rejoining after a reconnect) the
+        session keeps the format it already has.
+        """
+        session = self._get_session(session_id)
+        if session:
+            if requested is not None:
+                session.input_format = negotiate_format(requested)
+            return session.input_format
+        return None
+    
     def get_session_transcript(self, session_id: str) -> Optional[str]:
         """Get the full transcript for a session"""
-        if session_id in self.sessions:
-            return self.sessions[session_id].get_full_transcript()
+        session = self._get_session(session_id)
+        if session:
+            return session.get_full_transcript()
         return None
     
+    def get_session_transcript_state(self, session_id: str, since: Optional[int] = None) -> Optional[dict]:
+        """Get a session's transcript, or only the segments after `since`, with its last seq"""
+        session = self._get_session(session_id)
+        if session:
+            return session.get_transcript_state(since)
+        return None
+    
+    def _load_session(self, session_id: str) -> Optional[LiveTranscriptionSession]:
+        """Build a stopped session from its stored copy"""
+        try:
+            document = self.store.load(self.STORE_NAMESPACE, session_id)
+            if document is None:
+                return None
+            session = self._new_session(session_id)
+            session.restore(document, self.store.items(self.STORE_NAMESPACE, session_id))
+            return session
+        except Exception as e:
+            print(f"Error restoring session {session_id}: {e}")
+            return None
+    
     def delete_session(self, session_id: str) -> bool:
         """Delete a session"""
-        if session_id in self.sessions:
-            session = self.sessions[session_id]
-            session.stop_processing()
-            del self.sessions[session_id]
+        session = self._get_session(session_id)
+        if session:
+            self._unload_session(session)
+            self.store.delete(self.STORE_NAMESPACE, session_id)
             return True
         return False
     
+    def _unload_session(self, session: LiveTranscriptionSession):
+        """Stop a session and drop it from memory (its stored copy is kept)"""
+        session.stop_processing()
+        self.scheduler.clear_limit(session.transcribe_key)
+        self._save_session(session)
+        self.sessions.pop(session.session_id, None)
+        with self._remote_lock:
+            self._remote_sessions.pop(session.session_id, None)
+    
     def enable_sharing(self, session_id: str) -> bool:
         """Enable sharing for a session"""
-        if session_id in self.sessions:
-            session = self.sessions[session_id]
+        session = self._get_session(session_id)
+        if session:
             session.enable_sharing()
+            self._save_session(session)
             return True
         return False
     
     def disable_sharing(self, session_id: str) -> bool:
         """Disable sharing for a session"""
-        if session_id in self.sessions:
-            session = self.sessions[session_id]
+        session = self._get_session(session_id)
+        if session:
             session.disable_sharing()
+            self._save_session(session)
             return True
         return False
     
     def get_share_info(self, session_id: str) -> Optional[dict]:
         """Get sharing info for a session"""
-        if session_id in self.sessions:
-            return self.sessions[session_id].get_share_info()
+        session = self._get_session(session_id)
+        if session:
+            return session.get_share_info()
+        return None
+    
+    def get_session_stats(self, session_id: str) -> Optional[dict]:
+        """Get model-call statistics for a session"""
+        session = self._get_session(session_id)
+        if session:
+            return session.get_stats()
         return None
     
+    def get_pool_stats(self) -> dict:
+        """Get utilization of the worker pool shared by all live sessions"""
+        stats = self.scheduler.get_stats()
+        active = [session for session in list(self.sessions.values()) if session.is_active]
+        stats['active_sessions'] = len(active)
+        stats['max_lag_seconds'] = round(max((session.lag_seconds for session in active), default=0.0), 2)
+        stats['sessions_under_backpressure'] = sum(1 for session in active if session.backpressure.state != BACKPRESSURE_OK)
+        return stats
+    
     def get_shared_session_info(self, session_id: str) -> Optional[dict]:
         """Get public info for a shared session (for viewers)"""
-        if session_id in self.sessions:
-            session = self.sessions[session_id]
-            if session.is_shared:
-                return session.get_share_info()
+        session = self._get_session(session_id)
+        if session and session.is_shared:
+            return session.get_share_info()
         return None
     
     def get_shared_session_transcript(self, session_id: str) -> Optional[str]:
         """Get transcript for a shared session (for viewers)"""
-        if session_id in self.sessions:
-            session = self.sessions[session_id]
-            if session.is_shared:
-                return session.get_full_transcript()
+        session = self._get_session(session_id)
+        if session and session.is_shared:
+            return session.get_full_transcript()
+        return None
+    
+    def get_shared_session_transcript_state(self, session_id: str, since: Optional[int] = None) -> Optional[dict]:
+        """Get transcript state for a shared session (for viewers)"""
+        session = self._get_session(session_id)
+        if session and session.is_shared:
+            return session.get_transcript_state(since)
         return None
     
     def start_cleanup_thread(self):
@@ -470,21 +1054,40 @@ class LiveTranscriptionManager:
             self.cleanup_thread.daemon = True
             self.cleanup_thread.start()
     
+    def start_idle_flush_thread(self):
+        """Start the thread that transcribes buffered audio of sessions that went quiet"""
+        if not self.idle_flush_thread or not self.idle_flush_thread.is_alive():
+            self.idle_flush_thread = threading.Thread(target=self._flush_idle_sessions)
+            self.idle_flush_thread.daemon = True
+            self.idle_flush_thread.start()
+    
+    def _flush_idle_sessions(self):
+        """Periodically close buffered segments of sessions that stopped sending audio"""
+        while True:
+            try:
+                for session in list(self.sessions.values()):
+                    session.flush_if_idle()
+            except Exception as e:
+                print(f"Error in idle flush thread: {e}")
+            time.sleep(LIVE_IDLE_FLUSH_SECONDS / 2)
+    
     def _cleanup_inactive_sessions(self):
         """Clean up inactive sessions periodically"""
         while True:
             try:
                 current_time = datetime.now()
-                sessions_to_delete = []
+                sessions_to_unload = []
                 
-                for session_id, session in self.sessions.items():
-                    # Delete sessions inactive for more than 1 hour
+                for session_id, session in list(self.sessions.items()):
+                    # Unload sessions inactive for more than 1 hour
                     if (current_time - session.last_activity).seconds > 3600:
-                        sessions_to_delete.append(session_id)
+                        sessions_to_unload.append(session)
                 
-                for session_id in sessions_to_delete:
-                    self.delete_session(session_id)
-                    print(f"Cleaned up inactive session: {session_id}")
+                # The store keeps them; they are restored when someone asks for them again
+                for session in sessions_to_unload:
+                    self._unload_session(session)
+                    print(f"Unloaded inactive session: {session.session_id}")
+                self._prune_remote_sessions()
                 
                 # Check every 5 minutes
                 time.sleep(300)
@@ -492,13 +1095,3 @@ class LiveTranscriptionManager:
             except Exception as e:
                 print(f"Error in cleanup thread: {e}")
                 time.sleep(300)
-    
-    def broadcast_transcript_updates(self):
-        """Broadcast transcript updates to connected clients"""
-        for session_id, session in self.sessions.items():
-            updates = session.get_transcript_updates()
-            if updates:
-                self.socketio.emit('transcript_update', {
-                    'session_id': session_id,
-                    'updates': updates
-                }, room=f"session_{session_id}") 
\ No newline at end of file
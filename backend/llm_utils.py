@@ -1,10 +1,17 @@
 import os
+import re
+import json
+import time
+import concurrent.futures
+import itertools
+from typing import Iterator
 from dotenv import load_dotenv
 from langchain_google_vertexai import ChatVertexAI
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain.chains import LLMChain
-from langchain.memory import ConversationBufferMemory
+from chat_memory import ChatMemory
+from context_cache import CHAT_MODEL, CachedContext, ContextCacheError
 
 load_dotenv()
 
@@ -27,92 +34,246 @@ if not google_cloud_project:
 # but can be adjusted or made configurable.
 
 llm = ChatVertexAI(
-    model="gemini-2.5-flash-preview-05-20", 
+    model=CHAT_MODEL,
     temperature=0.2,
     project=google_cloud_project,
     location=os.getenv("GOOGLE_CLOUD_LOCATION", "us-central1")
 )
 print("Using ChatVertexAI with service account authentication")
 
-def generate_meeting_takeaways(transcript: str) -> str:
-    """Generates concise meeting takeaways from the transcript."""
-    prompt_template = PromptTemplate(
-        input_variables=["transcript"],
-        template="""
-        Based on the following meeting transcript, please extract the key meeting takeaways or action items.
-        Present them as a clear, concise bulleted list.
+# Takeaways/summary/notes are generated concurrently on a shared, bounded pool
+ANALYSIS_MAX_WORKERS = int(os.getenv("ANALYSIS_MAX_WORKERS", "8"))
 
-        Transcript:
-        {transcript}
+# Each analysis call gets this long before it is reported as failed
+ANALYSIS_TIMEOUT_SECONDS = float(os.getenv("ANALYSIS_TIMEOUT_SECONDS", "180"))
 
-        Key Takeaways:
-        """
-    )
-    chain = LLMChain(llm=llm, prompt=prompt_template)
+# "parallel" makes one LLM call per analysis; "combined" makes a single structured call
+# (and falls back to the individual calls if its output cannot be parsed)
+ANALYSIS_MODE = os.getenv("ANALYSIS_MODE", "parallel").lower()
+
+_analysis_executor = concurrent.futures.ThreadPoolExecutor(
+    max_workers=ANALYSIS_MAX_WORKERS,
+    thread_name_prefix="meeting-analysis"
+)
+
+# Prompts for the individual analysis calls
+TAKEAWAYS_PROMPT = PromptTemplate(
+    input_variables=["transcript"],
+    template="""
+    Based on the following meeting transcript, please extract the key meeting takeaways or action items.
+    Present them as a clear, concise bulleted list.
+
+    Transcript:
+    {transcript}
+
+    Key Takeaways:
+    """
+)
+
+SUMMARY_PROMPT = PromptTemplate(
+    input_variables=["transcript"],
+    template="""
+    Please provide a concise summary of the following meeting transcript.
+    Capture the main topics discussed and any important decisions made.
+
+    Transcript:
+    {transcript}
+
+    Summary:
+    """
+)
+
+NOTES_PROMPT = PromptTemplate(
+    input_variables=["transcript"],
+    template="""
+    From the following meeting transcript, create detailed meeting notes.
+    Include discussion points, decisions, and any assigned tasks with responsible parties if mentioned.
+    Structure the notes logically, perhaps by topic or speaker if discernible.
+
+    Transcript:
+    {transcript}
+
+    Detailed Meeting Notes:
+    """
+)
+
+# Prompt and JSON schema for the single-call "combined" analysis
+COMBINED_ANALYSIS_PROMPT = PromptTemplate(
+    input_variables=["transcript"],
+    template="""
+    Analyze the following meeting transcript and respond with a JSON object containing:
+    - "takeaways": the key meeting takeaways or action items as a clear, concise bulleted list
+    - "summary": a concise summary capturing the main topics discussed and any important decisions made
+    - "notes": detailed meeting notes including discussion points, decisions, and any assigned tasks
+      with responsible parties if mentioned, structured logically by topic or speaker if discernible
+
+    Transcript:
+    {transcript}
+    """
+)
+
+COMBINED_ANALYSIS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "takeaways": {"type": "string", "description": "Key takeaways or action items as a bulleted list"},
+        "summary": {"type": "string", "description": "Concise summary of the meeting"},
+        "notes": {"type": "string", "description": "Detailed meeting notes"},
+    },
+    "required": ["takeaways", "summary", "notes"],
+}
+
+def generate_meeting_takeaways(transcript: str) -> str:
+    """Generates concise meeting takeaways from the transcript."""
+    chain = LLMChain(llm=llm, prompt=TAKEAWAYS_PROMPT)
     response = chain.invoke({"transcript": transcript})
     return response['text']
 
 def generate_meeting_summary(transcript: str) -> str:
     """Generates a summary of the meeting from the transcript."""
-    prompt_template = PromptTemplate(
-        input_variables=["transcript"],
-        template="""
-        Please provide a concise summary of the following meeting transcript.
-        Capture the main topics discussed and any important decisions made.
-
-        Transcript:
-        {transcript}
-
-        Summary:
-        """
-    )
-    chain = LLMChain(llm=llm, prompt=prompt_template)
+    chain = LLMChain(llm=llm, prompt=SUMMARY_PROMPT)
     response = chain.invoke({"transcript": transcript})
     return response['text']
 
 def generate_meeting_notes(transcript: str) -> str:
     """Generates detailed meeting notes from the transcript."""
-    prompt_template = PromptTemplate(
-        input_variables=["transcript"],
-        template="""
-        From the following meeting transcript, create detailed meeting notes.
-        Include discussion points, decisions, and any assigned tasks with responsible parties if mentioned.
-        Structure the notes logically, perhaps by topic or speaker if discernible.
-
-        Transcript:
-        {transcript}
-
-        Detailed Meeting Notes:
-        """
-    )
-    chain = LLMChain(llm=llm, prompt=prompt_template)
+    chain = LLMChain(llm=llm, prompt=NOTES_PROMPT)
     response = chain.invoke({"transcript": transcript})
     return response['text']
 
+def parse_combined_analysis(text: str) -> dict:
+    """
+    Parses and validates the JSON produced by the combined analysis call.
+
+    Raises:
+        ValueError: if the output is not an object with non-empty takeaways, summary and notes
+    """
+    # Tolerate a markdown code fence around the JSON
+    cleaned = re.sub(r"^```(?:json)?\s*|\s*```$", "", text.strip())
+    try:
+        data = json.loads(cleaned)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Combined analysis is not valid JSON: {e}")
+    if not isinstance(data, dict):
+        raise ValueError("Combined analysis is not a JSON object")
+
+    analysis = {}
+    for key in COMBINED_ANALYSIS_SCHEMA["required"]:
+        value = data.get(key)
+        # Models sometimes return the bulleted list as an array
+        if isinstance(value, list) and all(isinstance(item, str) for item in value):
+            value = "\n".join(f"- {item}" for item in value)
+        if not isinstance(value, str) or not value.strip():
+            raise ValueError(f"Combined analysis is missing '{key}'")
+        analysis[key] = value.strip()
+    return analysis
+
+def generate_combined_analysis(transcript: str) -> dict:
+    """Generates takeaways, summary and notes with a single structured LLM call."""
+    structured_llm = llm.bind(
+        response_mime_type="application/json",
+        response_schema=COMBINED_ANALYSIS_SCHEMA
+    )
+    chain = COMBINED_ANALYSIS_PROMPT | structured_llm | StrOutputParser()
+    return parse_combined_analysis(chain.invoke({"transcript": transcript}))
+
+def generate_meeting_analysis(transcript: str, timeout: float = ANALYSIS_TIMEOUT_SECONDS, mode: str = ANALYSIS_MODE) -> dict:
+    """
+    Generates takeaways, summary and notes.
+
+    In "combined" mode a single structured call is tried first; if it fails or its output
+    does not validate, the individual calls are made instead.
+
+    Returns a dict with 'takeaways', 'summary' and 'notes' plus an 'errors' dict.
+    """
+    if mode == "combined":
+        future = _analysis_executor.submit(generate_combined_analysis, transcript)
+        try:
+            analysis = future.result(timeout=timeout)
+            analysis['errors'] = {}
+            return analysis
+        except Exception as e:
+            future.cancel()
+            print(f"Combined analysis failed, falling back to individual calls: {e or 'timed out'}")
+
+    return generate_analysis_concurrently(transcript, timeout)
+
+def generate_analysis_concurrently(transcript: str, timeout: float = ANALYSIS_TIMEOUT_SECONDS) -> dict:
+    """
+    Generates takeaways, summary and notes concurrently.
+
+    Returns a dict with 'takeaways', 'summary' and 'notes' plus an 'errors' dict. A task that
+    fails or exceeds `timeout` gets an "Error: ..." string in its slot and an entry in 'errors',
+    while the other results are still returned.
+    """
+    generators = {
+        'takeaways': generate_meeting_takeaways,
+        'summary': generate_meeting_summary,
+        'notes': generate_meeting_notes,
+    }
+    futures = {name: _analysis_executor.submit(generator, transcript) for name, generator in generators.items()}
+
+    # All tasks start together, so they share one deadline
+    deadline = time.monotonic() + timeout
+    results = {}
+    errors = {}
+    for name, future in futures.items():
+        try:
+            results[name] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except concurrent.futures.TimeoutError:
+            # A call that already started keeps running in the pool; we just stop waiting for it
+            future.cancel()
+            errors[name] = f"timed out after {timeout:.0f}s"
+        except Exception as e:
+            errors[name] = str(e)
+
+    for name, error in errors.items():
+        print(f"Error generating meeting {name}: {error}")
+        results[name] = f"Error: Could not generate {name}: {error}"
+
+    results['errors'] = errors
+    return results
+
 # For the chat functionality, we'll set up a conversational chain
 # This requires memory to keep track of the conversation.
 
-def get_chat_response(transcript: str, user_question: str, memory: ConversationBufferMemory) -> str:
-    """Generates a response to a user's question about the meeting transcript."""
-    # We need to provide the transcript as context for every question.
-    # The memory will store the history of Q&A.
-
-    # Check if this is the first question. If so, prime the memory with the context.
-    # This is a simplified way. A more robust way would be to use a proper contextual QA chain.
-    if not memory.chat_memory.messages: # If memory is empty
-        # Add a system message or initial context to the memory if desired, though not strictly required here
-        # as the transcript is passed directly to the prompt each time.
-        pass 
-
-    # For this specific use case, where questions are *about* the transcript,
-    # the transcript itself is the primary context, not just conversation history.
-    # Langchain's `ConversationChain` might not be ideal if we always want to ground answers
-    # in the *static* transcript rather than evolving conversation that might drift.
-    # A more direct approach for Q&A on a fixed document:
-
-    prompt_template = PromptTemplate(
-        input_variables=["transcript", "user_question", "chat_history"],
-        template="""
+# Chat prompt used with retrieval: only the transcript passages relevant to the question
+CHAT_RETRIEVAL_PROMPT = PromptTemplate(
+    input_variables=["passages", "user_question", "chat_history"],
+    template="""
+        You are a helpful assistant answering questions about a meeting.
+        Below are the excerpts of the meeting transcript most relevant to the question, each
+        starting with its timestamp and chapter. Answer from these excerpts and cite the
+        timestamps you used. If they don't contain the answer, say so.
+
+        Transcript Excerpts:
+        {passages}
+
+        Chat History:
+        {chat_history}
+
+        User Question: {user_question}
+        Assistant Answer:
+        """
+)
+
+# Chat prompt used with a cached context: the transcript and instructions are already on the provider
+CHAT_CACHED_PROMPT = PromptTemplate(
+    input_variables=["user_question", "chat_history"],
+    template="""
+        Chat History:
+        {chat_history}
+
+        User Question: {user_question}
+        Assistant Answer:
+        """
+)
+
+# Chat prompt with the full transcript inline. Questions are *about* the transcript, so it is
+# sent with every question rather than left to a conversation chain's memory, where answers
+# could drift away from the static document.
+CHAT_PROMPT = PromptTemplate(
+    input_variables=["transcript", "user_question", "chat_history"],
+    template="""
         You are a helpful assistant answering questions about a meeting.
         Use the provided meeting transcript to answer the user's question.
         If the transcript doesn't contain the answer, say so.
@@ -126,32 +287,118 @@ def get_chat_response(transcript: str, user_question: str, memory: ConversationB
         User Question: {user_question}
         Assistant Answer:
         """
-    )
+)
 
-    # We'll manually manage the history string for the prompt for simplicity here,
-    # as `ConversationChain` with just `ConversationBufferMemory` might not directly allow injecting
-    # a large, static context (the transcript) easily into each turn alongside the dynamic chat history.
-    
-    # Construct chat history string from memory
-    history_string = "\n".join([f"{msg.type}: {msg.content}" for msg in memory.chat_memory.messages])
+# Folds older chat turns into the running summary kept by ChatMemory
+CHAT_SUMMARY_PROMPT = PromptTemplate(
+    input_variables=["summary", "messages", "max_words"],
+    template="""
+    You are keeping a running summary of a conversation about a meeting.
+    Update the summary with the new messages below. Keep the questions asked, the answers'
+    key facts and any timestamps cited; drop pleasantries. Use at most {max_words} words.
 
-    chain = LLMChain(llm=llm, prompt=prompt_template)
-    
-    # Prepare inputs for the chain
-    inputs = {
+    Current Summary:
+    {summary}
+
+    New Messages:
+    {messages}
+
+    Updated Summary:
+    """
+)
+
+def summarize_chat_history(summary: str, messages: list, max_words: int) -> str:
+    """Folds chat messages ({'role', 'content'} dicts) into a running summary of the conversation."""
+    chain = LLMChain(llm=llm, prompt=CHAT_SUMMARY_PROMPT)
+    response = chain.invoke({
+        "summary": summary or "(none yet)",
+        "messages": "\n".join(f"{message['role']}: {message['content']}" for message in messages),
+        "max_words": max_words
+    })
+    return response['text']
+
+def _inline_chat_prompt(transcript: str, user_question: str, history_string: str, passages: str = None):
+    """The prompt and inputs for a chat question that carries its context: passages if given, else the transcript"""
+    if passages:
+        return CHAT_RETRIEVAL_PROMPT, {
+            "passages": passages,
+            "user_question": user_question,
+            "chat_history": history_string
+        }
+    return CHAT_PROMPT, {
         "transcript": transcript,
         "user_question": user_question,
         "chat_history": history_string
     }
-    
+
+def get_chat_response(transcript: str, user_question: str, memory: ChatMemory,
+                      passages: str = None, cached_context: CachedContext = None) -> str:
+    """
+    Generates a response to a user's question about the meeting transcript.
+
+    With a cached_context (the transcript cached on the provider) only the chat history and
+    question are sent, and passages are not used. Without one the context goes inline:
+    passages (retrieved transcript excerpts) when given, otherwise the full transcript, which
+    is also the fallback when the cached context fails.
+    """
+    # Recent turns verbatim and a summary of older ones, within the memory's token budget
+    history_string = memory.format_history()
+
+    if cached_context is not None:
+        try:
+            answer = cached_context.generate(
+                CHAT_CACHED_PROMPT.format(user_question=user_question, chat_history=history_string)
+            )
+            memory.add_exchange(user_question, answer)
+            return answer
+        except ContextCacheError as e:
+            print(f"Cached chat context failed, sending it inline: {e}")
+
+    prompt, inputs = _inline_chat_prompt(transcript, user_question, history_string, passages)
+    chain = LLMChain(llm=llm, prompt=prompt)
     response = chain.invoke(inputs)
     answer = response['text']
     
     # Update memory with the current Q&A
-    memory.save_context({"input": user_question}, {"output": answer})
+    memory.add_exchange(user_question, answer)
     
     return answer
 
+def stream_chat_response(transcript: str, user_question: str, memory: ChatMemory,
+                         passages: str = None, cached_context: CachedContext = None) -> Iterator[str]:
+    """
+    Like get_chat_response, but yields the answer's text as the model produces it.
+
+    The exchange is recorded in memory once the answer is complete. Closing the generator
+    early (the client went away) ends the model request and records nothing.
+    """
+    history_string = memory.format_history()
+
+    chunks = None
+    if cached_context is not None:
+        chunks = cached_context.stream(
+            CHAT_CACHED_PROMPT.format(user_question=user_question, chat_history=history_string)
+        )
+        try:
+            # A cache that can't be used fails on the first chunk, before anything was sent on
+            first = next(chunks, "")
+            chunks = itertools.chain([first], chunks)
+        except ContextCacheError as e:
+            print(f"Cached chat context failed, sending it inline: {e}")
+            chunks = None
+
+    if chunks is None:
+        prompt, inputs = _inline_chat_prompt(transcript, user_question, history_string, passages)
+        chunks = (chunk.content for chunk in (prompt | llm).stream(inputs))
+
+    answer = []
+    for text in chunks:
+        if text:
+            answer.append(text)
+            yield text
+
+    memory.add_exchange(user_question, "".join(answer))
+
 
 if __name__ == '__main__':
     # This is a simple test section. 
@@ -181,7 +428,7 @@ if __name__ == '__main__':
     print(notes)
 
     print("\n--- Testing Chat Functionality ---")
-    chat_memory = ConversationBufferMemory()
+    chat_memory = ChatMemory(summarizer=summarize_chat_history)
     q1 = "Who is responsible for the budget?"
     print(f"User: {q1}")
     a1 = get_chat_response(dummy_transcript, q1, chat_memory)
@@ -198,6 +445,6 @@ if __name__ == '__main__':
     print(f"Assistant: {a3}")
 
     print("\n--- Chat History for reference ---")
-    for msg in chat_memory.chat_memory.messages:
-        print(f"{msg.type.upper()}: {msg.content}")
+    for msg in chat_memory.messages():
+        print(f"{msg['role'].upper()}: {msg['content']}")
     print("--------------------------------") 
\ No newline at end of file
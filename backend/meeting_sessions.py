@@ -0,0 +1,214 @@
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+from session_store import SessionStore, get_session_store
+from chat_memory import ChatMemory, Summarizer
+from chat_retrieval import (
+    CHAT_CONTEXT_MODE, CHAT_FULL_CONTEXT_MAX_TOKENS, CHAT_RETRIEVAL_TOP_K,
+    BM25Index, Passage, build_context, chunk_chapters, estimate_tokens
+)
+from context_cache import (
+    CHAT_CONTEXT_CACHE_MIN_TOKENS, CHAT_CONTEXT_CACHE_REFRESH_SECONDS, CHAT_CONTEXT_CACHE_TTL_SECONDS,
+    CHAT_CONTEXT_INSTRUCTION, CachedContext, ContextCacheError, get_context_cache
+)
+
+# A cached context this close to expiring is recreated rather than used
+_CACHE_EXPIRY_MARGIN_SECONDS = 60
+
+class MeetingSessions:
+    """
+    Transcribed meetings that can be chatted with, kept in the session store.
+
+    Each meeting's document holds its transcript and its items are the chat messages, so
+    meetings and their chat history survive restarts and are visible to every worker.
+    Chat memory (see ChatMemory) reads the same items, plus a running summary of the older
+    turns kept in the document, so prompts carry a bounded history.
+
+    Long transcripts are split into passages when the meeting is created; chat retrieves
+    the relevant ones per question instead of sending the whole transcript. With
+    CHAT_CONTEXT_CACHE on, the transcript is instead cached on the provider's side for as
+    long as the meeting is being chatted with, and questions then send only the chat
+    history (see get_chat_context).
+    """
+
+    NAMESPACE = "meeting"
+
+    def __init__(self, store: Optional[SessionStore] = None, context_cache=None,
+                 summarizer: Optional[Summarizer] = None):
+        self.store = store or get_session_store()
+        self.summarizer = summarizer
+        self.context_cache = context_cache if context_cache is not None else get_context_cache()
+        self._cached_contexts: Dict[str, dict] = {}  # session ID -> {'name', 'expires_at', 'refreshed_at'}
+        self._cache_retry_at: Dict[str, float] = {}  # meetings whose cache recently failed
+        self._transcripts: Dict[str, str] = {}  # read on every chat turn, never changes
+        self._memories: Dict[str, ChatMemory] = {}
+        self._indexes: Dict[str, Optional[BM25Index]] = {}
+        self._lock = threading.Lock()
+
+    def create(self, transcript: str, chapters: Optional[List[dict]] = None) -> str:
+        """Store a new meeting, indexing its chapters for chat retrieval, and return its session ID"""
+        session_id = str(uuid.uuid4())
+        index = None
+        if chapters and estimate_tokens(transcript) > CHAT_FULL_CONTEXT_MAX_TOKENS:
+            index = BM25Index(chunk_chapters(chapters))
+        self.store.save(self.NAMESPACE, session_id, {
+            'transcript': transcript,
+            'passages': [passage.to_dict() for passage in index.passages] if index else None
+        })
+        with self._lock:
+            self._transcripts[session_id] = transcript
+            self._indexes[session_id] = index
+        return session_id
+
+    def __contains__(self, session_id: str) -> bool:
+        return self.get_transcript(session_id) is not None
+
+    def __getitem__(self, session_id: str) -> dict:
+        """The meeting's transcript and chat memory (KeyError if unknown)"""
+        transcript = self.get_transcript(session_id)
+        if transcript is None:
+            raise KeyError(session_id)
+        return {
+            'transcript': transcript,
+            'memory': self.get_memory(session_id)
+        }
+
+    def get_transcript(self, session_id: str) -> Optional[str]:
+        with self._lock:
+            if session_id in self._transcripts:
+                return self._transcripts[session_id]
+        document = self.store.load(self.NAMESPACE, session_id)
+        if document is None:
+            return None
+        with self._lock:
+            self._transcripts[session_id] = document['transcript']
+        return document['transcript']
+
+    def get_chat_passages(self, session_id: str, question: str, top_k: int = CHAT_RETRIEVAL_TOP_K) -> Optional[str]:
+        """
+        Transcript passages relevant to a question, with their timestamps.
+
+        None means chat should use the full transcript: retrieval is off, the meeting is
+        short enough to send whole, or nothing matched the question.
+        """
+        if CHAT_CONTEXT_MODE != "retrieval":
+            return None
+        index = self._get_index(session_id)
+        if index is None:
+            return None
+
+        # Follow-ups ("what did they decide about it?") borrow terms from the previous question
+        query = question
+        previous = self.get_memory(session_id).last_question()
+        if previous:
+            query = f"{question} {previous}"
+        return build_context(index, query, top_k) or None
+
+    def get_chat_context(self, session_id: str, question: str) -> Tuple[Optional[CachedContext], Optional[str]]:
+        """
+        What a chat question is answered from, as (cached_context, passages).
+
+        When the transcript is cached (CHAT_CONTEXT_CACHE is on and the meeting is long
+        enough) the cache wins: the model gets the whole meeting at cached-token prices, so
+        retrieval isn't run. Otherwise the passages retrieved for the question are returned
+        (None meaning the full transcript).
+        """
+        cached_context = self.get_cached_context(session_id)
+        if cached_context is not None:
+            return cached_context, None
+        return None, self.get_chat_passages(session_id, question)
+
+    def get_cached_context(self, session_id: str) -> Optional[CachedContext]:
+        """
+        The meeting's transcript cached on the provider, created on first use and kept alive
+        while the meeting is chatted with: each use extends it to CHAT_CONTEXT_CACHE_TTL_SECONDS
+        (at most every CHAT_CONTEXT_CACHE_REFRESH_SECONDS), so an idle meeting's cache expires.
+
+        None means chat should send its context inline: caching is off or failed, or the
+        transcript is too short to be worth caching.
+        """
+        if self.context_cache is None:
+            return None
+        transcript = self.get_transcript(session_id)
+        if transcript is None or estimate_tokens(transcript) < CHAT_CONTEXT_CACHE_MIN_TOKENS:
+            return None
+
+        now = time.time()
+        with self._lock:
+            if self._cache_retry_at.get(session_id, 0) > now:
+                return None
+            entry = self._cached_contexts.get(session_id)
+        if entry is None:
+            # Another worker may already have cached this meeting
+            entry = (self.store.load(self.NAMESPACE, session_id) or {}).get('context_cache')
+
+        if entry and entry['expires_at'] - now > _CACHE_EXPIRY_MARGIN_SECONDS:
+            if now - entry['refreshed_at'] >= CHAT_CONTEXT_CACHE_REFRESH_SECONDS:
+                try:
+                    self.context_cache.refresh(entry['name'], CHAT_CONTEXT_CACHE_TTL_SECONDS)
+                    entry = dict(entry, expires_at=now + CHAT_CONTEXT_CACHE_TTL_SECONDS, refreshed_at=now)
+                    self._save_cached_context(session_id, entry)
+                except ContextCacheError as e:
+                    print(f"Recreating cached context for meeting {session_id}: {e}")
+                    entry = None
+        else:
+            entry = None
+
+        if entry is None:
+            try:
+                name = self.context_cache.create(
+                    f"Meeting Transcript:\n{transcript}", CHAT_CONTEXT_INSTRUCTION, CHAT_CONTEXT_CACHE_TTL_SECONDS
+                )
+            except ContextCacheError as e:
+                print(f"Sending chat context inline for meeting {session_id}: {e}")
+                with self._lock:
+                    self._cache_retry_at[session_id] = now + CHAT_CONTEXT_CACHE_REFRESH_SECONDS
+                return None
+            # Two workers racing here each create a cache; the one not saved expires unused
+            entry = {'name': name, 'expires_at': now + CHAT_CONTEXT_CACHE_TTL_SECONDS, 'refreshed_at': now}
+            self._save_cached_context(session_id, entry)
+
+        with self._lock:
+            self._cached_contexts[session_id] = entry
+        return CachedContext(self.context_cache, entry['name'], lambda: self._drop_cached_context(session_id))
+
+    def _save_cached_context(self, session_id: str, entry: Optional[dict]):
+        self.store.save(self.NAMESPACE, session_id, {'context_cache': entry})
+        with self._lock:
+            if entry is None:
+                self._cached_contexts.pop(session_id, None)
+            else:
+                self._cached_contexts[session_id] = entry
+
+    def _drop_cached_context(self, session_id: str):
+        """Forget a cache that failed in use; the meeting goes inline until it is retried"""
+        self._save_cached_context(session_id, None)
+        with self._lock:
+            self._cache_retry_at[session_id] = time.time() + CHAT_CONTEXT_CACHE_REFRESH_SECONDS
+
+    def _get_index(self, session_id: str) -> Optional[BM25Index]:
+        """The meeting's passage index, rebuilt from the stored passages on first use in this process"""
+        with self._lock:
+            if session_id in self._indexes:
+                return self._indexes[session_id]
+        document = self.store.load(self.NAMESPACE, session_id) or {}
+        passages = document.get('passages')
+        index = BM25Index([Passage.from_dict(passage) for passage in passages]) if passages else None
+        with self._lock:
+            return self._indexes.setdefault(session_id, index)
+
+    def get_chat_history(self, session_id: str) -> List[dict]:
+        """All chat messages as {'role', 'content'} dicts, oldest first"""
+        return self.store.items(self.NAMESPACE, session_id)
+
+    def get_memory(self, session_id: str) -> ChatMemory:
+        """The meeting's chat memory, loaded from the store on first use in this process"""
+        with self._lock:
+            memory = self._memories.get(session_id)
+        if memory is not None:
+            return memory
+
+        memory = ChatMemory(self.store, self.NAMESPACE, session_id, summarizer=self.summarizer)
+        with self._lock:
+            return self._memories.setdefault(session_id, memory)
@@ -0,0 +1,67 @@
+import os
+import threading
+import wave
+from typing import Optional
+from dotenv import load_dotenv
+from vad import SAMPLE_RATE
+
+load_dotenv()
+
+# Set to "false" to not keep a complete recording of live sessions
+LIVE_RECORDING_ENABLED = os.getenv("LIVE_RECORDING_ENABLED", "true").lower() == "true"
+
+# Directory the complete live recordings are written to
+LIVE_RECORDING_DIR = os.getenv("LIVE_RECORDING_DIR", "debug_audio")
+
+class RecordingWriter:
+    """
+    Streams 16 kHz mono 16-bit PCM to a WAV file as it arrives.
+
+    Only the file handle is held in memory; the WAV header's sizes are patched in on close().
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.bytes_written = 0
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._wav_file = wave.open(path, 'wb')
+        self._wav_file.setnchannels(1)  # Mono
+        self._wav_file.setsampwidth(2)  # 16-bit
+        self._wav_file.setframerate(SAMPLE_RATE)
+
+    @property
+    def duration(self) -> float:
+        return self.bytes_written / (SAMPLE_RATE * 2)
+
+    @property
+    def closed(self) -> bool:
+        return self._wav_file is None
+
+    def write(self, pcm: bytes):
+        """Append PCM to the file (ignored once closed)"""
+        with self._lock:
+            if self._wav_file is None:
+                return
+            self._wav_file.writeframesraw(pcm)
+            self.bytes_written += len(pcm)
+
+    def close(self) -> Optional[str]:
+        """
+        Finish the file.
+
+        Returns:
+            The file path, or None if no audio was written (the empty file is removed)
+        """
+        with self._lock:
+            if self._wav_file is None:
+                return None
+            self._wav_file.close()  # patches the RIFF and data chunk sizes
+            self._wav_file = None
+
+        if self.bytes_written == 0:
+            os.remove(self.path)
+            return None
+        return self.path
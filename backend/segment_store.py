@@ -0,0 +1,110 @@
+import threading
+from datetime import datetime
+from typing import List, Optional
+
+def format_offset(seconds: float) -> str:
+    """Formats an audio offset as HH:MM:SS"""
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+class TranscriptSegment:
+    """One committed piece of a live transcript, positioned by its offsets in the session's audio"""
+
+    __slots__ = ('seq', 'start', 'end', 'text', 'latency', 'confidence', 'wall_time')
+
+    def __init__(self, seq: int, start: float, end: float, text: str,
+                 latency: Optional[float] = None, confidence: Optional[float] = None,
+                 wall_time: Optional[float] = None):
+        self.seq = seq
+        self.start = start  # seconds from the start of the session's audio
+        self.end = end
+        self.text = text
+        self.latency = latency  # model response time in seconds
+        self.confidence = confidence  # 0-1 when the model reports it
+        self.wall_time = wall_time if wall_time is not None else datetime.now().timestamp()
+
+    @property
+    def line(self) -> str:
+        return f"[{format_offset(self.start)}] {self.text}\n"
+
+    def to_dict(self, session_id: Optional[str] = None) -> dict:
+        data = {
+            'seq': self.seq,
+            'timestamp': format_offset(self.start),
+            'start': round(self.start, 2),
+            'end': round(self.end, 2),
+            'text': self.text,
+            'latency': round(self.latency, 3) if self.latency is not None else None,
+            'confidence': round(self.confidence, 3) if self.confidence is not None else None,
+            'wall_time': datetime.fromtimestamp(self.wall_time).isoformat(),
+        }
+        if session_id is not None:
+            data['session_id'] = session_id
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'TranscriptSegment':
+        """Rebuild a segment from to_dict() output (e.g. one read back from the session store)"""
+        wall_time = data.get('wall_time')
+        return cls(
+            data['seq'], data['start'], data['end'], data['text'],
+            data.get('latency'), data.get('confidence'),
+            datetime.fromisoformat(wall_time).timestamp() if wall_time else None
+        )
+
+class SegmentStore:
+    """
+    Ordered transcript segments with monotonic sequence ids (the first is 1).
+
+    The full text is only rendered when asked for, and the rendering is cached until the
+    next append.
+    """
+
+    def __init__(self):
+        self._segments: List[TranscriptSegment] = []
+        self._rendered: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._segments)
+
+    @property
+    def last_seq(self) -> int:
+        """Sequence id of the latest segment (0 when empty)"""
+        return self._segments[-1].seq if self._segments else 0
+
+    def append(self, start: float, end: float, text: str, latency: Optional[float] = None,
+               confidence: Optional[float] = None) -> TranscriptSegment:
+        """Add the next segment and return it with its sequence id"""
+        with self._lock:
+            segment = TranscriptSegment(self.last_seq + 1, start, end, text, latency, confidence)
+            self._segments.append(segment)
+            self._rendered = None
+            return segment
+
+    def load(self, segments: List[TranscriptSegment]):
+        """Replace the contents with previously committed segments (seqs must run from 1)"""
+        with self._lock:
+            self._segments = list(segments)
+            self._rendered = None
+
+    def extend(self, segments: List[TranscriptSegment]):
+        """Add previously committed segments that follow the current ones"""
+        if not segments:
+            return
+        with self._lock:
+            self._segments.extend(segments)
+            self._rendered = None
+
+    def since(self, seq: int) -> List[TranscriptSegment]:
+        """Segments with a sequence id greater than seq"""
+        # Seqs are contiguous from 1, so segment n sits at index n - 1
+        with self._lock:
+            return self._segments[max(int(seq), 0):]
+
+    def render(self) -> str:
+        """The full transcript, one "[HH:MM:SS] text" line per segment"""
+        with self._lock:
+            if self._rendered is None:
+                self._rendered = "".join(segment.line for segment in self._segments)
+            return self._rendered
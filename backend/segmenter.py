@@ -0,0 +1,168 @@
+import os
+import re
+import time
+from typing import List, Optional
+import numpy as np
+from dotenv import load_dotenv
+from vad import SAMPLE_RATE, VAD_FRAME_MS, classify_frames
+
+load_dotenv()
+
+# Segments are closed at a pause once they are at least this long...
+LIVE_SEGMENT_MIN_SECONDS = float(os.getenv("LIVE_SEGMENT_MIN_SECONDS", "1.5"))
+
+# ...and are cut regardless (at the best pause available) once they reach this length
+LIVE_SEGMENT_MAX_SECONDS = float(os.getenv("LIVE_SEGMENT_MAX_SECONDS", "12"))
+
+# Silence needed to count as the end of an utterance
+LIVE_SEGMENT_PAUSE_MS = int(os.getenv("LIVE_SEGMENT_PAUSE_MS", "500"))
+
+# Audio repeated at the start of the next segment so words at the seam aren't lost
+LIVE_SEGMENT_OVERLAP_MS = int(os.getenv("LIVE_SEGMENT_OVERLAP_MS", "300"))
+
+# Words that overlap can hold, at about three spoken words per second; strip_overlap removes
+# no more than this many repeated words, so real repetitions ("okay, okay") survive
+OVERLAP_MAX_WORDS = max(1, round(3 * LIVE_SEGMENT_OVERLAP_MS / 1000))
+
+BYTES_PER_SAMPLE = 2
+
+class SpeechSegment:
+    """A span of live PCM audio, with offsets in samples from the start of the stream"""
+
+    __slots__ = ('pcm', 'start_sample', 'end_sample', 'closed_at')
+
+    def __init__(self, pcm: bytes, start_sample: int, end_sample: int, closed_at: Optional[float] = None):
+        self.pcm = pcm
+        self.start_sample = start_sample
+        self.end_sample = end_sample
+        self.closed_at = closed_at if closed_at is not None else time.monotonic()  # when it became ready to transcribe
+
+    @property
+    def start_seconds(self) -> float:
+        return self.start_sample / SAMPLE_RATE
+
+    @property
+    def end_seconds(self) -> float:
+        return self.end_sample / SAMPLE_RATE
+
+    @property
+    def duration(self) -> float:
+        return (self.end_sample - self.start_sample) / SAMPLE_RATE
+
+def merge_segments(first: SpeechSegment, second: SpeechSegment) -> SpeechSegment:
+    """One segment covering two consecutive ones (the overlap between them is kept once)"""
+    overlap = max(0, first.end_sample - second.start_sample) * BYTES_PER_SAMPLE
+    return SpeechSegment(first.pcm + second.pcm[overlap:], first.start_sample,
+                         max(first.end_sample, second.end_sample), first.closed_at)
+
+class UtteranceSegmenter:
+    """Cuts a 16 kHz mono PCM stream into segments at pauses between utterances"""
+
+    def __init__(self, min_seconds: float = LIVE_SEGMENT_MIN_SECONDS,
+                 max_seconds: float = LIVE_SEGMENT_MAX_SECONDS,
+                 pause_ms: int = LIVE_SEGMENT_PAUSE_MS,
+                 overlap_ms: int = LIVE_SEGMENT_OVERLAP_MS,
+                 frame_ms: int = VAD_FRAME_MS, start_sample: int = 0):
+        self.min_seconds = min_seconds
+        self.max_seconds = max_seconds
+        self.frame_ms = frame_ms
+        self.frame_bytes = SAMPLE_RATE * frame_ms // 1000 * BYTES_PER_SAMPLE
+        self.pause_frames = max(1, pause_ms // frame_ms)
+        self.overlap_bytes = SAMPLE_RATE * overlap_ms // 1000 * BYTES_PER_SAMPLE
+        self._buffer = bytearray()
+        self._buffer_start = start_sample  # sample offset of the first buffered byte
+        self._carried_bytes = 0  # leading overlap already sent with the previous segment
+
+    @property
+    def buffered_seconds(self) -> float:
+        return len(self._buffer) / BYTES_PER_SAMPLE / SAMPLE_RATE
+
+    @property
+    def position(self) -> int:
+        """Sample offset just past the last audio added"""
+        return self._buffer_start + len(self._buffer) // BYTES_PER_SAMPLE
+
+    @property
+    def has_new_audio(self) -> bool:
+        """Whether the buffer holds audio that hasn't been part of any segment yet"""
+        return len(self._buffer) - self._carried_bytes >= self.frame_bytes
+
+    def add(self, pcm: bytes) -> List[SpeechSegment]:
+        """Append audio and return any segments that are now complete"""
+        self._buffer.extend(pcm)
+        segments = []
+        while True:
+            cut = self._find_cut()
+            if cut is None:
+                break
+            segments.append(self._cut(cut, keep_overlap=True))
+        return segments
+
+    def flush(self) -> Optional[SpeechSegment]:
+        """Close whatever is buffered as a final segment (e.g. when the stream stops)"""
+        if not self.has_new_audio:
+            return None
+        return self._cut(len(self._buffer), keep_overlap=False)
+
+    def _find_cut(self) -> Optional[int]:
+        """Byte offset to close the current segment at, or None to keep buffering"""
+        if self.buffered_seconds < self.min_seconds:
+            return None
+
+        speech = classify_frames(bytes(self._buffer), self.frame_ms)
+        if not speech.any():
+            # Nothing worth transcribing yet; only let pure silence grow to max length
+            return len(self._buffer) if self.buffered_seconds >= self.max_seconds else None
+
+        # Utterance finished: cut in the middle of the trailing pause
+        max_frame = int(self.max_seconds * 1000 // self.frame_ms)
+        trailing_silence = len(speech) - 1 - int(np.flatnonzero(speech)[-1])
+        if trailing_silence >= self.pause_frames and len(speech) - trailing_silence // 2 <= max_frame:
+            return (len(speech) - trailing_silence // 2) * self.frame_bytes
+
+        if self.buffered_seconds < self.max_seconds:
+            return None
+
+        # Too long: cut at the middle of the latest pause between min and max length, else at max length
+        # (the buffer can hold much more than max_seconds when a large chunk arrives at once)
+        min_frame = int(self.min_seconds * 1000 // self.frame_ms)
+        silent = np.flatnonzero(~speech[min_frame:max_frame]) + min_frame
+        if len(silent):
+            runs = np.split(silent, np.flatnonzero(np.diff(silent) != 1) + 1)
+            run = max(runs, key=lambda r: (len(r) >= 3, r[-1]))
+            if len(run) >= 3:
+                return int(run[len(run) // 2]) * self.frame_bytes
+        return int(self.max_seconds * SAMPLE_RATE) * BYTES_PER_SAMPLE
+
+    def _cut(self, cut: int, keep_overlap: bool) -> SpeechSegment:
+        pcm = bytes(self._buffer[:cut])
+        start = self._buffer_start
+        segment = SpeechSegment(pcm, start, start + cut // BYTES_PER_SAMPLE)
+
+        keep_from = max(0, cut - self.overlap_bytes) if keep_overlap else cut
+        del self._buffer[:keep_from]
+        self._carried_bytes = cut - keep_from
+        self._buffer_start = start + keep_from // BYTES_PER_SAMPLE
+        return segment
+
+def _normalize_words(text: str) -> List[str]:
+    return [re.sub(r"[^\w']", "", word).lower() for word in text.split()]
+
+def strip_overlap(previous_text: str, text: str, max_words: int = OVERLAP_MAX_WORDS) -> str:
+    """
+    Removes words at the start of `text` that repeat the end of `previous_text`.
+
+    Consecutive segments share a little audio, so the model may transcribe the same
+    words twice; the longest repeated run (up to max_words) is dropped. At least one word
+    is always kept, since a segment that only repeats the last one was said again.
+    """
+    if not previous_text or not text:
+        return text
+
+    previous_words = _normalize_words(previous_text)[-max_words:]
+    words = text.split()
+    normalized = _normalize_words(text)
+    for size in range(min(len(previous_words), len(normalized) - 1), 0, -1):
+        if previous_words[-size:] == normalized[:size] and any(normalized[:size]):
+            return " ".join(words[size:])
+    return text
@@ -0,0 +1,480 @@
+import abc
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Where live and meeting sessions are kept: "memory" (lost on restart), "sqlite" or "redis"
+SESSION_STORE = os.getenv("SESSION_STORE", "memory").lower()
+
+# SQLite file for the "sqlite" backend
+SESSION_STORE_PATH = os.getenv("SESSION_STORE_PATH", os.path.join("cache", "sessions.sqlite3"))
+
+# Server URL for the "redis" backend ("local://" uses the in-process stand-in)
+SESSION_STORE_URL = os.getenv("SESSION_STORE_URL", "redis://localhost:6379/0")
+
+# Writes are queued and flushed in batches this often (0 writes through synchronously)
+SESSION_STORE_FLUSH_SECONDS = float(os.getenv("SESSION_STORE_FLUSH_SECONDS", "0.5"))
+
+# A batch is flushed early once this many writes are queued
+SESSION_STORE_MAX_BATCH = int(os.getenv("SESSION_STORE_MAX_BATCH", "500"))
+
+# A batch that fails this many flushes in a row is written one write at a time, and the
+# writes that still fail are logged and discarded, so one bad write can't hold up the rest
+SESSION_STORE_MAX_RETRIES = int(os.getenv("SESSION_STORE_MAX_RETRIES", "3"))
+
+# Most writes queued while the backend is failing; beyond this the oldest are discarded
+SESSION_STORE_MAX_PENDING = int(os.getenv("SESSION_STORE_MAX_PENDING", "10000"))
+
+# A queued write: (op, namespace, key, payload) where op is "save", "append" or "delete"
+Write = Tuple[str, str, str, object]
+
+class SessionStore(abc.ABC):
+    """
+    Persistence for session state.
+
+    Each (namespace, key) has a document, a dict whose fields are merged on save, and an
+    append-only list of items such as transcript segments or chat messages.
+    """
+
+    @abc.abstractmethod
+    def load(self, namespace: str, key: str) -> Optional[dict]:
+        """The document, or None if the key doesn't exist"""
+
+    @abc.abstractmethod
+    def save(self, namespace: str, key: str, fields: dict):
+        """Create the document or merge fields into it"""
+
+    @abc.abstractmethod
+    def append(self, namespace: str, key: str, items: List[dict]):
+        """Add items to the end of the key's list"""
+
+    @abc.abstractmethod
+    def items(self, namespace: str, key: str, start: int = 0) -> List[dict]:
+        """The key's items from index start on"""
+
+    @abc.abstractmethod
+    def delete(self, namespace: str, key: str):
+        """Remove the document and its items"""
+
+    @abc.abstractmethod
+    def keys(self, namespace: str) -> List[str]:
+        """Keys with a document in the namespace"""
+
+    def write_batch(self, writes: List[Write]):
+        """Apply queued writes in order (backends override this to use one round-trip)"""
+        for op, namespace, key, payload in writes:
+            if op == "save":
+                self.save(namespace, key, payload)
+            elif op == "append":
+                self.append(namespace, key, payload)
+            elif op == "delete":
+                self.delete(namespace, key)
+
+    def flush(self):
+        """Wait for queued writes to reach the backend (no-op for write-through stores)"""
+
+class InMemorySessionStore(SessionStore):
+    """Process-local store; the default, and what the server used before persistence existed"""
+
+    def __init__(self):
+        self._docs: Dict[Tuple[str, str], dict] = {}
+        self._items: Dict[Tuple[str, str], List[dict]] = {}
+        self._lock = threading.Lock()
+
+    def load(self, namespace, key):
+        with self._lock:
+            doc = self._docs.get((namespace, key))
+            return dict(doc) if doc is not None else None
+
+    def save(self, namespace, key, fields):
+        with self._lock:
+            self._docs.setdefault((namespace, key), {}).update(fields)
+
+    def append(self, namespace, key, items):
+        with self._lock:
+            self._items.setdefault((namespace, key), []).extend(items)
+
+    def items(self, namespace, key, start=0):
+        with self._lock:
+            return list(self._items.get((namespace, key), [])[start:])
+
+    def delete(self, namespace, key):
+        with self._lock:
+            self._docs.pop((namespace, key), None)
+            self._items.pop((namespace, key), None)
+
+    def keys(self, namespace):
+        with self._lock:
+            return [key for ns, key in self._docs if ns == namespace]
+
+class SQLiteSessionStore(SessionStore):
+    """Single-file store; survives restarts and can be shared by worker processes on one host"""
+
+    def __init__(self, path: str = SESSION_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS session_docs (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                doc TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS session_items (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                item TEXT NOT NULL,
+                PRIMARY KEY (namespace, key, idx)
+            )
+        """)
+        self._conn.commit()
+
+    def load(self, namespace, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT doc FROM session_docs WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def items(self, namespace, key, start=0):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT item FROM session_items WHERE namespace = ? AND key = ? AND idx >= ? ORDER BY idx",
+                (namespace, key, start)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def keys(self, namespace):
+        with self._lock:
+            rows = self._conn.execute("SELECT key FROM session_docs WHERE namespace = ?", (namespace,)).fetchall()
+        return [row[0] for row in rows]
+
+    def save(self, namespace, key, fields):
+        self.write_batch([("save", namespace, key, fields)])
+
+    def append(self, namespace, key, items):
+        self.write_batch([("append", namespace, key, items)])
+
+    def delete(self, namespace, key):
+        self.write_batch([("delete", namespace, key, None)])
+
+    def write_batch(self, writes):
+        """Apply all writes in one transaction"""
+        with self._lock:
+            try:
+                for op, namespace, key, payload in writes:
+                    if op == "save":
+                        row = self._conn.execute(
+                            "SELECT doc FROM session_docs WHERE namespace = ? AND key = ?", (namespace, key)
+                        ).fetchone()
+                        doc = json.loads(row[0]) if row else {}
+                        doc.update(payload)
+                        self._conn.execute(
+                            "INSERT OR REPLACE INTO session_docs (namespace, key, doc, updated_at) VALUES (?, ?, ?, ?)",
+                            (namespace, key, json.dumps(doc), time.time())
+                        )
+                    elif op == "append":
+                        next_idx = self._conn.execute(
+                            "SELECT COALESCE(MAX(idx) + 1, 0) FROM session_items WHERE namespace = ? AND key = ?",
+                            (namespace, key)
+                        ).fetchone()[0]
+                        self._conn.executemany(
+                            "INSERT INTO session_items (namespace, key, idx, item) VALUES (?, ?, ?, ?)",
+                            [(namespace, key, next_idx + i, json.dumps(item)) for i, item in enumerate(payload)]
+                        )
+                    elif op == "delete":
+                        self._conn.execute("DELETE FROM session_docs WHERE namespace = ? AND key = ?", (namespace, key))
+                        self._conn.execute("DELETE FROM session_items WHERE namespace = ? AND key = ?", (namespace, key))
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+
+class RedisSessionStore(SessionStore):
+    """
+    Store on a Redis server (or anything speaking the same commands, such as LocalRedis).
+
+    Documents are hashes of JSON-encoded fields, items are lists, and each namespace keeps
+    a set of its keys.
+    """
+
+    def __init__(self, client, prefix: str = "transcriber:"):
+        self.client = client
+        self.prefix = prefix
+
+    def _doc_key(self, namespace, key):
+        return f"{self.prefix}{namespace}:{key}"
+
+    def _items_key(self, namespace, key):
+        return f"{self.prefix}{namespace}:{key}:items"
+
+    def _index_key(self, namespace):
+        return f"{self.prefix}{namespace}"
+
+    @staticmethod
+    def _text(value) -> str:
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+
+    def load(self, namespace, key):
+        doc = self.client.hgetall(self._doc_key(namespace, key))
+        if not doc:
+            return None
+        return {self._text(field): json.loads(self._text(value)) for field, value in doc.items()}
+
+    def items(self, namespace, key, start=0):
+        return [json.loads(self._text(item)) for item in self.client.lrange(self._items_key(namespace, key), start, -1)]
+
+    def keys(self, namespace):
+        return [self._text(key) for key in self.client.smembers(self._index_key(namespace))]
+
+    def save(self, namespace, key, fields):
+        self.write_batch([("save", namespace, key, fields)])
+
+    def append(self, namespace, key, items):
+        self.write_batch([("append", namespace, key, items)])
+
+    def delete(self, namespace, key):
+        self.write_batch([("delete", namespace, key, None)])
+
+    def write_batch(self, writes):
+        """Send all writes in one pipeline"""
+        pipe = self.client.pipeline()
+        for op, namespace, key, payload in writes:
+            if op == "save":
+                if payload:
+                    pipe.hset(self._doc_key(namespace, key),
+                              mapping={field: json.dumps(value) for field, value in payload.items()})
+                pipe.sadd(self._index_key(namespace), key)
+            elif op == "append":
+                if payload:
+                    pipe.rpush(self._items_key(namespace, key), *[json.dumps(item) for item in payload])
+            elif op == "delete":
+                pipe.delete(self._doc_key(namespace, key), self._items_key(namespace, key))
+                pipe.srem(self._index_key(namespace), key)
+        pipe.execute()
+
+class LocalRedis:
+    """
+    In-process stand-in for the few Redis commands RedisSessionStore uses.
+
+    Lets the Redis backend be exercised (and run for local development) without a server.
+    """
+
+    def __init__(self):
+        self._data: Dict[str, object] = {}
+        self._lock = threading.RLock()
+
+    def hset(self, name, mapping):
+        with self._lock:
+            self._data.setdefault(name, {}).update(mapping)
+
+    def hgetall(self, name):
+        with self._lock:
+            return dict(self._data.get(name, {}))
+
+    def rpush(self, name, *values):
+        with self._lock:
+            self._data.setdefault(name, []).extend(values)
+
+    def lrange(self, name, start, end):
+        with self._lock:
+            values = self._data.get(name, [])
+            return list(values[start:] if end == -1 else values[start:end + 1])
+
+    def sadd(self, name, *values):
+        with self._lock:
+            self._data.setdefault(name, set()).update(values)
+
+    def srem(self, name, *values):
+        with self._lock:
+            self._data.get(name, set()).difference_update(values)
+
+    def smembers(self, name):
+        with self._lock:
+            return set(self._data.get(name, set()))
+
+    def delete(self, *names):
+        with self._lock:
+            for name in names:
+                self._data.pop(name, None)
+
+    def pipeline(self):
+        return _LocalRedisPipeline(self)
+
+class _LocalRedisPipeline:
+    """Queues commands and runs them together on execute(), like redis-py's pipeline"""
+
+    def __init__(self, client: LocalRedis):
+        self._client = client
+        self._commands = []
+
+    def __getattr__(self, name):
+        def queue_command(*args, **kwargs):
+            self._commands.append((name, args, kwargs))
+            return self
+        return queue_command
+
+    def execute(self):
+        with self._client._lock:
+            results = [getattr(self._client, name)(*args, **kwargs) for name, args, kwargs in self._commands]
+        self._commands = []
+        return results
+
+class WriteBehindSessionStore(SessionStore):
+    """
+    Queues writes in memory and flushes them to another store in batches on a background thread.
+
+    Callers on hot paths (committing a live segment) never wait for storage. Consecutive
+    writes to the same key are merged before flushing. Reads flush the queue first so they
+    always see earlier writes (unless the backend is failing; see flush).
+    """
+
+    def __init__(self, backend: SessionStore, flush_seconds: float = SESSION_STORE_FLUSH_SECONDS,
+                 max_batch: int = SESSION_STORE_MAX_BATCH, max_retries: int = SESSION_STORE_MAX_RETRIES,
+                 max_pending: int = SESSION_STORE_MAX_PENDING):
+        self.backend = backend
+        self.flush_seconds = flush_seconds
+        self.max_batch = max_batch
+        self.max_retries = max_retries
+        self.max_pending = max_pending
+        self._pending: List[Write] = []
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._failed_batch: List[Write] = []  # retried ahead of newer writes
+        self._batch_failures = 0
+        self.batches_flushed = 0
+        self.writes_flushed = 0
+        self.writes_discarded = 0
+
+        self._thread = threading.Thread(target=self._flush_loop, name="session-store-writer")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _enqueue(self, write: Write):
+        with self._condition:
+            op, namespace, key, payload = write
+            last = self._pending[-1] if self._pending else None
+            if last and last[0] == op and last[1] == namespace and last[2] == key and op != "delete":
+                merged = {**last[3], **payload} if op == "save" else last[3] + payload
+                self._pending[-1] = (op, namespace, key, merged)
+            else:
+                self._pending.append(write)
+                if len(self._pending) > self.max_pending:
+                    dropped = self._pending.pop(0)
+                    self.writes_discarded += 1
+                    print(f"Session store queue full, discarded {dropped[0]} of {dropped[1]}/{dropped[2]}")
+            if len(self._pending) >= self.max_batch:
+                self._condition.notify()
+
+    def save(self, namespace, key, fields):
+        self._enqueue(("save", namespace, key, dict(fields)))
+
+    def append(self, namespace, key, items):
+        self._enqueue(("append", namespace, key, list(items)))
+
+    def delete(self, namespace, key):
+        self._enqueue(("delete", namespace, key, None))
+
+    def load(self, namespace, key):
+        self.flush()
+        return self.backend.load(namespace, key)
+
+    def items(self, namespace, key, start=0):
+        self.flush()
+        return self.backend.items(namespace, key, start)
+
+    def keys(self, namespace):
+        self.flush()
+        return self.backend.keys(namespace)
+
+    def flush(self):
+        """
+        Write everything queued so far to the backend.
+
+        A failed batch is kept and retried first on the next flush. Once it has failed
+        max_retries times it is written one write at a time, and writes that fail on their
+        own are logged and discarded.
+        """
+        with self._flush_lock:
+            with self._condition:
+                writes, self._pending = self._failed_batch + self._pending, []
+            self._failed_batch = []
+            if not writes:
+                return
+            try:
+                self.backend.write_batch(writes)
+                self.batches_flushed += 1
+                self.writes_flushed += len(writes)
+                self._batch_failures = 0
+                return
+            except Exception as e:
+                self._batch_failures += 1
+                error = e
+            if self._batch_failures < self.max_retries:
+                print(f"Error flushing {len(writes)} session store write(s), will retry: {error}")
+                self._failed_batch = writes
+                return
+
+            print(f"Flushing {len(writes)} session store write(s) failed {self._batch_failures} times "
+                  f"({error}), writing them one at a time")
+            self._batch_failures = 0
+            for write in writes:
+                try:
+                    self.backend.write_batch([write])
+                    self.writes_flushed += 1
+                except Exception as e:
+                    self.writes_discarded += 1
+                    print(f"Discarded session store {write[0]} of {write[1]}/{write[2]}: {e}")
+
+    def _flush_loop(self):
+        while True:
+            with self._condition:
+                self._condition.wait(timeout=self.flush_seconds)
+            self.flush()
+
+def create_session_store(backend: str = SESSION_STORE) -> SessionStore:
+    """Build the configured backend, wrapped for write-behind unless SESSION_STORE_FLUSH_SECONDS is 0"""
+    if backend == "sqlite":
+        store = SQLiteSessionStore(SESSION_STORE_PATH)
+    elif backend == "redis":
+        if SESSION_STORE_URL.startswith("local://"):
+            client = LocalRedis()
+        else:
+            import redis
+            client = redis.Redis.from_url(SESSION_STORE_URL)
+        store = RedisSessionStore(client)
+    else:
+        return InMemorySessionStore()
+
+    if SESSION_STORE_FLUSH_SECONDS > 0:
+        store = WriteBehindSessionStore(store)
+        atexit.register(store.flush)
+    print(f"Session store: {backend}")
+    return store
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_session_store() -> SessionStore:
+    """The process-wide session store"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = create_session_store()
+    return _store
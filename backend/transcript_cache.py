@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import BinaryIO, Optional
+from dotenv import load_dotenv
+from transcription import TRANSCRIPTION_MODEL, TRANSCRIPTION_PROMPT_VERSION
+
+load_dotenv()
+
+# Set to "false" to always transcribe uploads, even ones seen before
+TRANSCRIPT_CACHE_ENABLED = os.getenv("TRANSCRIPT_CACHE_ENABLED", "true").lower() == "true"
+
+# SQLite file holding cached transcripts and analyses
+TRANSCRIPT_CACHE_PATH = os.getenv("TRANSCRIPT_CACHE_PATH", os.path.join("cache", "transcripts.sqlite3"))
+
+# Least recently used entries are evicted once the cache grows past this size
+TRANSCRIPT_CACHE_MAX_BYTES = int(os.getenv("TRANSCRIPT_CACHE_MAX_BYTES", str(500 * 1024 * 1024)))
+
+# Entries older than this are discarded regardless of use
+TRANSCRIPT_CACHE_MAX_AGE_DAYS = float(os.getenv("TRANSCRIPT_CACHE_MAX_AGE_DAYS", "30"))
+
+def save_stream_with_hash(stream: BinaryIO, dest_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Copies an upload stream to dest_path, hashing the bytes on the way.
+
+    Returns:
+        The SHA-256 hex digest of the content
+    """
+    digest = hashlib.sha256()
+    with open(dest_path, 'wb') as f:
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+            f.write(chunk)
+    return digest.hexdigest()
+
+def make_cache_key(audio_hash: str) -> str:
+    """Cache key for an audio hash under the current transcription model and prompt"""
+    return f"{audio_hash}:{TRANSCRIPTION_MODEL}:{TRANSCRIPTION_PROMPT_VERSION}"
+
+class TranscriptCache:
+    """Persistent, content-addressed store of transcripts and their analysis"""
+
+    def __init__(self, path: str = TRANSCRIPT_CACHE_PATH,
+                 max_bytes: int = TRANSCRIPT_CACHE_MAX_BYTES,
+                 max_age_days: float = TRANSCRIPT_CACHE_MAX_AGE_DAYS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_days * 86400
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS transcripts (
+                cache_key TEXT PRIMARY KEY,
+                transcript TEXT NOT NULL,
+                analysis TEXT,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_transcripts_last_access ON transcripts (last_access)")
+        self._conn.commit()
+
+    def get(self, cache_key: str) -> Optional[dict]:
+        """
+        Look up a cached entry.
+
+        Returns:
+            {'transcript': str, 'analysis': dict or None}, or None on a miss
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT transcript, analysis, created_at FROM transcripts WHERE cache_key = ?",
+                (cache_key,)
+            ).fetchone()
+            if not row:
+                return None
+
+            transcript, analysis, created_at = row
+            if now - created_at > self.max_age_seconds:
+                self._conn.execute("DELETE FROM transcripts WHERE cache_key = ?", (cache_key,))
+                self._conn.commit()
+                return None
+
+            self._conn.execute("UPDATE transcripts SET last_access = ? WHERE cache_key = ?", (now, cache_key))
+            self._conn.commit()
+
+        return {
+            'transcript': transcript,
+            'analysis': json.loads(analysis) if analysis else None
+        }
+
+    def put(self, cache_key: str, transcript: str, analysis: Optional[dict] = None):
+        """Store a transcript, and optionally its analysis, then enforce the size and age limits"""
+        analysis_json = json.dumps(analysis) if analysis else None
+        size = len(transcript.encode('utf-8')) + len(analysis_json.encode('utf-8') if analysis_json else b"")
+        now = time.time()
+        with self._lock:
+            self._conn.execute("""
+                INSERT INTO transcripts (cache_key, transcript, analysis, size, created_at, last_access)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(cache_key) DO UPDATE SET
+                    transcript = excluded.transcript,
+                    analysis = COALESCE(excluded.analysis, transcripts.analysis),
+                    size = length(CAST(excluded.transcript AS BLOB))
+                        + COALESCE(length(CAST(COALESCE(excluded.analysis, transcripts.analysis) AS BLOB)), 0),
+                    last_access = excluded.last_access
+            """, (cache_key, transcript, analysis_json, size, now, now))
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Drop expired entries, then least recently used ones until under max_bytes (caller holds the lock)"""
+        self._conn.execute("DELETE FROM transcripts WHERE created_at < ?", (time.time() - self.max_age_seconds,))
+
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM transcripts").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        evicted = []
+        for cache_key, size in self._conn.execute("SELECT cache_key, size FROM transcripts ORDER BY last_access"):
+            if total <= self.max_bytes:
+                break
+            evicted.append((cache_key,))
+            total -= size
+        self._conn.executemany("DELETE FROM transcripts WHERE cache_key = ?", evicted)
+        print(f"Evicted {len(evicted)} transcript cache entr{'y' if len(evicted) == 1 else 'ies'}")
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_transcript_cache() -> Optional[TranscriptCache]:
+    """The process-wide transcript cache, or None when caching is disabled"""
+    global _cache
+    if not TRANSCRIPT_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = TranscriptCache()
+    return _cache
@@ -0,0 +1,58 @@
+import os
+import threading
+from typing import Dict, List
+from flask_socketio import SocketIO
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Live transcript updates committed within this window go out as one transcript_update
+# event; 0 emits every update the moment it is committed
+LIVE_PUSH_COALESCE_MS = int(os.getenv("LIVE_PUSH_COALESCE_MS", "0"))
+
+class TranscriptPublisher:
+    """Pushes committed live transcript updates to each session's Socket.IO room"""
+
+    def __init__(self, socketio: SocketIO, coalesce_ms: int = LIVE_PUSH_COALESCE_MS):
+        self.socketio = socketio
+        self.coalesce_seconds = coalesce_ms / 1000
+        self._pending: Dict[str, List[dict]] = {}
+        self._lock = threading.Lock()
+        self.events_emitted = 0
+        self.updates_published = 0
+
+    def publish(self, session_id: str, update: dict):
+        """Send an update now, or hold it until the session's coalescing window closes"""
+        if self.coalesce_seconds <= 0:
+            self._emit(session_id, [update])
+            return
+
+        with self._lock:
+            pending = self._pending.get(session_id)
+            if pending is not None:
+                pending.append(update)
+                return
+            self._pending[session_id] = [update]
+
+        # First update of a window: the timer sends everything that arrives until it fires
+        timer = threading.Timer(self.coalesce_seconds, self.flush, args=(session_id,))
+        timer.daemon = True
+        timer.start()
+
+    def flush(self, session_id: str):
+        """Send a session's held updates immediately"""
+        with self._lock:
+            updates = self._pending.pop(session_id, None)
+        if updates:
+            self._emit(session_id, updates)
+
+    def _emit(self, session_id: str, updates: List[dict]):
+        self.events_emitted += 1
+        self.updates_published += len(updates)
+        try:
+            self.socketio.emit('transcript_update', {
+                'session_id': session_id,
+                'updates': updates
+            }, room=f"session_{session_id}")
+        except Exception as e:
+            print(f"Error pushing transcript updates for session {session_id}: {e}")
@@ -1,91 +1,44 @@
 from google import genai
 from google.genai.types import GenerateContentConfig, Part,HttpOptions
 import os
+from typing import Callable, Optional
 from dotenv import load_dotenv
-from google.cloud import storage
-import uuid
+from gcs_storage import upload_to_gcs, delete_from_gcs
 
 load_dotenv()
 
-def upload_to_gcs(local_file_path: str, project_id: str) -> str:
-    """
-    Uploads a file to Google Cloud Storage and returns the gs:// URI.
-    
-    Args:
-        local_file_path: Path to the local file
-        project_id: Google Cloud Project ID
-        
-    Returns:
-        The gs:// URI of the uploaded file
-    """
-    # Create a unique bucket name for this project if it doesn't exist
-    bucket_name = f"{project_id}-transcriber-temp"
-    
-    # Initialize the storage client
-    storage_client = storage.Client(project=project_id)
-    
-    try:
-        # Try to get the bucket, create if it doesn't exist
-        try:
-            bucket = storage_client.bucket(bucket_name)
-            bucket.reload()  # Check if bucket exists
-        except Exception:
-            # Create bucket if it doesn't exist
-            bucket = storage_client.create_bucket(bucket_name)
-            print(f"Created bucket: {bucket_name}")
-    except Exception as e:
-        print(f"Error with bucket {bucket_name}: {e}")
-        # Fallback to a more unique bucket name
-        bucket_name = f"{project_id}-transcriber-{uuid.uuid4().hex[:8]}"
-        bucket = storage_client.create_bucket(bucket_name)
-        print(f"Created fallback bucket: {bucket_name}")
-    
-    # Generate a unique object name
-    file_extension = os.path.splitext(local_file_path)[1]
-    object_name = f"audio-{uuid.uuid4().hex}{file_extension}"
-    
-    # Upload the file
-    blob = bucket.blob(object_name)
-    blob.upload_from_filename(local_file_path)
-    
-    gs_uri = f"gs://{bucket_name}/{object_name}"
-    print(f"File uploaded to: {gs_uri}")
-    
-    return gs_uri
+TRANSCRIPTION_MODEL = "gemini-2.5-flash-preview-05-20"
 
-def delete_from_gcs(gs_uri: str, project_id: str):
-    """
-    Deletes a file from Google Cloud Storage.
-    
-    Args:
-        gs_uri: The gs:// URI of the file to delete
-        project_id: Google Cloud Project ID
-    """
-    try:
-        # Parse the gs:// URI
-        if not gs_uri.startswith("gs://"):
-            return
-            
-        uri_parts = gs_uri[5:].split("/", 1)  # Remove gs:// and split
-        bucket_name = uri_parts[0]
-        object_name = uri_parts[1]
-        
-        storage_client = storage.Client(project=project_id)
-        bucket = storage_client.bucket(bucket_name)
-        blob = bucket.blob(object_name)
-        blob.delete()
-        
-        print(f"Deleted file: {gs_uri}")
-    except Exception as e:
-        print(f"Warning: Could not delete file {gs_uri}: {e}")
+# Part of the transcript cache key; bump it whenever TRANSCRIPTION_PROMPT changes
+TRANSCRIPTION_PROMPT_VERSION = "1"
+
+TRANSCRIPTION_PROMPT = """Please transcribe this meeting audio with the following structure:
 
-def transcribe_audio(audio_file_path: str, mime_type: str) -> str:
+1. First, identify the main topics/chapters discussed in the meeting
+2. For each chapter, provide:
+   - Chapter title and time range (e.g., "Opening Remarks (00:00 - 03:00)")
+   - Detailed transcription with timestamps, speakers, and content
+3. Format each speaker's dialogue with proper timestamps
+4. Use clear section breaks between chapters
+
+Structure your response as:
+
+CHAPTER: [Chapter Title] ([Start Time] - [End Time])
+[Detailed transcription for this chapter with timestamps and speakers]
+
+CHAPTER: [Next Chapter Title] ([Start Time] - [End Time])  
+[Detailed transcription for this chapter with timestamps and speakers]
+
+Use speaker A, speaker B, etc. to identify speakers consistently throughout."""
+
+def transcribe_audio(audio_file_path: str, mime_type: str, progress_callback: Optional[Callable[[str], None]] = None) -> str:
     """
     Transcribes the given audio file using the Gemini API via Vertex AI.
 
     Args:
         audio_file_path: Path to the audio file.
         mime_type: The MIME type of the audio file (e.g., "audio/mpeg", "audio/wav").
+        progress_callback: Optional callable invoked with "uploaded" once the file is in GCS.
 
     Returns:
         The transcribed text.
@@ -110,34 +63,20 @@ def transcribe_audio(audio_file_path: str, mime_type: str) -> str:
         # Upload file to Google Cloud Storage first
         print(f"Uploading file to Google Cloud Storage: {audio_file_path}")
         gs_uri = upload_to_gcs(audio_file_path, project_id)
+        if progress_callback:
+            progress_callback("uploaded")
         
         # Initialize the Vertex AI client
         main_client = genai.Client(http_options=HttpOptions(api_version="v1"))
 
-        prompt = """Please transcribe this meeting audio with the following structure:
-
-1. First, identify the main topics/chapters discussed in the meeting
-2. For each chapter, provide:
-   - Chapter title and time range (e.g., "Opening Remarks (00:00 - 03:00)")
-   - Detailed transcription with timestamps, speakers, and content
-3. Format each speaker's dialogue with proper timestamps
-4. Use clear section breaks between chapters
-
-Structure your response as:
-
-CHAPTER: [Chapter Title] ([Start Time] - [End Time])
-[Detailed transcription for this chapter with timestamps and speakers]
 
-CHAPTER: [Next Chapter Title] ([Start Time] - [End Time])  
-[Detailed transcription for this chapter with timestamps and speakers]
-
-Use speaker A, speaker B, etc. to identify speakers consistently throughout."""
+        prompt = TRANSCRIPTION_PROMPT
 
         # Use Part.from_uri with the gs:// URI for Vertex AI
         print(f"Using Vertex AI with gs:// URI: {gs_uri}")
         
         response = main_client.models.generate_content(
-            model="gemini-2.5-flash-preview-05-20",
+            model=TRANSCRIPTION_MODEL,
             contents=[
                 prompt,
                 Part.from_uri(file_uri=gs_uri, mime_type=mime_type)
@@ -169,7 +108,7 @@ Use speaker A, speaker B, etc. to identify speakers consistently throughout."""
             delete_from_gcs(gs_uri, project_id)
         
         # Try with the specific model version as fallback
-        print("Retrying with specific model version: models/gemini-2.5-flash-preview-05-20")
+        print(f"Retrying with specific model version: models/{TRANSCRIPTION_MODEL}")
         gs_uri_retry = None
         try:
             # Re-upload for the retry
@@ -177,9 +116,9 @@ Use speaker A, speaker B, etc. to identify speakers consistently throughout."""
             gs_uri_retry = upload_to_gcs(audio_file_path, project_id)
 
             response_retry = main_client.models.generate_content(
-                model="gemini-2.5-flash-preview-05-20",
+                model=TRANSCRIPTION_MODEL,
                 contents=[
-                    prompt,
+                    TRANSCRIPTION_PROMPT,
                     Part.from_uri(file_uri=gs_uri_retry, mime_type=mime_type)
                 ],
                 config=GenerateContentConfig(audio_timestamp=True),
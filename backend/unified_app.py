@@ -1,24 +1,30 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, redirect, stream_with_context
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit, join_room, leave_room
 import threading
-import time
 import os
-import tempfile
+import json
 import uuid
+import tempfile
 from dotenv import load_dotenv
 import google.generativeai as genai
 from werkzeug.utils import secure_filename
-from langchain.memory import ConversationBufferMemory
 
 # Import project modules
 from live_transcription import LiveTranscriptionManager
-from transcription import transcribe_audio
+from audio_frames import decode_audio_message
+from audio_codecs import LIVE_AUDIO_FORMATS
+from gcs_storage import start_orphan_sweep
+from cluster import LIVE_WORKER_INDEX, LIVE_WORKER_URLS, SOCKETIO_MESSAGE_QUEUE, owns_session, session_owner_url
+from meeting_sessions import MeetingSessions
+from jobs import JobManager, JobQueueFullError
+from transcript_cache import get_transcript_cache, make_cache_key, save_stream_with_hash
+from chunked_transcription import transcribe_meeting_audio
 from llm_utils import (
-    generate_meeting_takeaways,
-    generate_meeting_summary,
-    generate_meeting_notes,
-    get_chat_response
+    generate_meeting_analysis,
+    get_chat_response,
+    stream_chat_response,
+    summarize_chat_history
 )
 
 # Load environment variables
@@ -47,14 +53,27 @@ socketio = SocketIO(
     transports=['polling', 'websocket'],  # Try polling first
     allow_upgrades=True,
     always_connect=False,
-    manage_session=False  # Let client manage sessions
+    manage_session=False,  # Let client manage sessions
+    async_handlers=False,  # One client's events run in the order sent, so audio frames arrive in seq order
+    message_queue=SOCKETIO_MESSAGE_QUEUE or None  # Shared by all workers when scaled out
 )
 
 # Initialize live transcription manager
 transcription_manager = LiveTranscriptionManager(socketio)
 
-# Store memory sessions per meeting (for chat functionality)
-meeting_sessions = {}
+# Remove temp audio that earlier runs left behind in GCS
+if os.getenv("GOOGLE_CLOUD_PROJECT"):
+    start_orphan_sweep(os.getenv("GOOGLE_CLOUD_PROJECT"))
+
+# Background jobs for file transcription
+job_manager = JobManager(socketio)
+
+# Meetings available for chat, kept in the session store (see SESSION_STORE)
+meeting_sessions = MeetingSessions(summarizer=summarize_chat_history)
+
+# Chat answers being streamed to Socket.IO clients, so a disconnect can cancel them: sid -> {request_id: Event}
+chat_streams = {}
+chat_streams_lock = threading.Lock()
 
 # Helper functions for meeting analysis
 SUPPORTED_AUDIO_TYPES = {
@@ -166,25 +185,102 @@ def error_handler(e):
     except Exception as handler_error:
         print(f'Error in error handler: {handler_error}')
 
-# Start the update broadcasting thread
-def broadcast_updates():
-    """Periodically broadcast transcript updates"""
-    while True:
-        try:
-            transcription_manager.broadcast_transcript_updates()
-            time.sleep(1)  # Broadcast every second
-        except Exception as e:
-            print(f"Error broadcasting updates: {e}")
-            time.sleep(5)  # Wait longer on error to avoid spam
-
-# Start broadcast thread with proper error handling
-try:
-    broadcast_thread = threading.Thread(target=broadcast_updates)
-    broadcast_thread.daemon = True
-    broadcast_thread.start()
-    print("Broadcast thread started successfully")
-except Exception as e:
-    print(f"Failed to start broadcast thread: {e}")
+def redirect_to_owner(session_id):
+    """
+    When another worker runs the session's pipeline, send the request there (307 keeps the
+    method and body). Returns None when this worker owns the session.
+    """
+    if owns_session(session_id):
+        return None
+    return redirect(f"{session_owner_url(session_id)}{request.full_path.rstrip('?')}", code=307)
+
+def emit_wrong_worker(session_id) -> bool:
+    """Tell a streaming client to reconnect to the session's owner; True if it was told"""
+    if owns_session(session_id):
+        return False
+    try:
+        emit('wrong_worker', {
+            'session_id': session_id,
+            'worker_url': session_owner_url(session_id)
+        })
+    except:
+        pass
+    return True
+
+def emit_chat_event(event: str, session_id: str, data: dict):
+    """Send a chat streaming event to everyone in the meeting's room"""
+    try:
+        socketio.emit(event, {'session_id': session_id, **data}, room=f"meeting_{session_id}")
+    except:
+        pass
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def stream_chat_answer(session_id: str, question: str, request_id: str, cancelled: threading.Event = None):
+    """
+    Answer a chat question as it is generated, yielding the pieces of text and mirroring them
+    to the meeting's room as chat_token events (then chat_done, chat_error or chat_cancelled).
+
+    Closing the generator, or setting `cancelled`, stops the model request; the answer is only
+    saved to chat memory when it completes.
+    """
+    session = meeting_sessions[session_id]
+    cached_context, passages = meeting_sessions.get_chat_context(session_id, question)
+    chunks = stream_chat_response(
+        transcript=session['transcript'],
+        user_question=question,
+        memory=session['memory'],
+        passages=passages,
+        cached_context=cached_context
+    )
+
+    emit_chat_event('chat_started', session_id, {'request_id': request_id, 'question': question})
+    answer = []
+    outcome = 'chat_cancelled'
+    try:
+        for text in chunks:
+            if cancelled is not None and cancelled.is_set():
+                break
+            answer.append(text)
+            emit_chat_event('chat_token', session_id, {'request_id': request_id, 'text': text})
+            yield text
+        else:
+            outcome = 'chat_done'
+    except Exception as e:
+        outcome = 'chat_error'
+        emit_chat_event('chat_error', session_id, {'request_id': request_id, 'error': str(e)})
+        raise
+    finally:
+        # Also runs when the consumer closes the generator because its client went away
+        chunks.close()
+        if outcome == 'chat_done':
+            emit_chat_event('chat_done', session_id, {'request_id': request_id, 'response': "".join(answer)})
+        elif outcome == 'chat_cancelled':
+            print(f"Chat answer {request_id} for meeting {session_id} cancelled")
+            emit_chat_event('chat_cancelled', session_id, {'request_id': request_id})
+
+def run_chat_stream(client_id: str, session_id: str, question: str, request_id: str, cancelled: threading.Event):
+    """Generate a chat answer asked over Socket.IO in the background; it reaches clients through the room"""
+    try:
+        for _ in stream_chat_answer(session_id, question, request_id, cancelled):
+            pass
+    except Exception as e:
+        print(f"Error streaming chat answer {request_id}: {e}")
+    finally:
+        with chat_streams_lock:
+            streams = chat_streams.get(client_id, {})
+            streams.pop(request_id, None)
+            if not streams:
+                chat_streams.pop(client_id, None)
+
+def cancel_chat_streams(client_id: str, request_id: str = None):
+    """Stop a client's streaming chat answer, or all of them; each stops at its next piece of text"""
+    with chat_streams_lock:
+        streams = chat_streams.get(client_id, {})
+        events = list(streams.values()) if request_id is None else [streams[request_id]] if request_id in streams else []
+    for event in events:
+        event.set()
 
 # =============================================================================
 # REST API Endpoints
@@ -210,6 +306,7 @@ def create_session():
         return jsonify({
             'success': True,
             'session_id': session_id,
+            'worker_url': session_owner_url(session_id),
             'message': 'Session created successfully'
         }), 200
     except Exception as e:
@@ -222,6 +319,10 @@ def create_session():
 def enable_session_sharing(session_id):
     """Enable sharing for a session"""
     try:
+        owner = redirect_to_owner(session_id)
+        if owner:
+            return owner
+        
         success = transcription_manager.enable_sharing(session_id)
         if success:
             # Broadcast session status update to all clients in the session room
@@ -256,6 +357,10 @@ def enable_session_sharing(session_id):
 def disable_session_sharing(session_id):
     """Disable sharing for a session"""
     try:
+        owner = redirect_to_owner(session_id)
+        if owner:
+            return owner
+        
         success = transcription_manager.disable_sharing(session_id)
         if success:
             # Broadcast session status update to all clients in the session room
@@ -336,14 +441,15 @@ def get_shared_session_info(session_id):
 
 @app.route('/api/shared/<session_id>/transcript', methods=['GET'])
 def get_shared_session_transcript(session_id):
-    """Get transcript for a shared session (for viewers)"""
+    """Get transcript for a shared session (for viewers); ?since=<seq> returns only newer segments"""
     try:
-        transcript = transcription_manager.get_shared_session_transcript(session_id)
-        if transcript is not None:
+        since = request.args.get('since', type=int)
+        state = transcription_manager.get_shared_session_transcript_state(session_id, since)
+        if state is not None:
             return jsonify({
                 'success': True,
                 'session_id': session_id,
-                'transcript': transcript
+                **state
             }), 200
         else:
             return jsonify({
@@ -360,6 +466,10 @@ def get_shared_session_transcript(session_id):
 def delete_session(session_id):
     """Delete a transcription session"""
     try:
+        owner = redirect_to_owner(session_id)
+        if owner:
+            return owner
+        
         # Get session info before deletion for broadcasting
         share_info = transcription_manager.get_share_info(session_id)
         
@@ -392,14 +502,37 @@ def delete_session(session_id):
 
 @app.route('/api/sessions/<session_id>/transcript', methods=['GET'])
 def get_session_transcript(session_id):
-    """Get the full transcript for a session"""
+    """Get the full transcript for a session; ?since=<seq> returns only the segments after that seq"""
+    try:
+        since = request.args.get('since', type=int)
+        state = transcription_manager.get_session_transcript_state(session_id, since)
+        if state is not None:
+            return jsonify({
+                'success': True,
+                'session_id': session_id,
+                **state
+            }), 200
+        else:
+            return jsonify({
+                'success': False,
+                'error': 'Session not found'
+            }), 404
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/sessions/<session_id>/stats', methods=['GET'])
+def get_session_stats(session_id):
+    """Get model-call statistics for a session (calls made and calls saved by VAD)"""
     try:
-        transcript = transcription_manager.get_session_transcript(session_id)
-        if transcript is not None:
+        stats = transcription_manager.get_session_stats(session_id)
+        if stats is not None:
             return jsonify({
                 'success': True,
                 'session_id': session_id,
-                'transcript': transcript
+                'stats': stats
             }), 200
         else:
             return jsonify({
@@ -412,10 +545,28 @@ def get_session_transcript(session_id):
             'error': str(e)
         }), 500
 
+@app.route('/api/live/stats', methods=['GET'])
+def get_live_pool_stats():
+    """Get utilization of the worker pool that transcribes all live sessions"""
+    try:
+        return jsonify({
+            'success': True,
+            'stats': transcription_manager.get_pool_stats()
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @app.route('/api/sessions/<session_id>/start', methods=['POST'])
 def start_session(session_id):
     """Start a transcription session"""
     try:
+        owner = redirect_to_owner(session_id)
+        if owner:
+            return owner
+        
         success = transcription_manager.start_session(session_id)
         if success:
             # Broadcast session status update to all clients in the session room
@@ -448,6 +599,10 @@ def start_session(session_id):
 def stop_session(session_id):
     """Stop a transcription session"""
     try:
+        owner = redirect_to_owner(session_id)
+        if owner:
+            return owner
+        
         success = transcription_manager.stop_session(session_id)
         if success:
             # Broadcast session status update to all clients in the session room
@@ -477,61 +632,141 @@ def stop_session(session_id):
         }), 500
 
 # Meeting Analysis API Endpoints
+def save_uploaded_audio():
+    """
+    Validates the 'audio' upload and saves it to a temp file.
+
+    Returns:
+        (tmp_file_path, filename, mime_type, audio_hash), or (None, error_message, None, None)
+        if the upload is invalid
+    """
+    if 'audio' not in request.files:
+        return None, 'No audio file provided', None, None
+    
+    audio_file = request.files['audio']
+    if audio_file.filename == '':
+        return None, 'No file selected', None, None
+    
+    # Secure the filename
+    filename = secure_filename(audio_file.filename)
+    
+    # Save uploaded file temporarily, hashing it for the transcript cache as it streams to disk
+    with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(filename)[1]) as tmp_file:
+        tmp_file_path = tmp_file.name
+    audio_hash = save_stream_with_hash(audio_file.stream, tmp_file_path)
+    
+    # Get MIME type
+    mime_type = get_mime_type(filename, audio_file.content_type)
+    return tmp_file_path, filename, mime_type, audio_hash
+
+def process_meeting_audio(tmp_file_path: str, mime_type: str, filename: str, audio_hash: str = None,
+                          progress_callback=None) -> dict:
+    """
+    Runs the transcribe -> analyze pipeline for an uploaded file and creates a chat session.
+
+    Results are looked up in and saved to the transcript cache by audio_hash, so re-uploads
+    of the same recording skip the model calls. Reports "uploaded", "transcribed" and
+    "analyzed" to progress_callback as stages finish, cache hit or not. Raises RuntimeError
+    if transcription fails.
+    """
+    cache = get_transcript_cache() if audio_hash else None
+    cache_key = make_cache_key(audio_hash) if cache else None
+    cached = cache.get(cache_key) if cache else None
+    
+    try:
+        if cached:
+            print(f"Transcript cache hit for {filename} ({audio_hash[:12]})")
+            transcript = cached['transcript']
+            # Same stages as a fresh transcription, so clients tracking progress see no gap
+            if progress_callback:
+                progress_callback('uploaded')
+        else:
+            # Transcribe
+            transcript = transcribe_meeting_audio(tmp_file_path, mime_type, progress_callback=progress_callback)
+    finally:
+        os.remove(tmp_file_path)
+    
+    if not transcript or transcript.startswith("Error:"):
+        raise RuntimeError(transcript or 'Transcription failed')
+    if progress_callback:
+        progress_callback('transcribed')
+    
+    if cached and cached['analysis']:
+        analysis = cached['analysis']
+    else:
+        # Generate meeting analysis (takeaways, summary and notes run concurrently)
+        analysis = generate_meeting_analysis(transcript)
+        if cache:
+            # Only complete analyses are worth caching; a partial one is regenerated next time
+            cache.put(cache_key, transcript, None if analysis['errors'] else analysis)
+    if progress_callback:
+        progress_callback('analyzed')
+    
+    # Parse chapters
+    chapters = parse_chapter_transcript(transcript)
+    
+    # Create a session ID for this meeting
+    session_id = meeting_sessions.create(transcript, chapters)
+    
+    return {
+        'success': True,
+        'session_id': session_id,
+        'transcript': transcript,
+        'chapters': chapters,
+        'takeaways': analysis['takeaways'],
+        'summary': analysis['summary'],
+        'notes': analysis['notes'],
+        'analysis_errors': analysis['errors'],
+        'filename': filename
+    }
+
 @app.route('/api/transcribe', methods=['POST'])
 def transcribe_endpoint():
     """Endpoint for transcribing audio files"""
     try:
-        if 'audio' not in request.files:
-            return jsonify({'error': 'No audio file provided'}), 400
-        
-        audio_file = request.files['audio']
-        if audio_file.filename == '':
-            return jsonify({'error': 'No file selected'}), 400
-        
-        # Secure the filename
-        filename = secure_filename(audio_file.filename)
+        tmp_file_path, filename, mime_type, audio_hash = save_uploaded_audio()
+        if not tmp_file_path:
+            return jsonify({'error': filename}), 400
         
-        # Save uploaded file temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(filename)[1]) as tmp_file:
-            audio_file.save(tmp_file.name)
-            tmp_file_path = tmp_file.name
-        
-        # Get MIME type
-        mime_type = get_mime_type(filename, audio_file.content_type)
+        return jsonify(process_meeting_audio(tmp_file_path, mime_type, filename, audio_hash))
+            
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/jobs', methods=['POST'])
+def create_transcription_job():
+    """Start transcribing an audio file in the background and return a job ID immediately"""
+    try:
+        tmp_file_path, filename, mime_type, audio_hash = save_uploaded_audio()
+        if not tmp_file_path:
+            return jsonify({'error': filename}), 400
         
-        # Transcribe
-        transcript = transcribe_audio(tmp_file_path, mime_type)
-        os.remove(tmp_file_path)
+        try:
+            job_id = job_manager.submit(process_meeting_audio, tmp_file_path, mime_type, filename, audio_hash,
+                                        description=filename)
+        except JobQueueFullError as e:
+            os.remove(tmp_file_path)
+            return jsonify({'error': str(e)}), 503
         
-        if transcript and not transcript.startswith("Error:"):
-            # Generate meeting analysis
-            takeaways = generate_meeting_takeaways(transcript)
-            summary = generate_meeting_summary(transcript)
-            notes = generate_meeting_notes(transcript)
-            
-            # Parse chapters
-            chapters = parse_chapter_transcript(transcript)
-            
-            # Create a session ID for this meeting
-            session_id = str(uuid.uuid4())
-            meeting_sessions[session_id] = {
-                'transcript': transcript,
-                'memory': ConversationBufferMemory(memory_key="chat_history", return_messages=True),
-                'chat_history': []
-            }
+        return jsonify({
+            'success': True,
+            'job_id': job_id,
+            'status': 'queued',
+            'status_url': f'/api/jobs/{job_id}'
+        }), 202
             
-            return jsonify({
-                'success': True,
-                'session_id': session_id,
-                'transcript': transcript,
-                'chapters': chapters,
-                'takeaways': takeaways,
-                'summary': summary,
-                'notes': notes,
-                'filename': filename
-            })
-        else:
-            return jsonify({'error': transcript or 'Transcription failed'}), 500
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_transcription_job(job_id):
+    """Get the progress of a transcription job, including its result once completed"""
+    try:
+        job = job_manager.get_job(job_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        
+        return jsonify({'success': True, **job}), 200
             
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -552,23 +787,18 @@ def chat_endpoint():
         
         session = meeting_sessions[session_id]
         
-        # Get chat response
+        # Get chat response; get_chat_response records the exchange in the meeting's chat memory
+        # The cached transcript when there is one (only the question and history are sent),
+        # otherwise the passages retrieved for the question
+        cached_context, passages = meeting_sessions.get_chat_context(session_id, question)
         response = get_chat_response(
             transcript=session['transcript'],
             user_question=question,
-            memory=session['memory']
+            memory=session['memory'],
+            passages=passages,
+            cached_context=cached_context
         )
         
-        # Store chat history
-        session['chat_history'].append({
-            'role': 'user',
-            'content': question
-        })
-        session['chat_history'].append({
-            'role': 'assistant',
-            'content': response
-        })
-        
         return jsonify({
             'success': True,
             'response': response
@@ -577,6 +807,49 @@ def chat_endpoint():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/chat/stream', methods=['POST'])
+def chat_stream_endpoint():
+    """
+    Streams the answer to a chat question as Server-Sent Events: start, a token event per piece
+    of text, then done (or error). Disconnecting cancels the answer.
+    """
+    try:
+        data = request.get_json()
+        session_id = data.get('session_id')
+        question = data.get('question')
+        
+        if not session_id or session_id not in meeting_sessions:
+            return jsonify({'error': 'Invalid session ID'}), 400
+        
+        if not question:
+            return jsonify({'error': 'No question provided'}), 400
+        
+        request_id = data.get('request_id') or str(uuid.uuid4())
+        answer = stream_chat_answer(session_id, question, request_id)
+        
+        def generate():
+            chunks = []
+            try:
+                yield sse_event('start', {'session_id': session_id, 'request_id': request_id})
+                for text in answer:
+                    chunks.append(text)
+                    yield sse_event('token', {'text': text})
+            except Exception as e:
+                yield sse_event('error', {'error': str(e)})
+                return
+            finally:
+                # Werkzeug closes this generator when the client goes away, which ends the model request
+                answer.close()
+            yield sse_event('done', {'response': "".join(chunks)})
+        
+        return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'  # don't let a proxy buffer the stream
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/chat/history/<session_id>', methods=['GET'])
 def get_chat_history(session_id):
     """Get chat history for a session"""
@@ -586,7 +859,7 @@ def get_chat_history(session_id):
         
         return jsonify({
             'success': True,
-            'history': meeting_sessions[session_id]['chat_history']
+            'history': meeting_sessions.get_chat_history(session_id)
         })
         
     except Exception as e:
@@ -603,7 +876,7 @@ def search_endpoint():
         if not session_id or session_id not in meeting_sessions:
             return jsonify({'error': 'Invalid session ID'}), 400
         
-        transcript = meeting_sessions[session_id]['transcript']
+        transcript = meeting_sessions.get_transcript(session_id)
         chapters = parse_chapter_transcript(transcript)
         
         if search_term:
@@ -659,6 +932,8 @@ def handle_disconnect(reason=None):
             print(f'Client disconnected: {client_id} (reason: {reason})')
         else:
             print(f'Client disconnected: {client_id}')
+        # Nobody is left to read the answers this client asked for
+        cancel_chat_streams(client_id)
     except Exception as e:
         print(f'Error in disconnect handler: {e}')
 
@@ -669,10 +944,18 @@ def handle_join_session(data):
         session_id = data.get('session_id')
         client_id = getattr(request, 'sid', 'unknown')
         if session_id:
+            # Audio has to reach the worker running the session's pipeline
+            if emit_wrong_worker(session_id):
+                return
             join_room(f"session_{session_id}")
+            
+            # Streaming clients list the formats they can send, most preferred first;
+            # joining without a list keeps the session's current format
+            audio_format = transcription_manager.negotiate_audio_format(session_id, data.get('audio_formats'))
             emit('joined_session', {
                 'session_id': session_id,
-                'message': f'Joined session {session_id}'
+                'message': f'Joined session {session_id}',
+                'audio_format': audio_format
             })
             print(f'Client {client_id} joined session {session_id}')
         else:
@@ -702,13 +985,13 @@ def handle_join_shared_session(data):
                 })
                 print(f'Viewer {client_id} joined shared session {session_id}')
                 
-                # Send current transcript to the viewer
-                transcript = transcription_manager.get_shared_session_transcript(session_id)
-                if transcript:
-                    emit('current_transcript', {
-                        'session_id': session_id,
-                        'transcript': transcript
-                    })
+                # Send the current transcript, or only what a reconnecting viewer missed
+                since = data.get('since')
+                state = transcription_manager.get_shared_session_transcript_state(session_id, since)
+                if state and since is not None:
+                    emit('transcript_segments', {'session_id': session_id, **state})
+                elif state and state['transcript']:
+                    emit('current_transcript', {'session_id': session_id, **state})
             else:
                 emit('error', {'message': 'Session not found or not shared'})
         else:
@@ -720,6 +1003,79 @@ def handle_join_shared_session(data):
         except:
             pass
 
+@socketio.on('join_job')
+def handle_join_job(data):
+    """Handle client subscribing to progress updates of a transcription job"""
+    try:
+        job_id = data.get('job_id')
+        job = job_manager.get_job(job_id) if job_id else None
+        if job:
+            join_room(f"job_{job_id}")
+            # Send the current state so the client doesn't miss stages that already happened
+            emit('job_progress', job)
+        else:
+            emit('error', {'message': 'Job not found'})
+    except Exception as e:
+        print(f'Error in join_job handler: {e}')
+        try:
+            emit('error', {'message': f'Error joining job: {str(e)}'})
+        except:
+            pass
+
+@socketio.on('join_meeting')
+def handle_join_meeting(data):
+    """Handle client subscribing to the streamed chat answers of a transcribed meeting"""
+    try:
+        session_id = data.get('session_id')
+        if session_id and session_id in meeting_sessions:
+            join_room(f"meeting_{session_id}")
+            emit('joined_meeting', {'session_id': session_id})
+        else:
+            emit('error', {'message': 'Meeting not found'})
+    except Exception as e:
+        print(f'Error in join_meeting handler: {e}')
+        try:
+            emit('error', {'message': f'Error joining meeting: {str(e)}'})
+        except:
+            pass
+
+@socketio.on('chat_question')
+def handle_chat_question(data):
+    """Handle a chat question whose answer is streamed to the meeting's room"""
+    try:
+        session_id = data.get('session_id')
+        question = data.get('question')
+        if not session_id or session_id not in meeting_sessions:
+            emit('error', {'message': 'Invalid session ID'})
+            return
+        if not question:
+            emit('error', {'message': 'No question provided'})
+            return
+
+        client_id = request.sid
+        request_id = data.get('request_id') or str(uuid.uuid4())
+        cancelled = threading.Event()
+        with chat_streams_lock:
+            chat_streams.setdefault(client_id, {})[request_id] = cancelled
+        # The asking client gets the answer through the room, like everyone else following the meeting
+        join_room(f"meeting_{session_id}")
+        emit('chat_accepted', {'session_id': session_id, 'request_id': request_id})
+        socketio.start_background_task(run_chat_stream, client_id, session_id, question, request_id, cancelled)
+    except Exception as e:
+        print(f'Error in chat_question handler: {e}')
+        try:
+            emit('error', {'message': f'Error answering question: {str(e)}'})
+        except:
+            pass
+
+@socketio.on('chat_cancel')
+def handle_chat_cancel(data):
+    """Handle client stopping an answer it asked for (all of them without a request_id)"""
+    try:
+        cancel_chat_streams(request.sid, (data or {}).get('request_id'))
+    except Exception as e:
+        print(f'Error in chat_cancel handler: {e}')
+
 @socketio.on('leave_session')
 def handle_leave_session(data):
     """Handle client leaving a transcription session"""
@@ -755,25 +1111,30 @@ def handle_audio_chunk(data):
                 pass
             return
         
-        # Convert base64 audio data to bytes if needed
-        import base64
-        if isinstance(audio_data, str):
+        if emit_wrong_worker(session_id):
+            return
+        
+        # Binary frames (with a seq/format header), raw bytes, or base64 from older clients
+        try:
+            frame = decode_audio_message(data)
+        except ValueError as decode_error:
+            print(f"Error decoding audio chunk: {decode_error}")
             try:
-                audio_bytes = base64.b64decode(audio_data)
-                print(f"Processed audio chunk for session {session_id}: {len(audio_bytes)} bytes")
-            except Exception as decode_error:
-                print(f"Error decoding base64 audio: {decode_error}")
-                try:
-                    emit('error', {'message': f'Error decoding audio data: {str(decode_error)}'})
-                except:
-                    pass
-                return
-        else:
-            audio_bytes = bytes(audio_data)
-            print(f"Using raw audio bytes length: {len(audio_bytes)}")
+                emit('error', {'message': f'Error decoding audio data: {str(decode_error)}'})
+            except:
+                pass
+            return
+        
+        if frame.format and frame.format not in LIVE_AUDIO_FORMATS:
+            try:
+                emit('error', {'message': f'Unsupported audio format: {frame.format}'})
+            except:
+                pass
+            return
+        print(f"Processed {frame.encoding} audio chunk for session {session_id}: {len(frame.payload)} bytes")
         
         # Add audio to session
-        success = transcription_manager.add_audio_to_session(session_id, audio_bytes)
+        success = transcription_manager.add_audio_to_session(session_id, frame.payload, frame.seq, frame.format)
         
         if not success:
             print(f"Failed to add audio to session {session_id}")
@@ -801,13 +1162,15 @@ def handle_get_transcript(data):
                 pass
             return
         
-        transcript = transcription_manager.get_session_transcript(session_id)
-        if transcript is not None:
+        # With since=<seq>, send only the segments committed after it
+        since = data.get('since')
+        state = transcription_manager.get_session_transcript_state(session_id, since)
+        if state is not None:
             try:
-                emit('current_transcript', {
-                    'session_id': session_id,
-                    'transcript': transcript
-                })
+                if since is not None:
+                    emit('transcript_segments', {'session_id': session_id, **state})
+                else:
+                    emit('current_transcript', {'session_id': session_id, **state})
             except:
                 pass
         else:
@@ -837,10 +1200,15 @@ def default_error_handler(e):
 # =============================================================================
 
 if __name__ == '__main__':
+    # Each worker of a scaled-out deployment listens on its own port
+    port = int(os.environ.get('PORT', 5000))
+    
     print("Starting Unified Transcription Server...")
-    print("Server will run on http://localhost:5000")
-    print("WebSocket endpoint: ws://localhost:5000")
+    print(f"Server will run on http://localhost:{port}")
+    print(f"WebSocket endpoint: ws://localhost:{port}")
     print("Services: Live Transcription + Meeting Analysis")
+    if LIVE_WORKER_URLS:
+        print(f"Worker {LIVE_WORKER_INDEX + 1} of {len(LIVE_WORKER_URLS)} (message queue: {SOCKETIO_MESSAGE_QUEUE or 'none'})")
     
     try:
         # Run the SocketIO server with improved configuration
@@ -848,7 +1216,7 @@ if __name__ == '__main__':
             app, 
             debug=False,  # Disable debug mode in production
             host='localhost', 
-            port=5000,  # Use single port for both services
+            port=port,  # Use single port for both services
             allow_unsafe_werkzeug=True,
             use_reloader=False,  # Disable auto-reloader to prevent issues
             log_output=False  # Reduce log noise
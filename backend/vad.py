@@ -0,0 +1,67 @@
+import os
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Live audio is 16 kHz mono 16-bit PCM
+SAMPLE_RATE = 16000
+
+# Set to "false" to send every live buffer to the model, speech or not
+LIVE_VAD_ENABLED = os.getenv("LIVE_VAD_ENABLED", "true").lower() == "true"
+
+# Analysis frame length
+VAD_FRAME_MS = int(os.getenv("LIVE_VAD_FRAME_MS", "30"))
+
+# Frames quieter than this (dBFS) are never speech
+VAD_ENERGY_FLOOR_DB = float(os.getenv("LIVE_VAD_ENERGY_FLOOR_DB", "-50"))
+
+# A frame must also be this many dB above the buffer's noise floor to count as speech
+VAD_NOISE_MARGIN_DB = float(os.getenv("LIVE_VAD_NOISE_MARGIN_DB", "8"))
+
+# Frames louder than this (dBFS) always clear the noise-floor check
+VAD_LOUD_DB = float(os.getenv("LIVE_VAD_LOUD_DB", "-30"))
+
+# Frames with a zero-crossing rate above this are treated as hiss unless they are also loud
+VAD_MAX_ZERO_CROSSING_RATE = float(os.getenv("LIVE_VAD_MAX_ZCR", "0.4"))
+
+# A buffer needs at least this much speech to be worth transcribing
+VAD_MIN_SPEECH_MS = int(os.getenv("LIVE_VAD_MIN_SPEECH_MS", "200"))
+
+def pcm_to_frames(pcm: bytes, frame_ms: int = VAD_FRAME_MS) -> np.ndarray:
+    """Splits 16-bit PCM into a (frames, samples) float array in [-1, 1], dropping the partial tail"""
+    samples = np.frombuffer(pcm[:len(pcm) // 2 * 2], dtype=np.int16)
+    frame_len = SAMPLE_RATE * frame_ms // 1000
+    frame_count = len(samples) // frame_len
+    return samples[:frame_count * frame_len].reshape(frame_count, frame_len).astype(np.float32) / 32768.0
+
+def classify_frames(pcm: bytes, frame_ms: int = VAD_FRAME_MS) -> np.ndarray:
+    """
+    Classifies each frame of 16-bit PCM as speech (True) or not.
+
+    A frame is speech when its energy clears both the absolute floor and the buffer's own
+    noise floor, and its zero-crossing rate doesn't look like broadband noise (very loud
+    frames pass regardless, which keeps strong fricatives).
+    """
+    frames = pcm_to_frames(pcm, frame_ms)
+    if len(frames) == 0:
+        return np.zeros(0, dtype=bool)
+
+    rms = np.sqrt(np.mean(frames ** 2, axis=1))
+    energy_db = 20 * np.log10(rms + 1e-10)
+    signs = np.signbit(frames)
+    zero_crossing_rate = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+
+    noise_floor_db = np.percentile(energy_db, 10)
+    threshold_db = max(VAD_ENERGY_FLOOR_DB, min(noise_floor_db + VAD_NOISE_MARGIN_DB, VAD_LOUD_DB))
+    loud = energy_db > threshold_db
+    tonal = zero_crossing_rate < VAD_MAX_ZERO_CROSSING_RATE
+    return loud & (tonal | (energy_db > threshold_db + 15))
+
+def speech_duration_ms(pcm: bytes, frame_ms: int = VAD_FRAME_MS) -> int:
+    """Total duration of the frames classified as speech"""
+    return int(np.count_nonzero(classify_frames(pcm, frame_ms))) * frame_ms
+
+def contains_speech(pcm: bytes, min_speech_ms: int = VAD_MIN_SPEECH_MS) -> bool:
+    """Whether a PCM buffer holds enough speech to be worth transcribing"""
+    return speech_duration_ms(pcm) >= min_speech_ms
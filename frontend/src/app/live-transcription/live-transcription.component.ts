@@ -840,17 +840,12 @@ export class LiveTranscriptionComponent implements OnInit, OnDestroy {
       
       console.log(`Final audio bytes: ${audioBytes.length} bytes`);
       console.log(`Expected for ${(currentBufferSamples / 16000).toFixed(1)}s: ${(currentBufferSamples * 2).toFixed(0)} bytes (16-bit PCM)`);
-      
-      // Convert to base64
-      const base64Audio = this.arrayBufferToBase64(audioBytes);
-      console.log(`Base64 conversion result: ${base64Audio.length} characters`);
-      console.log(`Base64 sample: ${base64Audio.substring(0, 50)}...`);
       console.log(`=== END DEBUG ===`);
       
-      // Send to server
+      // Send to server as a binary frame
       this.liveTranscriptionService.sendAudioChunk(
         this.currentSession.session_id, 
-        base64Audio
+        audioBytes
       );
       
     } catch (error) {
@@ -858,71 +853,6 @@ export class LiveTranscriptionComponent implements OnInit, OnDestroy {
     }
   }
 
-  private arrayBufferToBase64(buffer: Uint8Array): string {
-    try {
-      console.log(`Converting ${buffer.length} bytes to base64...`);
-      
-      // For smaller buffers, use the direct method
-      if (buffer.length < 50000) {
-        console.log('Using direct conversion method');
-        const binaryString = Array.from(buffer, byte => String.fromCharCode(byte)).join('');
-        const result = btoa(binaryString);
-        console.log(`Direct conversion completed: ${result.length} chars`);
-        return result;
-      }
-      
-      console.log('Using chunked conversion method');
-      
-      // For larger buffers, we need to use FileReader or similar approach
-      // But since we can't use async here, let's try a different chunking approach
-      // that maintains base64 integrity
-      
-      let binary = '';
-      const chunkSize = 32768; // 32KB chunks (safe for String.fromCharCode)
-      const totalChunks = Math.ceil(buffer.length / chunkSize);
-      console.log(`Processing ${totalChunks} chunks of ${chunkSize} bytes each`);
-      
-      for (let i = 0; i < buffer.length; i += chunkSize) {
-        const chunk = buffer.slice(i, i + chunkSize);
-        // Convert chunk to string character by character (safer than apply)
-        let chunkString = '';
-        for (let j = 0; j < chunk.length; j++) {
-          chunkString += String.fromCharCode(chunk[j]);
-        }
-        binary += chunkString;
-        
-        if ((i / chunkSize + 1) % 10 === 0) {
-          console.log(`Processed chunk ${i / chunkSize + 1}/${totalChunks}`);
-        }
-      }
-      
-      console.log(`Binary string length: ${binary.length}, encoding to base64...`);
-      
-      // Now encode the complete binary string as base64
-      const result = btoa(binary);
-      console.log(`Chunked conversion completed: ${result.length} chars`);
-      return result;
-      
-    } catch (error) {
-      console.error('Error converting to base64:', error);
-      
-      // Ultimate fallback: convert byte by byte
-      try {
-        console.log('Using byte-by-byte fallback conversion');
-        let binary = '';
-        for (let i = 0; i < buffer.length; i++) {
-          binary += String.fromCharCode(buffer[i]);
-        }
-        const result = btoa(binary);
-        console.log(`Fallback conversion completed: ${result.length} chars`);
-        return result;
-      } catch (finalError) {
-        console.error('Final fallback base64 conversion failed:', finalError);
-        throw new Error('Failed to convert audio to base64');
-      }
-    }
-  }
-
   private saveCompleteRawRecording(): void {
     if (this.completeRawBuffer.length === 0) {
       console.log('No raw audio to save');
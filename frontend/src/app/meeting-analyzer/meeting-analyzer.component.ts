@@ -1,4 +1,4 @@
-import { Component, OnInit, Output, EventEmitter } from '@angular/core';
+import { Component, OnInit, OnDestroy, Output, EventEmitter } from '@angular/core';
 import { CommonModule } from '@angular/common';
 import { FormsModule } from '@angular/forms';
 import { MatTabsModule } from '@angular/material/tabs';
@@ -14,6 +14,7 @@ import { MatMenuModule } from '@angular/material/menu';
 import { MatChipsModule } from '@angular/material/chips';
 import { MatTooltipModule } from '@angular/material/tooltip';
 import { DomSanitizer, SafeHtml } from '@angular/platform-browser';
+import { Subscription } from 'rxjs';
 import { MeetingService, Chapter, TranscriptionResponse } from '../services/meeting.service';
 import { marked } from 'marked';
 
@@ -45,7 +46,7 @@ interface ChatMessage {
   templateUrl: './meeting-analyzer.component.html',
   styleUrls: ['./meeting-analyzer.component.css']
 })
-export class MeetingAnalyzerComponent implements OnInit {
+export class MeetingAnalyzerComponent implements OnInit, OnDestroy {
   // File upload
   selectedFile: File | null = null;
   isDragging = false;
@@ -77,6 +78,8 @@ export class MeetingAnalyzerComponent implements OnInit {
   chatMessages: ChatMessage[] = [];
   newMessage: string = '';
   isSendingMessage = false;
+  streamingMessage: ChatMessage | null = null;  // the answer being streamed in
+  private chatSubscription?: Subscription;
   
   // Tab management
   selectedTabIndex = 0;
@@ -113,6 +116,10 @@ export class MeetingAnalyzerComponent implements OnInit {
     this.checkForLiveSessionAnalysis();
   }
 
+  ngOnDestroy(): void {
+    this.cancelChatStream();
+  }
+
   private checkForLiveSessionAnalysis(): void {
     const liveAnalysis = sessionStorage.getItem('live-session-analysis');
     if (liveAnalysis) {
@@ -309,31 +316,53 @@ export class MeetingAnalyzerComponent implements OnInit {
     this.newMessage = '';
     this.isSendingMessage = true;
 
-    this.meetingService.sendChatMessage(this.sessionId, question).subscribe({
-      next: (response) => {
-        const assistantMessage: ChatMessage = {
-          role: 'assistant',
-          content: response.response,
-          timestamp: new Date()
-        };
-        this.chatMessages.push(assistantMessage);
+    // The answer is shown as it is generated
+    this.chatSubscription = this.meetingService.streamChatMessage(this.sessionId, question).subscribe({
+      next: (event) => {
+        if (!this.streamingMessage) {
+          this.streamingMessage = {
+            role: 'assistant',
+            content: '',
+            timestamp: new Date()
+          };
+          this.chatMessages.push(this.streamingMessage);
+        }
+        if (event.type === 'token') {
+          this.streamingMessage.content += event.text;
+        } else {
+          this.streamingMessage.content = event.text;
+        }
+        this.scrollChatToBottom();
+      },
+      complete: () => {
+        this.streamingMessage = null;
         this.isSendingMessage = false;
-        
-        // Scroll to bottom of chat
-        setTimeout(() => {
-          const messagesArea = document.querySelector('.messages-area');
-          if (messagesArea) {
-            messagesArea.scrollTop = messagesArea.scrollHeight;
-          }
-        }, 100);
       },
       error: (error) => {
+        this.streamingMessage = null;
         this.isSendingMessage = false;
         this.showError('Failed to send message');
       }
     });
   }
 
+  private scrollChatToBottom(): void {
+    setTimeout(() => {
+      const messagesArea = document.querySelector('.messages-area');
+      if (messagesArea) {
+        messagesArea.scrollTop = messagesArea.scrollHeight;
+      }
+    }, 100);
+  }
+
+  private cancelChatStream(): void {
+    // Aborting the request cancels the answer on the server
+    this.chatSubscription?.unsubscribe();
+    this.chatSubscription = undefined;
+    this.streamingMessage = null;
+    this.isSendingMessage = false;
+  }
+
   formatTimestamp(line: string): SafeHtml {
     // Check if line starts with timestamp pattern [HH:MM:SS]
     const timestampRegex = /^\[(\d{2}:\d{2}:\d{2})\]/;
@@ -415,6 +444,7 @@ export class MeetingAnalyzerComponent implements OnInit {
     this.takeawaysHtml = '';
     this.summaryHtml = '';
     this.notesHtml = '';
+    this.cancelChatStream();
     this.chatMessages = [];
     this.searchTerm = '';
     this.isLiveSessionAnalysis = false;
@@ -12,6 +12,7 @@ export interface LiveSession {
 }
 
 export interface TranscriptUpdate {
+  seq?: number;
   timestamp: string;
   text: string;
   session_id: string;
@@ -20,6 +21,7 @@ export interface TranscriptUpdate {
 export interface LiveSessionResponse {
   success: boolean;
   session_id?: string;
+  worker_url?: string | null;
   message?: string;
   error?: string;
 }
@@ -55,6 +57,25 @@ export interface SessionStatusUpdate {
   timestamp: string;
 }
 
+export interface BackpressureUpdate {
+  session_id: string;
+  state: 'ok' | 'slow_down' | 'pause';
+  policy: 'block' | 'drop_oldest' | 'merge';
+  lag_seconds: number;
+  backlog_seconds: number;
+  queued_chunks: number;
+}
+
+// Audio held back while the server asks us to pause (about 30s of 16 kHz 16-bit PCM)
+const MAX_HELD_AUDIO_BYTES = 30 * 16000 * 2;
+
+// Binary audio frame header (must match backend/audio_frames.py):
+// "AUDF" | version (uint8) | format code (uint8) | reserved (uint16) | sequence number (uint32), big-endian
+const AUDIO_FRAME_MAGIC = [0x41, 0x55, 0x44, 0x46];
+const AUDIO_FRAME_VERSION = 1;
+const AUDIO_FRAME_HEADER_BYTES = 12;
+const AUDIO_FORMAT_PCM_S16LE = 0;
+
 @Injectable({
   providedIn: 'root'
 })
@@ -62,6 +83,18 @@ export class LiveTranscriptionService {
   private apiUrl = 'http://localhost:5000/api';
   private socketUrl = 'http://localhost:5000';
   private socket!: any;
+  private audioFrameSeq = 0;
+
+  // Server backpressure: "slow_down" sends every other chunk as one merged frame,
+  // "pause" holds audio locally until the server says "ok"
+  private backpressureState: BackpressureUpdate['state'] = 'ok';
+  private heldAudio: Uint8Array[] = [];
+  private heldAudioBytes = 0;
+  private backpressure$ = new Subject<BackpressureUpdate>();
+
+  // Resume point for reconnects: the session we follow and the last transcript seq we have
+  private followedSession: { session_id: string, shared: boolean } | null = null;
+  private lastTranscriptSeq = 0;
 
   // Observables for real-time updates
   private transcriptUpdates$ = new Subject<TranscriptUpdate[]>();
@@ -98,6 +131,7 @@ export class LiveTranscriptionService {
     this.socket.on('connect', () => {
       console.log('Connected to live transcription server');
       this.connectionStatus$.next(true);
+      this.resumeFollowedSession();
     });
 
     this.socket.on('disconnect', (reason: string) => {
@@ -121,11 +155,26 @@ export class LiveTranscriptionService {
 
     this.socket.on('transcript_update', (data: { session_id: string, updates: TranscriptUpdate[] }) => {
       console.log('Received transcript_update event:', data);
-      this.transcriptUpdates$.next(data.updates);
+      const updates = this.takeNewUpdates(data.updates);
+      if (updates.length > 0) {
+        this.transcriptUpdates$.next(updates);
+      }
+    });
+
+    // Segments missed while disconnected (reply to a request with `since`)
+    this.socket.on('transcript_segments', (data: { session_id: string, segments: TranscriptUpdate[], last_seq: number }) => {
+      console.log('Received transcript_segments event:', data);
+      const updates = this.takeNewUpdates(data.segments);
+      if (updates.length > 0) {
+        this.transcriptUpdates$.next(updates);
+      }
     });
 
-    this.socket.on('current_transcript', (data: { session_id: string, transcript: string }) => {
+    this.socket.on('current_transcript', (data: { session_id: string, transcript: string, last_seq?: number }) => {
       console.log('Received current_transcript event:', data);
+      if (data.last_seq !== undefined) {
+        this.lastTranscriptSeq = Math.max(this.lastTranscriptSeq, data.last_seq);
+      }
       if (data.transcript) {
         // Parse the transcript into updates
         const lines = data.transcript.split('\n').filter(line => line.trim());
@@ -173,6 +222,24 @@ export class LiveTranscriptionService {
       console.log('Left session:', data);
     });
 
+    this.socket.on('backpressure', (data: BackpressureUpdate) => {
+      console.log('Received backpressure event:', data);
+      this.backpressureState = data.state;
+      this.backpressure$.next(data);
+      if (data.state === 'ok') {
+        this.sendHeldAudio(data.session_id);
+      }
+    });
+
+    // Scaled-out servers: another worker runs this session's pipeline, so move there and rejoin
+    this.socket.on('wrong_worker', (data: { session_id: string, worker_url: string }) => {
+      if (data.worker_url && data.worker_url !== this.socketUrl) {
+        console.log(`Session ${data.session_id} is served by ${data.worker_url}, reconnecting`);
+        this.socketUrl = data.worker_url;
+        this.initializeSocket();
+      }
+    });
+
     this.socket.on('joined_shared_session', (data: { session_id: string, session_info: SharedSessionInfo, message: string }) => {
       console.log('Joined shared session:', data);
       this.sharedSessionJoined$.next({ session_id: data.session_id, session_info: data.session_info });
@@ -181,6 +248,32 @@ export class LiveTranscriptionService {
     console.log('=== SOCKET INITIALIZATION COMPLETE ===');
   }
 
+  // Drops updates already seen (pushes can overlap with a snapshot or a resume)
+  private takeNewUpdates(updates: TranscriptUpdate[]): TranscriptUpdate[] {
+    const fresh = updates.filter(update => update.seq === undefined || update.seq > this.lastTranscriptSeq);
+    for (const update of fresh) {
+      if (update.seq !== undefined) {
+        this.lastTranscriptSeq = update.seq;
+      }
+    }
+    return fresh;
+  }
+
+  // After a reconnect, rejoin the room and fetch only what was missed
+  private resumeFollowedSession(): void {
+    if (!this.followedSession) {
+      return;
+    }
+    const { session_id, shared } = this.followedSession;
+    console.log(`Resuming session ${session_id} after seq ${this.lastTranscriptSeq}`);
+    if (shared) {
+      this.socket.emit('join_shared_session', { session_id, since: this.lastTranscriptSeq });
+    } else {
+      this.socket.emit('join_session', { session_id });
+      this.socket.emit('get_transcript', { session_id, since: this.lastTranscriptSeq });
+    }
+  }
+
   // Observable getters
   getTranscriptUpdates(): Observable<TranscriptUpdate[]> {
     return this.transcriptUpdates$.asObservable();
@@ -206,6 +299,10 @@ export class LiveTranscriptionService {
     return this.errors$.asObservable();
   }
 
+  getBackpressure(): Observable<BackpressureUpdate> {
+    return this.backpressure$.asObservable();
+  }
+
   getSharedSessionJoined(): Observable<{session_id: string, session_info: SharedSessionInfo}> {
     return this.sharedSessionJoined$.asObservable();
   }
@@ -256,30 +353,91 @@ export class LiveTranscriptionService {
   // Socket operations
   joinSession(sessionId: string): void {
     console.log(`Joining session: ${sessionId}`);
+    this.audioFrameSeq = 0;
+    this.backpressureState = 'ok';
+    this.heldAudio = [];
+    this.heldAudioBytes = 0;
+    this.followSession(sessionId, false);
     this.socket.emit('join_session', { session_id: sessionId });
   }
 
   joinSharedSession(sessionId: string): void {
     console.log(`Joining shared session: ${sessionId}`);
+    this.followSession(sessionId, true);
     this.socket.emit('join_shared_session', { session_id: sessionId });
   }
 
   leaveSession(sessionId: string): void {
     if (this.socket && this.socket.connected) {
       console.log(`Leaving session: ${sessionId}`);
+      this.followedSession = null;
       this.socket.emit('leave_session', { session_id: sessionId });
     }
   }
 
-  sendAudioChunk(sessionId: string, audioData: string): void {
+  private followSession(sessionId: string, shared: boolean): void {
+    if (this.followedSession?.session_id !== sessionId) {
+      this.lastTranscriptSeq = 0;
+    }
+    this.followedSession = { session_id: sessionId, shared };
+  }
+
+  sendAudioChunk(sessionId: string, pcmData: Uint8Array): void {
+    if (this.backpressureState === 'ok' && this.heldAudio.length === 0) {
+      this.emitAudioFrame(sessionId, pcmData);
+      return;
+    }
+
+    this.heldAudio.push(pcmData);
+    this.heldAudioBytes += pcmData.length;
+    // Keep the most recent audio if the pause outlasts the local buffer
+    while (this.heldAudioBytes > MAX_HELD_AUDIO_BYTES && this.heldAudio.length > 1) {
+      this.heldAudioBytes -= this.heldAudio.shift()!.length;
+    }
+
+    if (this.backpressureState === 'ok' || (this.backpressureState === 'slow_down' && this.heldAudio.length >= 2)) {
+      this.sendHeldAudio(sessionId);
+    }
+  }
+
+  // Sends everything held back as one frame
+  private sendHeldAudio(sessionId: string): void {
+    if (this.heldAudio.length === 0) {
+      return;
+    }
+    const merged = new Uint8Array(this.heldAudioBytes);
+    let offset = 0;
+    for (const chunk of this.heldAudio) {
+      merged.set(chunk, offset);
+      offset += chunk.length;
+    }
+    this.heldAudio = [];
+    this.heldAudioBytes = 0;
+    this.emitAudioFrame(sessionId, merged);
+  }
+
+  // Sends 16-bit PCM as a binary attachment; no base64 round-trip
+  private emitAudioFrame(sessionId: string, pcmData: Uint8Array): void {
     if (this.socket && this.socket.connected) {
       this.socket.emit('audio_chunk', {
         session_id: sessionId,
-        audio_data: audioData
+        audio_data: this.buildAudioFrame(pcmData, this.audioFrameSeq++)
       });
     }
   }
 
+  private buildAudioFrame(payload: Uint8Array, seq: number): ArrayBuffer {
+    const frame = new Uint8Array(AUDIO_FRAME_HEADER_BYTES + payload.length);
+    const header = new DataView(frame.buffer);
+    frame.set(AUDIO_FRAME_MAGIC, 0);
+    header.setUint8(4, AUDIO_FRAME_VERSION);
+    header.setUint8(5, AUDIO_FORMAT_PCM_S16LE);
+    header.setUint16(6, 0);
+    header.setUint32(8, seq >>> 0);
+    frame.set(payload, AUDIO_FRAME_HEADER_BYTES);
+    return frame.buffer;
+  }
+
   requestCurrentTranscript(sessionId: string): void {
     if (this.socket && this.socket.connected) {
       console.log(`Requesting current transcript for session: ${sessionId}`);
@@ -1,6 +1,6 @@
 import { Injectable } from '@angular/core';
 import { HttpClient, HttpHeaders } from '@angular/common/http';
-import { Observable } from 'rxjs';
+import { Observable, Subscriber } from 'rxjs';
 
 export interface Chapter {
   title: string;
@@ -25,6 +25,11 @@ export interface ChatResponse {
   response: string;
 }
 
+export interface ChatStreamEvent {
+  type: 'token' | 'done';
+  text: string;  // the new piece of the answer, or the whole answer once done
+}
+
 export interface ChatHistory {
   success: boolean;
   history: Array<{
@@ -64,6 +69,75 @@ export class MeetingService {
     );
   }
 
+  /**
+   * Streams the answer to a question as it is generated. The server sends Server-Sent Events;
+   * they are read with fetch because EventSource can't POST. Unsubscribing aborts the request,
+   * which cancels the answer on the server.
+   */
+  streamChatMessage(sessionId: string, question: string): Observable<ChatStreamEvent> {
+    return new Observable<ChatStreamEvent>(subscriber => {
+      const controller = new AbortController();
+
+      fetch(`${this.apiUrl}/chat/stream`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ session_id: sessionId, question }),
+        signal: controller.signal
+      })
+        .then(async response => {
+          if (!response.ok || !response.body) {
+            const body = await response.json().catch(() => ({}));
+            throw new Error(body.error || `Chat request failed (${response.status})`);
+          }
+
+          const reader = response.body.getReader();
+          const decoder = new TextDecoder();
+          let buffer = '';
+          while (!subscriber.closed) {
+            const { done, value } = await reader.read();
+            if (done) {
+              break;
+            }
+            buffer += decoder.decode(value, { stream: true });
+            let boundary: number;
+            while ((boundary = buffer.indexOf('\n\n')) >= 0) {
+              this.handleChatStreamEvent(buffer.slice(0, boundary), subscriber);
+              buffer = buffer.slice(boundary + 2);
+            }
+          }
+          subscriber.complete();
+        })
+        .catch(error => {
+          if (!controller.signal.aborted) {
+            subscriber.error(error);
+          }
+        });
+
+      return () => controller.abort();
+    });
+  }
+
+  private handleChatStreamEvent(block: string, subscriber: Subscriber<ChatStreamEvent>): void {
+    let event = 'message';
+    let data = '';
+    for (const line of block.split('\n')) {
+      if (line.startsWith('event: ')) {
+        event = line.slice(7);
+      } else if (line.startsWith('data: ')) {
+        data += line.slice(6);
+      }
+    }
+    const payload = data ? JSON.parse(data) : {};
+
+    if (event === 'token') {
+      subscriber.next({ type: 'token', text: payload.text });
+    } else if (event === 'done') {
+      subscriber.next({ type: 'done', text: payload.response });
+    } else if (event === 'error') {
+      subscriber.error(new Error(payload.error));
+    }
+  }
+
   getChatHistory(sessionId: string): Observable<ChatHistory> {
     return this.http.get<ChatHistory>(`${this.apiUrl}/chat/history/${sessionId}`);
   }